@@ -21,4 +21,42 @@
 from version import *
 
 __author__ = "Roy Nieterau"
-__all__ = ['core', 'datatypes']
\ No newline at end of file
+__all__ = ['core', 'datatypes', 'graph', 'packing', 'backend', 'modifier', 'session', 'readback',
+           'instrument', 'lazy', 'evaluate', 'baking', 'cost', 'deferred', 'build_session', 'values', 'bake',
+           'unbake', 'profile']
+
+
+def deferred(pack=False):
+    """ Defer building the node network until leaving the context, see `nodex.graph.deferred()` """
+    import nodex.graph
+    return nodex.graph.deferred(pack=pack)
+
+
+def build_session(undo=True, name="nodex", defer=True):
+    """ Build as one undo step with refresh and evaluation suspended, see `nodex.session.buildSession()` """
+    import nodex.session
+    return nodex.session.buildSession(undo=undo, name=name, defer=defer)
+
+
+def values(nodexes, asArray=False):
+    """ Returns the values of all Nodex as plain tuples or NumPy array read in bulk, see `nodex.readback.values()` """
+    import nodex.readback
+    return nodex.readback.values(nodexes, asArray=asArray)
+
+
+def bake(nodexes, start, end, step=1.0, tolerance=1e-4, keep=True):
+    """ Replace the Nodex by animation curves sampled over the frame range, see `nodex.baking.bake()` """
+    import nodex.baking
+    return nodex.baking.bake(nodexes, start, end, step=step, tolerance=tolerance, keep=keep)
+
+
+def unbake(curves=None):
+    """ Rewire the outputs of baked curves back to their network, see `nodex.baking.unbake()` """
+    import nodex.baking
+    return nodex.baking.unbake(curves)
+
+
+def profile():
+    """ Count and time what is built within the context by method, see `nodex.instrument.profile()` """
+    import nodex.instrument
+    return nodex.instrument.profile()
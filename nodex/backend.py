@@ -0,0 +1,137 @@
+"""
+    Emission backends that create the nodes, set the values and make the connections for nodex.
+
+    All node helpers go through `nodex.graph` which emits with the current backend. By default that is the
+    `CmdsBackend` which only uses `maya.cmds` with plug names, so no pymel objects are created while building.
+    The backend can be selected for the session with `setBackend()` or temporarily with `using()`.
+
+    Example:
+        >>> with nodex.backend.using(nodex.backend.PymelBackend()):
+        >>>     result = Nodex("pSphere1.translate") * 2.0
+"""
+
+# standard library
+import contextlib
+
+
+class Backend(object):
+    """ Interface of an emission backend. Plugs are given by their full name, eg. ``pSphere1.translateX``. """
+
+    def createNode(self, nodeType, name=None):
+        """ Creates the node and returns its name. """
+        raise NotImplementedError()
+
+    def setAttr(self, plug, values, attrType=None):
+        """ Sets the values on the plug.
+
+            :param values: The positional values as passed to `maya.cmds.setAttr`
+            :type values: tuple
+        """
+        raise NotImplementedError()
+
+    def connectAttr(self, source, destination, force=False):
+        raise NotImplementedError()
+
+    def lockAttr(self, plug):
+        raise NotImplementedError()
+
+    def addAttr(self, node, longName, dataType):
+        """ Adds a dynamic attribute with the data type (eg. ``string``) to the node. """
+        raise NotImplementedError()
+
+    def objExists(self, name):
+        raise NotImplementedError()
+
+
+class CmdsBackend(Backend):
+    """ Emits with `maya.cmds`, or the given module with the same commands (eg. a stand-in for testing). """
+
+    def __init__(self, cmds=None):
+        if cmds is None:
+            import maya.cmds as cmds
+        self.cmds = cmds
+
+    def createNode(self, nodeType, name=None):
+        if name:
+            return self.cmds.createNode(nodeType, name=name)
+        return self.cmds.createNode(nodeType)
+
+    def setAttr(self, plug, values, attrType=None):
+        if attrType:
+            self.cmds.setAttr(plug, *values, type=attrType)
+        else:
+            self.cmds.setAttr(plug, *values)
+
+    def connectAttr(self, source, destination, force=False):
+        self.cmds.connectAttr(source, destination, force=force)
+
+    def lockAttr(self, plug):
+        self.cmds.setAttr(plug, lock=True)
+
+    def addAttr(self, node, longName, dataType):
+        self.cmds.addAttr(node, longName=longName, dataType=dataType)
+
+    def objExists(self, name):
+        return self.cmds.objExists(name)
+
+
+class PymelBackend(Backend):
+    """ Emits with `pymel.core`, like nodex did before the backends. Mostly useful to compare against. """
+
+    def __init__(self):
+        import pymel.core
+        self.pm = pymel.core
+
+    def createNode(self, nodeType, name=None):
+        if name:
+            return self.pm.createNode(nodeType, name=name).name()
+        return self.pm.createNode(nodeType).name()
+
+    def setAttr(self, plug, values, attrType=None):
+        if attrType:
+            self.pm.Attribute(plug).set(*values, type=attrType)
+        else:
+            self.pm.Attribute(plug).set(*values)
+
+    def connectAttr(self, source, destination, force=False):
+        self.pm.Attribute(source).connect(self.pm.Attribute(destination), force=force)
+
+    def lockAttr(self, plug):
+        self.pm.Attribute(plug).lock()
+
+    def addAttr(self, node, longName, dataType):
+        self.pm.addAttr(node, longName=longName, dataType=dataType)
+
+    def objExists(self, name):
+        return self.pm.objExists(name)
+
+
+_backend = None
+
+
+def current():
+    """ Returns the backend that nodex emits with, the `CmdsBackend` if none was set.
+
+        :rtype: Backend
+    """
+    global _backend
+    if _backend is None:
+        _backend = CmdsBackend()
+    return _backend
+
+
+def setBackend(backend):
+    """ Sets the backend that nodex emits with for this session, None resets it to the `CmdsBackend`. """
+    global _backend
+    _backend = backend
+
+
+@contextlib.contextmanager
+def using(backend):
+    """ Emit with the backend within the context. """
+    previous = _backend
+    setBackend(backend)
+    try:
+        yield backend
+    finally:
+        setBackend(previous)
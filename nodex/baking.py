@@ -0,0 +1,217 @@
+"""
+    Baking node networks to animation curves.
+
+    An expensive network (eg. a `Matrix.decompose()` followed by `Vector.normal()`) is evaluated on every frame during
+    playback. `bake()` samples its result over a frame range and writes the samples into animCurve nodes, one per
+    channel, after which the outputs of the result are rewired to the curves. Only the keys that are needed to stay
+    within the tolerance of the samples are kept, see `nodex.utils.reduceKeys()`.
+
+    The sampling is done in bulk: every plug is resolved once through `maya.api.OpenMaya` and all plugs are read
+    within the context of each frame (see `sample()`), without changing the current time of the scene.
+
+    `unbake()` rewires the outputs of the curves back to the original network and deletes the curves. The baked curves
+    remember which plug they replace so this also works in a later session, as long as the network was kept.
+
+    Example:
+        >>> result = Nodex("locator1.worldMatrix[0]").decompose().normal()
+        >>> result.connect("pCube1.translate")
+        >>> curves = nodex.bake(result, 1, 120, tolerance=1e-3)
+        >>> nodex.unbake(curves)
+"""
+
+# standard library
+import collections
+
+# maya library, imported on first use
+from nodex.lazy import pymel, maya
+pm = pymel.core
+mc = maya.cmds
+
+# local library
+import nodex.graph
+import nodex.readback
+import nodex.utils
+
+# The string attribute on a baked curve that holds the name of the plug it replaces
+BAKED_ATTR = "nodexBakedFrom"
+
+# The animCurve node type by the type of the baked attribute, animCurveTU for anything else
+_curveTypes = dict([(x, "animCurveTL") for x in nodex.readback._linearTypes] +
+                   [(x, "animCurveTA") for x in nodex.readback._angularTypes])
+
+
+def frameRange(start, end, step=1.0):
+    """ Returns the frames from start up to and including end.
+
+        :rtype: list
+    """
+    if step <= 0:
+        raise ValueError("The step must be positive, got: {0}".format(step))
+    return [start + i * step for i in xrange(int(round((end - start) / float(step))) + 1)]
+
+
+def _channels(nodexes):
+    """ Returns the plugs of the scalar channels that make up the Nodex, in order. Constants are skipped. """
+    from nodex.core import Nodex
+
+    channels = []
+    for x in nodexes:
+        for element in nodex.readback._elements(Nodex(x)):
+            if not isinstance(element, nodex.utils.Plug):
+                continue
+            info = element.info()
+            if info.isMatrix:
+                raise TypeError("Can't bake the matrix attribute {0} to animation curves.".format(element))
+            if info.isCompound:
+                channels.extend(element.child(i) for i in xrange(info.numChildren))
+            else:
+                channels.append(element)
+    return channels
+
+
+def sample(plugs, frames, api=None):
+    """ Returns the values of the plugs at each of the frames by their `nodex.utils.Plug.key()`.
+
+        Each node is resolved once, then all plugs are read within the context of each frame (Maya 2018+).
+
+        :param plugs: Sequence of `nodex.utils.Plug`.
+        :param api: The `maya.api.OpenMaya` module, or a stand-in, see `nodex.readback.readPlugs()`.
+        :rtype: dict
+    """
+    if api is None:
+        import maya.api.OpenMaya as api
+
+    resolved = nodex.readback.resolvePlugs(plugs, api=api)
+    result = dict((key, []) for key in resolved)
+    unit = api.MTime.uiUnit()
+    for frame in frames:
+        previous = api.MDGContext(api.MTime(frame, unit)).makeCurrent()
+        try:
+            for key, (mplug, plug) in resolved.iteritems():
+                result[key].append(nodex.readback._plugValue(api, mplug, plug))
+        finally:
+            previous.makeCurrent()
+    return result
+
+
+def _curveName(plug):
+    return "{0}_{1}_baked".format(plug.nodeName(), plug.attrName().replace("[", "_").replace("]", "").replace(".", "_"))
+
+
+def _replaceOutputs(plug, curves):
+    """ Rewires the outputs of the plug to the curves, connecting those of a compound to the children of its
+        destinations.
+    """
+    attr = pm.Attribute(plug.name())
+    if attr.isCompound():
+        for destination in attr.outputs(plugs=True):
+            attr.disconnect(destination)
+            for curve, child in zip(curves, destination.getChildren()):
+                pm.Attribute(curve + ".output").connect(child, force=True)
+        for child, curve in zip(attr.getChildren(), curves):
+            nodex.utils.attrReplaceOutputs(child, pm.Attribute(curve + ".output"))
+    else:
+        nodex.utils.attrReplaceOutputs(attr, pm.Attribute(curves[0] + ".output"))
+
+
+def _deleteUnused(nodes):
+    """ Deletes the nodes created by nodex that have no outputs left, and then those upstream that become unused.
+
+        Only the nodes nodex created in the current scene are deleted (see `nodex.graph.createdNodes()`), the nodes
+        made by hand or built in an earlier session are left alone.
+    """
+    candidates = set(mc.listHistory(list(nodes)) or []).intersection(nodex.graph.createdNodes())
+    unused = True
+    while unused:
+        unused = [x for x in candidates if not mc.listConnections(x, source=False, destination=True)]
+        if unused:
+            mc.delete(unused)
+            candidates.difference_update(unused)
+
+
+def bake(nodexes, start, end, step=1.0, tolerance=1e-4, keep=True, api=None):
+    """ Replaces the Nodex by animation curves sampled from them over the frame range.
+
+        Every channel of the Nodex gets its own curve with linear keys. The outputs of the Nodex are rewired to the
+        curves, eg. a baked vector that was connected to ``translate`` keeps driving it. Baking needs the network to
+        exist, so it can't be done while deferred.
+
+        :param nodexes: A Nodex or sequence of Nodex (or anything a Nodex can be created from).
+        :param start: The first frame.
+        :param end: The last frame, included.
+        :param step: The frames between the samples.
+        :param tolerance: The maximum difference of the curves with the samples (in UI units), see
+                          `nodex.utils.reduceKeys()`.
+        :param keep: If False the nodes nodex created in the current scene for the network that are no longer used
+                     after baking are deleted.
+        :param api: The `maya.api.OpenMaya` module, or a stand-in, see `sample()`.
+        :return: The names of the curves, one per channel.
+        :rtype: list
+    """
+    from nodex.core import Nodex
+
+    if nodex.graph.isDeferred():
+        raise RuntimeError("Can't bake while the node network is deferred, it must be built to be sampled.")
+    if isinstance(nodexes, Nodex) or not isinstance(nodexes, (list, tuple)):
+        nodexes = [nodexes]
+
+    channels = _channels(nodexes)
+    frames = frameRange(start, end, step=step)
+    samples = sample(channels, frames, api=api)
+
+    curves = collections.OrderedDict()
+    for plug in channels:
+        if plug.key() in curves:
+            continue
+        values = [float(x) for x in samples[plug.key()]]
+        keys = nodex.utils.reduceKeys(frames, values, tolerance=tolerance)
+
+        curve = nodex.utils.animCurve(_curveTypes.get(plug.info().type, "animCurveTU"), [frames[i] for i in keys],
+                                      [values[i] for i in keys], name=_curveName(plug))
+        nodex.graph.addAttr(curve, BAKED_ATTR, "string")
+        nodex.graph.setAttr(curve.attr(BAKED_ATTR), (plug.name(),), attrType="string")
+        curves[plug.key()] = curve.name()
+
+    # rewire per baked attribute, so a compound connection is replaced by connections of its children
+    for x in nodexes:
+        for element in nodex.readback._elements(Nodex(x)):
+            if isinstance(element, nodex.utils.Plug):
+                children = [element.child(i) for i in xrange(element.info().numChildren)] or [element]
+                _replaceOutputs(element, [curves[child.key()] for child in children])
+
+    if not keep:
+        _deleteUnused(set(plug.nodeName() for plug in channels))
+    return curves.values()
+
+
+def bakedCurves():
+    """ Returns the names of all baked curves in the scene.
+
+        :rtype: list
+    """
+    return mc.ls("*.{0}".format(BAKED_ATTR), objectsOnly=True, recursive=True) or []
+
+
+def unbake(curves=None):
+    """ Rewires the outputs of the baked curves back to the plugs they replace and deletes the curves.
+
+        :param curves: The names of the baked curves, if None all baked curves in the scene are unbaked.
+        :return: The names of the restored plugs.
+        :rtype: list
+    """
+    if curves is None:
+        curves = bakedCurves()
+
+    restored = []
+    for curve in curves:
+        if not mc.attributeQuery(BAKED_ATTR, node=curve, exists=True):
+            raise ValueError("The node {0} is not a baked curve.".format(curve))
+        source = mc.getAttr("{0}.{1}".format(curve, BAKED_ATTR))
+        if not mc.objExists(source):
+            raise RuntimeError("Can't unbake {0}, the baked plug {1} no longer exists.".format(curve, source))
+        nodex.utils.attrReplaceOutputs(pm.Attribute(curve + ".output"), pm.Attribute(source))
+        restored.append(source)
+
+    if curves:
+        mc.delete(curves)
+    return restored
@@ -0,0 +1,369 @@
+"""
+    Benchmarks for nodex.
+
+    The benchmarks are registered per suite with `benchmark()`. Each registered function sets up what is measured and
+    returns the function to time. `run()` warms each benchmark up, calibrates how many calls make up a sample and then
+    takes repeated samples. The results hold percentile statistics of the seconds per call and can be saved as JSON to
+    `compare()` them across commits.
+
+    The macro benchmarks build synthetic rigs of growing size instead, `scaling()` measures their build time, node and
+    connection count and peak memory per size and flags what grows faster than linear.
+
+    Without Maya the benchmarks run against the in-process stand-in of `nodex.benchmarks.standin`, so they measure
+    nodex itself and not Maya. Run them from the command line:
+
+        python -m nodex.benchmarks run --output before.json
+        python -m nodex.benchmarks run --output after.json
+        python -m nodex.benchmarks compare before.json after.json
+        python -m nodex.benchmarks scale --sizes 100,1000,10000,100000 --output scaling.json
+        python -m nodex.benchmarks import-time
+
+    The evaluation benchmarks of `nodex.benchmarks.evaluation` measure Maya itself, they only run with ``mayapy``:
+
+        mayapy -m nodex.benchmarks evaluation --output costs.json
+"""
+
+# standard library
+import collections
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+import sys
+import timeit
+
+_suites = collections.OrderedDict()     # suite name -> OrderedDict of benchmark name -> setup function
+_timer = timeit.default_timer
+
+SLOWER = "slower"
+FASTER = "faster"
+SAME = "same"
+
+
+def benchmark(suite, name):
+    """ Registers the decorated setup function as benchmark. The setup returns the function that is timed. """
+    def decorator(setup):
+        _suites.setdefault(suite, collections.OrderedDict())[name] = setup
+        return setup
+    return decorator
+
+
+def suites():
+    """ Returns the registered benchmarks by suite, importing the suites shipped with nodex.
+
+        :rtype: collections.OrderedDict
+    """
+    import nodex.benchmarks.micro
+    import nodex.benchmarks.macro
+    return _suites
+
+
+# region statistics
+def percentile(values, fraction):
+    """ Returns the percentile of the sorted values at the fraction (0-1), linearly interpolated. """
+    if len(values) == 1:
+        return values[0]
+    position = (len(values) - 1) * fraction
+    lower = int(math.floor(position))
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def statistics(samples, number):
+    """ Returns the statistics of the samples (seconds per call) taken with `number` calls each.
+
+        :rtype: dict
+    """
+    values = sorted(samples)
+    mean = sum(values) / len(values)
+    variance = sum((x - mean) ** 2 for x in values) / max(len(values) - 1, 1)
+    return {"min": values[0],
+            "max": values[-1],
+            "mean": mean,
+            "stdev": math.sqrt(variance),
+            "median": percentile(values, 0.5),
+            "p5": percentile(values, 0.05),
+            "p25": percentile(values, 0.25),
+            "p75": percentile(values, 0.75),
+            "p95": percentile(values, 0.95),
+            "samples": len(values),
+            "number": number}
+# endregion
+
+
+def measure(function, warmup=3, repeat=20, minSampleTime=0.01):
+    """ Returns the statistics of the seconds per call of the function.
+
+        The number of calls per sample is doubled until a sample takes at least `minSampleTime` so the timer
+        resolution doesn't matter. Garbage collection is disabled while sampling, like `timeit` does.
+
+        :param warmup: The number of samples taken (and discarded) before measuring.
+        :param repeat: The number of samples.
+        :rtype: dict
+    """
+    number = 1
+    while True:
+        start = _timer()
+        for _ in xrange(number):
+            function()
+        if _timer() - start >= minSampleTime or number >= 1 << 20:
+            break
+        number *= 2
+
+    def sample():
+        start = _timer()
+        for _ in xrange(number):
+            function()
+        return (_timer() - start) / number
+
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in xrange(warmup):
+            sample()
+        samples = [sample() for _ in xrange(repeat)]
+    finally:
+        if gcEnabled:
+            gc.enable()
+    return statistics(samples, number)
+
+
+def metadata():
+    """ Returns where the benchmarks ran; the commit, Python, platform and whether Maya or its stand-in was used.
+
+        :rtype: dict
+    """
+    import nodex.benchmarks.standin
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(__file__),
+                                         stderr=subprocess.STDOUT).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit,
+            "date": datetime.datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "standin": nodex.benchmarks.standin.isInstalled()}
+
+
+def _reset():
+    """ Starts each benchmark from a new scene with empty caches. """
+    import maya.cmds
+    import nodex.utils
+    maya.cmds.file(new=True, force=True)
+    nodex.utils.clearNodeCache()
+    nodex.utils.clearPlugInfoCache()
+
+
+def run(suite="micro", pattern=None, warmup=3, repeat=20, log=None):
+    """ Runs the benchmarks of the suite.
+
+        :param pattern: Only run the benchmarks that contain this in their name.
+        :param log: Function called with a line of text per finished benchmark, eg. `sys.stdout.write`.
+        :return: The results with the `metadata()` and the statistics per benchmark.
+        :rtype: dict
+    """
+    results = collections.OrderedDict()
+    for name, setup in suites()[suite].iteritems():
+        if pattern and pattern not in name:
+            continue
+        _reset()
+        results[name] = measure(setup(), warmup=warmup, repeat=repeat)
+        if log is not None:
+            log("{0:<40} {1:>12.2f}us (p5 {2:.2f}us, p95 {3:.2f}us)\n".format(
+                name, results[name]["median"] * 1e6, results[name]["p5"] * 1e6, results[name]["p95"] * 1e6))
+    return {"metadata": metadata(), "suite": suite, "results": results}
+
+
+def save(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f, object_pairs_hook=collections.OrderedDict)
+
+
+def compare(baseline, current, threshold=0.05):
+    """ Compares the results of the benchmarks that ran in both.
+
+        A benchmark only counts as `SLOWER` (or `FASTER`) if its median changed more than the threshold and the
+        interquartile ranges of both runs don't overlap, so the noise of a single run isn't reported as a change.
+
+        :param threshold: The relative change of the median that is ignored.
+        :return: (name, baseline median, current median, ratio, status) per benchmark.
+        :rtype: list
+    """
+    rows = []
+    for name, before in baseline["results"].iteritems():
+        after = current["results"].get(name)
+        if after is None:
+            continue
+        ratio = after["median"] / before["median"] if before["median"] else float("inf")
+        status = SAME
+        if ratio > 1.0 + threshold and after["p25"] > before["p75"]:
+            status = SLOWER
+        elif ratio < 1.0 - threshold and after["p75"] < before["p25"]:
+            status = FASTER
+        rows.append((name, before["median"], after["median"], ratio, status))
+    return rows
+
+
+def formatComparison(rows):
+    lines = ["{0:<40} {1:>12} {2:>12} {3:>8}".format("benchmark", "before (us)", "after (us)", "ratio")]
+    for name, before, after, ratio, status in rows:
+        lines.append("{0:<40} {1:>12.2f} {2:>12.2f} {3:>7.2f}x {4}".format(
+            name, before * 1e6, after * 1e6, ratio, "" if status == SAME else status))
+    return "\n".join(lines)
+
+
+# region scaling
+SUPER_LINEAR = 1.15     # the growth exponent above which a measurement counts as growing faster than linear
+
+
+def _peakMemory():
+    """ Returns the peak resident memory of the process in bytes, None if unknown. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measureScaled(name, n, suite="macro"):
+    """ Builds the benchmark for `n` instances once and measures it.
+
+        The peak memory is the growth of the peak resident memory of the process during the build, it's only exact in
+        a fresh process (see `scaling()`).
+
+        :return: The `seconds`, `nodes`, `connections`, `setAttrs` and `peakMemory` (bytes) of the build.
+        :rtype: dict
+    """
+    import nodex.graph
+    import nodex.session
+    _reset()
+    build = suites()[suite][name](n)
+
+    statistics = nodex.session.BuildStatistics()
+    nodex.graph._statistics.append(statistics)
+    memory = _peakMemory()
+    start = _timer()
+    try:
+        build()
+    finally:
+        seconds = _timer() - start
+        nodex.graph._statistics.remove(statistics)
+    peak = _peakMemory()
+    return {"seconds": seconds,
+            "nodes": statistics["nodes"],
+            "connections": statistics["connections"],
+            "setAttrs": statistics["setAttrs"],
+            "peakMemory": peak - memory if peak is not None else None}
+
+
+def _measureIsolated(name, n, suite, standin):
+    """ Runs `measureScaled()` in a new Python process so each size starts from a clean memory peak. """
+    command = [sys.executable, "-m", "nodex.benchmarks", "measure-scaled", suite, name, str(n)]
+    if standin:
+        command.append("--standin")
+    return json.loads(subprocess.check_output(command, env=_environment()).splitlines()[-1])
+
+
+def _environment():
+    """ Returns the environment of a new Python process that imports this nodex. """
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))), environment.get("PYTHONPATH")]))
+    return environment
+
+
+def growthExponent(sizes, values):
+    """ Returns the exponent k of the least squares fit of ``value = c * size ** k``, None if it can't be fit.
+
+        A linear growth has an exponent of 1, quadratic growth 2.
+    """
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if value]
+    if len(points) < 2:
+        return None
+    meanX = sum(x for x, _ in points) / len(points)
+    meanY = sum(y for _, y in points) / len(points)
+    variance = sum((x - meanX) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    return sum((x - meanX) * (y - meanY) for x, y in points) / variance
+
+
+def scaling(suite="macro", sizes=(100, 1000, 10000, 100000), pattern=None, isolate=True, log=None):
+    """ Measures the macro benchmarks for each size and fits how the measurements grow with the size.
+
+        :param isolate: If True each measurement runs in a new Python process, see `measureScaled()`.
+        :param log: Function called with a line of text per measurement, eg. `sys.stdout.write`.
+        :return: The results with the `metadata()` and per benchmark the measurements per size, their growth
+                 exponents and the measurements that grow faster than linear (`superLinear`).
+        :rtype: dict
+    """
+    import nodex.benchmarks.standin
+    standin = nodex.benchmarks.standin.isInstalled()
+    results = collections.OrderedDict()
+    for name in suites()[suite]:
+        if pattern and pattern not in name:
+            continue
+        measurements = []
+        for n in sizes:
+            measurement = _measureIsolated(name, n, suite, standin) if isolate else measureScaled(name, n, suite)
+            measurements.append(measurement)
+            if log is not None:
+                log("{0:<24} N={1:<8} {2:>10.3f}s {3:>9} nodes {4:>9} connections {5:>10} bytes\n".format(
+                    name, n, measurement["seconds"], measurement["nodes"], measurement["connections"],
+                    measurement["peakMemory"]))
+
+        exponents = {}
+        for key in ("seconds", "nodes", "connections", "peakMemory"):
+            values = [x[key] for x in measurements]
+            if None not in values:
+                exponents[key] = growthExponent(sizes, values)
+        results[name] = {"sizes": list(sizes),
+                         "measurements": measurements,
+                         "exponents": exponents,
+                         "superLinear": sorted(key for key, x in exponents.iteritems()
+                                               if x is not None and x > SUPER_LINEAR)}
+    return {"metadata": metadata(), "suite": suite, "results": results}
+# endregion
+
+
+# region import time
+_importScript = """
+import json, timeit
+start = timeit.default_timer()
+import {0}
+seconds = timeit.default_timer() - start
+import nodex.lazy
+print json.dumps({{"seconds": seconds, "imported": nodex.lazy.imported()}})
+"""
+
+
+def importTime(modules=("nodex.core", "nodex.datatypes"), repeat=5):
+    """ Measures importing the modules in a new Python process, the Maya and pymel modules are imported on first use
+        so importing nodex should stay cheap.
+
+        :param repeat: The number of processes (samples).
+        :return: The `statistics()` of the `seconds` and the Maya and pymel modules that got `imported` by it.
+        :rtype: dict
+    """
+    samples = []
+    imported = []
+    for _ in xrange(repeat):
+        output = subprocess.check_output([sys.executable, "-c", _importScript.format(", ".join(modules))],
+                                         env=_environment())
+        result = json.loads(output.splitlines()[-1])
+        samples.append(result["seconds"])
+        imported = sorted(set(imported).union(result["imported"]))
+    return {"modules": list(modules), "seconds": statistics(samples, 1), "imported": imported}
+# endregion
@@ -0,0 +1,107 @@
+""" Command line interface of the benchmarks, see `nodex.benchmarks`. """
+
+# standard library
+import argparse
+import json
+import sys
+
+# local library
+import nodex.benchmarks.standin
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m nodex.benchmarks", description="Run or compare benchmarks.")
+    commands = parser.add_subparsers(dest="command")
+
+    run = commands.add_parser("run", help="Run the benchmarks of a suite.")
+    run.add_argument("--suite", default="micro")
+    run.add_argument("-k", "--pattern", help="Only run the benchmarks that contain this in their name.")
+    run.add_argument("--warmup", type=int, default=3)
+    run.add_argument("--repeat", type=int, default=20)
+    run.add_argument("-o", "--output", help="Save the results as JSON to this file.")
+    run.add_argument("--standin", action="store_true", help="Use the stand-in even if Maya is available.")
+
+    compare = commands.add_parser("compare", help="Compare the results of two runs.")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.05)
+
+    scale = commands.add_parser("scale", help="Measure how the macro benchmarks scale with their size.")
+    scale.add_argument("--suite", default="macro")
+    scale.add_argument("-k", "--pattern", help="Only run the benchmarks that contain this in their name.")
+    scale.add_argument("--sizes", default="100,1000,10000,100000", help="Comma separated sizes.")
+    scale.add_argument("-o", "--output", help="Save the results as JSON to this file.")
+    scale.add_argument("--standin", action="store_true", help="Use the stand-in even if Maya is available.")
+
+    importTime = commands.add_parser("import-time", help="Measure importing nodex in a new process.")
+    importTime.add_argument("--modules", default="nodex.core,nodex.datatypes", help="Comma separated modules.")
+    importTime.add_argument("--repeat", type=int, default=5)
+
+    evaluation = commands.add_parser("evaluation", help="Measure how long Maya takes to evaluate each node type "
+                                                        "and each recipe of the lowered operations (needs mayapy).")
+    evaluation.add_argument("-n", type=int, default=1000, help="The number of instances evaluated per sample.")
+    evaluation.add_argument("--repeat", type=int, default=20)
+    evaluation.add_argument("-o", "--output", help="Save the results as JSON to this file.")
+
+    # Used by `nodex.benchmarks.scaling()` to measure in a new process
+    measureScaled = commands.add_parser("measure-scaled")
+    measureScaled.add_argument("suite")
+    measureScaled.add_argument("name")
+    measureScaled.add_argument("n", type=int)
+    measureScaled.add_argument("--standin", action="store_true")
+
+    args = parser.parse_args(args)
+    if args.command == "measure-scaled":
+        nodex.benchmarks.standin.install(force=args.standin)
+        print json.dumps(nodex.benchmarks.measureScaled(args.name, args.n, suite=args.suite))
+        return 0
+
+    if args.command == "import-time":
+        result = nodex.benchmarks.importTime(modules=args.modules.split(","), repeat=args.repeat)
+        print "import {0}: {1:.1f}ms (min {2:.1f}ms, max {3:.1f}ms)".format(
+            ", ".join(result["modules"]), result["seconds"]["median"] * 1e3, result["seconds"]["min"] * 1e3,
+            result["seconds"]["max"] * 1e3)
+        if result["imported"]:
+            print "Imported Maya modules: {0}".format(", ".join(result["imported"]))
+        return 1 if result["imported"] else 0
+
+    if args.command == "evaluation":
+        if nodex.benchmarks.standin.install():    # else pymel.core initialized Maya
+            print "The evaluation benchmarks measure Maya, run them with mayapy."
+            return 1
+        from nodex.benchmarks.evaluation import nodeCosts, recipeTimes
+        results = {"metadata": nodex.benchmarks.metadata(),
+                   "nodeCosts": nodeCosts(n=args.n, repeat=args.repeat, log=sys.stdout.write),
+                   "recipes": recipeTimes(n=args.n, repeat=args.repeat, log=sys.stdout.write)}
+        if args.output:
+            nodex.benchmarks.save(results, args.output)
+        return 0
+
+    if args.command == "scale":
+        nodex.benchmarks.standin.install(force=args.standin)
+        sizes = [int(x) for x in args.sizes.split(",")]
+        results = nodex.benchmarks.scaling(suite=args.suite, sizes=sizes, pattern=args.pattern, log=sys.stdout.write)
+        for name, result in results["results"].iteritems():
+            if result["superLinear"]:
+                print "{0} grows faster than linear: {1}".format(name, ", ".join(
+                    "{0} (exponent {1:.2f})".format(key, result["exponents"][key]) for key in result["superLinear"]))
+        if args.output:
+            nodex.benchmarks.save(results, args.output)
+        return 1 if any(x["superLinear"] for x in results["results"].itervalues()) else 0
+
+    if args.command == "run":
+        nodex.benchmarks.standin.install(force=args.standin)
+        results = nodex.benchmarks.run(suite=args.suite, pattern=args.pattern, warmup=args.warmup,
+                                       repeat=args.repeat, log=sys.stdout.write)
+        if args.output:
+            nodex.benchmarks.save(results, args.output)
+        return 0
+
+    rows = nodex.benchmarks.compare(nodex.benchmarks.load(args.baseline), nodex.benchmarks.load(args.current),
+                                    threshold=args.threshold)
+    print nodex.benchmarks.formatComparison(rows)
+    return 1 if any(row[-1] == nodex.benchmarks.SLOWER for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+    Evaluation benchmarks that measure how long Maya takes to evaluate nodes, see `nodex.cost`.
+
+    Unlike the other benchmarks these measure Maya and not nodex, so they need Maya (eg. ``mayapy``). Each benchmark
+    builds a scene with N instances driven by the ``tx`` (or ``translate``) of a single transform. Per sample the
+    driver is changed and all outputs are evaluated with ``dgeval``, so a sample measures the evaluation of the N
+    instances.
+
+    `nodeCosts()` measures a node per type nodex creates and returns the table to register with
+    `nodex.cost.registerNodeCosts()`. `recipeTimes()` measures each recipe of the operations that are lowered, so it
+    shows whether the cost model picks the fastest recipe.
+"""
+
+# maya library
+import maya.cmds as mc
+
+# local library
+import nodex.cost
+import nodex.utils
+from nodex.core import Nodex
+from nodex.benchmarks import statistics, _timer
+
+DRIVER = "driver"
+
+# node type -> (driver attribute, input attribute, output attribute) to drive and evaluate a node of that type
+_probes = {"addDoubleLinear": ("tx", "input1", "output"),
+           "multDoubleLinear": ("tx", "input1", "output"),
+           "plusMinusAverage": ("tx", "input1D[0]", "output1D"),
+           "multiplyDivide": ("tx", "input1X", "outputX"),
+           "condition": ("tx", "firstTerm", "outColorR"),
+           "clamp": ("tx", "inputR", "outputR"),
+           "blendColors": ("tx", "blender", "outputR"),
+           "distanceBetween": ("tx", "point1X", "distance"),
+           "vectorProduct": ("tx", "input1X", "outputX"),
+           "angleBetween": ("tx", "vector1X", "angle"),
+           "composeMatrix": ("tx", "inputTranslateX", "outputMatrix"),
+           "decomposeMatrix": ("worldMatrix[0]", "inputMatrix", "outputTranslateX"),
+           "inverseMatrix": ("worldMatrix[0]", "inputMatrix", "outputMatrix"),
+           "transposeMatrix": ("worldMatrix[0]", "inputMatrix", "outputMatrix"),
+           "holdMatrix": ("worldMatrix[0]", "inMatrix", "outMatrix"),
+           "passMatrix": ("worldMatrix[0]", "inMatrix", "outMatrix"),
+           "multMatrix": ("worldMatrix[0]", "matrixIn[0]", "matrixSum"),
+           "animCurveUU": ("tx", "input", "output")}
+
+# operation -> the driver attribute that is its input
+_operationInputs = {"abs": "tx", "sign": "tx", "squareLength": "translate"}
+
+
+def evaluationTime(build, n=1000, repeat=20):
+    """ Returns the statistics of the seconds to evaluate a single instance, see `nodex.benchmarks.statistics()`.
+
+        :param build: Function called with the driver transform for each of the n instances, returns the names of
+                      the plugs to evaluate.
+    """
+    mc.file(new=True, force=True)
+    driver = mc.createNode("transform", name=DRIVER)
+    cacheEnabled = nodex.utils.nodeCache.enabled
+    nodex.utils.nodeCache.enabled = False     # each instance gets its own nodes
+    try:
+        outputs = [plug for _ in xrange(n) for plug in build(driver)]
+    finally:
+        nodex.utils.nodeCache.enabled = cacheEnabled
+
+    samples = []
+    for i in xrange(repeat + 1):
+        mc.setAttr(driver + ".translate", i * 0.1, -i * 0.2, i * 0.3)
+        start = _timer()
+        mc.dgeval(outputs)
+        samples.append(_timer() - start)
+    return statistics(samples[1:], n)     # the first evaluation also builds the evaluation graph
+
+
+def _probe(nodeType):
+    driverAttr, inputAttr, outputAttr = _probes[nodeType]
+
+    def build(driver):
+        node = mc.createNode(nodeType)
+        mc.connectAttr("{0}.{1}".format(driver, driverAttr), "{0}.{1}".format(node, inputAttr))
+        return ["{0}.{1}".format(node, outputAttr)]
+    return build
+
+
+def nodeCosts(nodeTypes=None, n=1000, repeat=20, log=None):
+    """ Returns the median seconds to evaluate a node of each type, as table for `nodex.cost.registerNodeCosts()`.
+
+        The time to evaluate the driver itself is measured alongside and subtracted.
+
+        :rtype: dict
+    """
+    baseline = evaluationTime(lambda driver: [driver + ".tx"], n=n, repeat=repeat)["median"]
+    costs = {}
+    for nodeType in sorted(nodeTypes or _probes):
+        seconds = max(evaluationTime(_probe(nodeType), n=n, repeat=repeat)["median"] - baseline, 0.0)
+        costs[nodeType] = (seconds, nodex.cost.nodeCost(nodeType).dgOnly)
+        if log is not None:
+            log("{0:<24} {1:>10.3f}us\n".format(nodeType, seconds * 1e6))
+    return costs
+
+
+def recipeTimes(n=1000, repeat=20, log=None):
+    """ Returns the median seconds to evaluate each recipe of the lowered operations, with the cost of the recipe.
+
+        :return: operation -> recipe name -> {"seconds", "cost", "chosen"}
+        :rtype: dict
+    """
+    results = {}
+    for operation, recipes in nodex.cost._recipes.iteritems():
+        attr = _operationInputs.get(operation, "tx")
+        mc.file(new=True, force=True)
+        mc.createNode("transform", name=DRIVER)
+        found = nodex.cost.recipes(operation, Nodex("{0}.{1}".format(DRIVER, attr)))
+        costs = dict((recipe.name, recipeCost) for recipeCost, recipe in found)
+        chosen = found[0][1].name
+
+        for recipe in recipes:
+            if recipe.name not in costs:
+                continue    # doesn't apply to this input
+
+            def build(driver):
+                result = recipe.build(Nodex("{0}.{1}".format(driver, attr)))
+                return [x.plug().name() for x in ([result] if result.isSingleAttribute() else result)]
+            seconds = evaluationTime(build, n=n, repeat=repeat)["median"]
+            recipeCost = costs[recipe.name]
+            results.setdefault(operation, {})[recipe.name] = {"seconds": seconds,
+                                                              "cost": recipeCost,
+                                                              "chosen": recipe.name == chosen}
+            if log is not None:
+                log("{0:<16} {1:<12} {2:>10.3f}us (cost {3:.3f}us){4}\n".format(
+                    operation, recipe.name, seconds * 1e6, recipeCost * 1e6, " *" if recipe.name == chosen else ""))
+    return results
@@ -0,0 +1,61 @@
+"""
+    Macro benchmarks that build synthetic rigs of growing size, see `nodex.benchmarks.scaling()`.
+
+    Each benchmark is registered with the number of instances (N) to build. Its setup creates the scene nodes the
+    build references and returns the build itself, which is what is measured.
+"""
+
+# maya library
+import maya.cmds as mc
+
+# local library
+from nodex.core import Nodex, Math
+from nodex.benchmarks import benchmark
+
+SUITE = "macro"
+
+
+def _transforms(prefix, n):
+    names = ["{0}{1}".format(prefix, i) for i in xrange(n)]
+    for name in names:
+        mc.createNode("transform", name=name)
+    return names
+
+
+@benchmark(SUITE, "matrix constraint")
+def matrixConstraints(n):
+    """ N sources constrained to the world position of N targets, like `TestMatrixMethods.test_matrix_constraint` """
+    sources, targets = _transforms("source", n), _transforms("target", n)
+
+    def build():
+        for source, target in zip(sources, targets):
+            localMatrix = Nodex(target + ".worldMatrix[0]") * Nodex(source + ".parentInverseMatrix[0]")
+            localMatrix.decompose(translate=source + ".translate")
+    return build
+
+
+@benchmark(SUITE, "vector clamp")
+def vectorClamps(n):
+    """ N positions limited to 5 units from the origin, like `TestExampleGraphs.test_scene1` """
+    drivers, driven = _transforms("driver", n), _transforms("driven", n)
+
+    def build():
+        for driver, output in zip(drivers, driven):
+            target = Nodex(driver + ".translate")
+            targetMax = target.normal() * 5.0
+            Math.greaterThan(target.length(), 5.0, ifTrue=targetMax, ifFalse=target).connect(output + ".translate")
+    return build
+
+
+@benchmark(SUITE, "overlay chain")
+def overlayChain(n):
+    """ A chain of N `Math.overlay` blends. """
+    base, blend = _transforms("base", 1)[0], _transforms("blend", 1)[0]
+
+    def build():
+        result = Nodex(base + ".tx")
+        layer = Nodex(blend + ".tx")
+        for _ in xrange(n):
+            result = Math.overlay(result, layer)
+        result.connect(blend + ".ty")
+    return build
@@ -0,0 +1,253 @@
+"""
+    Microbenchmarks of the hot paths of nodex: creating Nodex for each datatype, looking up the datatype for data,
+    converting arrays and matrices, `dimensions()`, planning connections and emitting the nodes of `Math` operations.
+
+    The operations are measured with the node cache disabled so each call builds its nodes.
+"""
+
+# standard library
+import inspect
+
+# maya library
+import maya.cmds as mc
+import pymel.core.datatypes
+
+# local library
+import nodex.utils
+import nodex.graph
+import nodex.core
+import nodex.datatypes
+from nodex.core import Nodex, Math
+from nodex.benchmarks import benchmark
+
+SUITE = "micro"
+
+
+def _scene():
+    """ Creates the transforms the benchmarks reference. """
+    for name in ("benchA", "benchB"):
+        if not mc.objExists(name):
+            mc.createNode("transform", name=name)
+
+
+def _uncached(function):
+    def wrapper():
+        nodex.utils.nodeCache.enabled = False
+        try:
+            function()
+        finally:
+            nodex.utils.nodeCache.enabled = True
+    return wrapper
+
+
+# region construction
+@benchmark(SUITE, "construct.Float")
+def constructFloat():
+    return lambda: Nodex(1.5)
+
+
+@benchmark(SUITE, "construct.Integer")
+def constructInteger():
+    return lambda: Nodex(3)
+
+
+@benchmark(SUITE, "construct.Boolean")
+def constructBoolean():
+    return lambda: Nodex(True)
+
+
+@benchmark(SUITE, "construct.Vector")
+def constructVector():
+    return lambda: Nodex([1.0, 2.0, 3.0])
+
+
+@benchmark(SUITE, "construct.Matrix")
+def constructMatrix():
+    values = [0.0] * 16
+    return lambda: Nodex(values)
+
+
+@benchmark(SUITE, "construct.Matrix explicit")
+def constructMatrixExplicit():
+    values = [0.0] * 16
+    return lambda: nodex.datatypes.Matrix(values)
+
+
+@benchmark(SUITE, "construct.Array[10]")
+def constructArray():
+    values = range(10)
+    return lambda: Nodex(values)
+
+
+@benchmark(SUITE, "construct.Array[10000]")
+def constructLongArray():
+    values = [1] * 10000
+    return lambda: Nodex(values)
+
+
+@benchmark(SUITE, "construct.attribute")
+def constructAttribute():
+    _scene()
+    return lambda: Nodex("benchA.translate")
+
+
+@benchmark(SUITE, "construct.mixed Vector")
+def constructMixedVector():
+    _scene()
+    return lambda: Nodex(["benchA.tx", 1.0, "benchB.ty"])
+# endregion
+
+
+# region conversion
+@benchmark(SUITE, "convert.pymel Vector")
+def convertVector():
+    vector = pymel.core.datatypes.Vector(1.0, 2.0, 3.0)
+    return lambda: Nodex(vector)
+
+
+@benchmark(SUITE, "convert.pymel Matrix")
+def convertMatrix():
+    matrix = pymel.core.datatypes.Matrix()
+    return lambda: Nodex(matrix)
+
+
+@benchmark(SUITE, "value.Matrix")
+def matrixValue():
+    matrix = Nodex([0.0] * 16)
+    return matrix.value
+# endregion
+
+
+# region dispatch, the type-keyed registry against the linear scan it replaced
+_linearDatatypes = []   # the datatypes of `nodex.datatypes` sorted by priority, see `linearScan()`
+_dispatchData = [1.0, 5, True, [1, 2, 3], [0] * 16, [1] * 10]
+
+
+def linearScan(data):
+    """ Returns the datatype for the data by checking every datatype in order of priority, like the Nodex factory did
+        before the registry of `nodex.core.registerDataType()`. The baseline of the dispatch benchmarks.
+    """
+    if not _linearDatatypes:
+        _linearDatatypes.extend(sorted((x for _, x in inspect.getmembers(nodex.datatypes, inspect.isclass)
+                                        if issubclass(x, Nodex) and x is not Nodex), key=lambda x: x.priority()))
+    for datatype in _linearDatatypes:
+        if datatype.isValidData(data):
+            return datatype
+
+
+@benchmark(SUITE, "dispatch.linear scan")
+def dispatchLinearScan():
+    def run():
+        for data in _dispatchData:
+            linearScan(data)
+    return run
+
+
+@benchmark(SUITE, "dispatch.registry")
+def dispatchRegistry():
+    def run():
+        for data in _dispatchData:
+            nodex.core._getDataTypeFromData(data)
+    return run
+# endregion
+
+
+# region queries
+@benchmark(SUITE, "dimensions.attribute")
+def dimensionsAttribute():
+    _scene()
+    x = Nodex("benchA.translate")
+    return x.dimensions
+
+
+@benchmark(SUITE, "dimensions.Array")
+def dimensionsArray():
+    _scene()
+    x = nodex.datatypes.Array(["benchA.tx", 1.0, 2.0, "benchB.ty"])
+    return x.dimensions
+# endregion
+
+
+# region connect
+@benchmark(SUITE, "connect.attribute")
+def connectAttribute():
+    _scene()
+    source, destination = Nodex("benchA.translate"), Nodex("benchB.translate")
+    return lambda: source.connect(destination)
+
+
+@benchmark(SUITE, "connect.children to parent")
+def connectChildren():
+    _scene()
+    source, destination = Nodex("benchA.translate")[0:3], Nodex("benchB.translate")
+    return lambda: source.connect(destination)
+
+
+@benchmark(SUITE, "connect.broadcast")
+def connectBroadcast():
+    _scene()
+    source, destination = Nodex("benchA.tx"), Nodex("benchB.translate")
+    return lambda: source.connect(destination)
+
+
+@benchmark(SUITE, "connect.constant")
+def connectConstant():
+    _scene()
+    value, destination = Nodex([1.0, 2.0, 3.0]), Nodex("benchB.translate")
+    return lambda: value.connect(destination)
+# endregion
+
+
+# region math operations
+@benchmark(SUITE, "math.multiply scalar")
+def multiplyScalar():
+    _scene()
+    a, b = Nodex("benchA.tx"), Nodex("benchB.tx")
+    return _uncached(lambda: a * b)
+
+
+@benchmark(SUITE, "math.add vector")
+def addVector():
+    _scene()
+    a, b = Nodex("benchA.translate"), Nodex("benchB.translate")
+    return _uncached(lambda: a + b)
+
+
+@benchmark(SUITE, "math.clamp")
+def clamp():
+    _scene()
+    a = Nodex("benchA.translate")
+    return _uncached(lambda: Math.clamp(a, 0.0, 1.0))
+
+
+@benchmark(SUITE, "math.condition")
+def condition():
+    _scene()
+    a, b = Nodex("benchA.tx"), Nodex("benchB.tx")
+    return _uncached(lambda: a > b)
+
+
+@benchmark(SUITE, "math.Vector.normal")
+def vectorNormal():
+    _scene()
+    a = Nodex("benchA.translate")
+    return _uncached(a.normal)
+
+
+@benchmark(SUITE, "math.Matrix.multiply")
+def matrixMultiply():
+    _scene()
+    a, b = Nodex("benchA.worldMatrix[0]"), Nodex("benchB.worldMatrix[0]")
+    return _uncached(lambda: a * b)
+
+
+@benchmark(SUITE, "math.deferred chain")
+def deferredChain():
+    _scene()
+    a, b = Nodex("benchA.tx"), Nodex("benchB.tx")
+
+    def build():
+        with nodex.graph.deferred():
+            ((a * b + a) / 2.0).connect("benchB.ty")
+    return _uncached(build)
+# endregion
@@ -0,0 +1,400 @@
+"""
+    In-process stand-in for `maya.cmds`, `maya.OpenMaya`, `maya.api.OpenMaya` and `pymel.core`.
+
+    It holds a scene in memory with just enough behaviour for nodex to build node networks: nodes, the metadata of
+    their attributes, values and connections. Nothing is evaluated, so the values of computed attributes stay at their
+    default, and nothing is validated beyond the existence of the attributes; eg. a connection simply replaces the
+    existing input. The attributes of the node types nodex creates come from `nodex.utils.registerNodeSchema()`, the
+    `transform` attributes are built in and others can be added with `Scene.addAttribute()`.
+
+    `install()` puts the modules in `sys.modules` (only if Maya can't be imported) so nodex can be imported and
+    benchmarked on any machine. It must be installed before nodex imports Maya.
+"""
+
+# standard library
+import re
+import sys
+import types
+
+_trailingDigits = re.compile(r"\d+$")
+_indexPattern = re.compile(r"\[[\d:]*\]")     # also a range of elements, eg. ``[0:9]``
+
+# leaf attribute name: (type, multi, children) of the built-in transform attributes
+_transformAttributes = {"matrix": ("matrix", False, ()),
+                        "worldMatrix": ("matrix", True, ()),
+                        "worldInverseMatrix": ("matrix", True, ()),
+                        "parentMatrix": ("matrix", True, ()),
+                        "parentInverseMatrix": ("matrix", True, ()),
+                        "visibility": ("bool", False, ()),
+                        "v": ("bool", False, ())}
+for _long, _short, _childType in (("translate", "t", "doubleLinear"),
+                                  ("rotate", "r", "doubleAngle"),
+                                  ("scale", "s", "double")):
+    _children = tuple(_long + axis for axis in "XYZ")
+    _transformAttributes[_long] = _transformAttributes[_short] = ("double3", False, _children)
+    for _axis in "XYZ":
+        _transformAttributes[_long + _axis] = _transformAttributes[_short + _axis.lower()] = (_childType, False, ())
+
+
+class Scene(object):
+    """ The nodes, values and connections of the stand-in scene. """
+
+    def __init__(self):
+        self.attributes = {}    # (node type, leaf attribute name) -> (type, multi, children)
+        for leaf, metadata in _transformAttributes.iteritems():
+            self.attributes[("transform", leaf)] = metadata
+        self.reset()
+
+    def reset(self):
+        self.nodes = {}
+        self.values = {}
+        self.connections = {}   # destination -> source
+        self.locked = set()
+        self.counts = {"createNode": 0, "setAttr": 0, "connectAttr": 0}
+        self._suffix = {}       # name stem -> next number to try
+
+    def addAttribute(self, nodeType, name, attrType, multi=False, children=()):
+        self.attributes[(nodeType, name)] = (attrType, multi, tuple(children))
+
+    def attribute(self, plug):
+        """ Returns the (type, multi, children) of the attribute of the plug.
+
+            :raises ValueError: If the node or attribute doesn't exist.
+        """
+        node, _, attr = plug.partition(".")
+        nodeType = self.nodes.get(node)
+        if nodeType is None or not attr:
+            raise ValueError("No object matches name: {0}".format(plug))
+
+        leaf = _indexPattern.sub("", attr.rsplit(".", 1)[-1])
+        metadata = self.attributes.get((nodeType, leaf))
+        if metadata is not None:
+            return metadata
+
+        import nodex.utils
+        info = nodex.utils._nodeSchemas.get((nodeType, _indexPattern.sub("[]", attr)))
+        if info is None:
+            info = self._schemaByLeaf(nodeType, leaf)
+        if info is None:
+            raise ValueError("No object matches name: {0}".format(plug))
+        metadata = self.attributes[(nodeType, leaf)] = (info.type, info.isArray, info.children)
+        return metadata
+
+    @staticmethod
+    def _schemaByLeaf(nodeType, leaf):
+        import nodex.utils
+        for (schemaType, path), info in nodex.utils._nodeSchemas.iteritems():
+            if schemaType == nodeType and _indexPattern.sub("", path.rsplit(".", 1)[-1]) == leaf:
+                return info
+
+    def uniqueName(self, name):
+        if name not in self.nodes:
+            return name
+        stem = _trailingDigits.sub("", name)
+        i = self._suffix.get(stem, 1)
+        while "{0}{1}".format(stem, i) in self.nodes:
+            i += 1
+        self._suffix[stem] = i + 1
+        return "{0}{1}".format(stem, i)
+
+    def defaultValue(self, plug):
+        attrType, multi, children = self.attribute(plug)
+        if attrType == "matrix":
+            return [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        if children:
+            return [tuple(0.0 for _ in children)]
+        return False if attrType == "bool" else 0.0
+
+
+scene = Scene()
+
+
+# region maya.cmds
+def _cmds():
+    module = types.ModuleType("maya.cmds", "Stand-in for `maya.cmds`, see `nodex.benchmarks.standin`.")
+
+    def createNode(nodeType, name=None, **kwargs):
+        name = scene.uniqueName(name or nodeType + "1")
+        scene.nodes[name] = nodeType
+        scene.counts["createNode"] += 1
+        return name
+
+    def objExists(name):
+        node, _, attr = name.partition(".")
+        if node not in scene.nodes:
+            return False
+        if attr:
+            try:
+                scene.attribute(name)
+            except ValueError:
+                return False
+        return True
+
+    def nodeType(node):
+        return scene.nodes[node.partition(".")[0]]
+
+    def getAttr(plug, type=False, size=False, multiIndices=False, **kwargs):
+        if type:
+            return scene.attribute(plug)[0]
+        if size or multiIndices:
+            prefix = plug + "["
+            indices = sorted(set(int(key[len(prefix):].split("]")[0]) for key in
+                                 list(scene.values) + list(scene.connections) if key.startswith(prefix)))
+            return len(indices) if size else indices
+        if plug in scene.values:
+            values = scene.values[plug]
+            return values[0] if len(values) == 1 else [tuple(values)]
+        return scene.defaultValue(plug)
+
+    def setAttr(plug, *values, **kwargs):
+        scene.attribute(plug)
+        if kwargs.get("lock"):
+            scene.locked.add(plug)
+            return
+        if values:
+            scene.values[plug] = values
+            scene.counts["setAttr"] += 1
+
+    def connectAttr(source, destination, force=False, **kwargs):
+        scene.attribute(source)
+        scene.attribute(destination)
+        scene.connections[destination] = source
+        scene.counts["connectAttr"] += 1
+
+    def addAttr(node, longName=None, dataType=None, attributeType=None, **kwargs):
+        scene.addAttribute(scene.nodes[node], longName, dataType or attributeType)
+
+    def listConnections(plug, source=True, destination=True, type=None, **kwargs):
+        nodes = []
+        for other, connected in scene.connections.iteritems():
+            if destination and connected == plug:
+                nodes.append(other.partition(".")[0])
+            if source and other == plug:
+                nodes.append(connected.partition(".")[0])
+        return sorted(set(node for node in nodes if type is None or scene.nodes[node] == type)) or None
+
+    def listHistory(nodes, **kwargs):
+        result = []
+        pending = [nodes] if isinstance(nodes, basestring) else list(nodes)
+        while pending:
+            node = pending.pop()
+            if node in result:
+                continue
+            result.append(node)
+            pending.extend(source.partition(".")[0] for destination, source in scene.connections.iteritems()
+                           if destination.partition(".")[0] == node)
+        return result
+
+    def attributeQuery(attr, node=None, multi=False, listChildren=False, exists=False, **kwargs):
+        if exists:
+            return objExists("{0}.{1}".format(node, attr))
+        attrType, isMulti, children = scene.attribute("{0}.{1}".format(node, attr))
+        if multi:
+            return isMulti
+        if listChildren:
+            return list(children) or None
+
+    def listAttr(node, userDefined=False, **kwargs):
+        return None
+
+    def ls(type=None, **kwargs):
+        return sorted(name for name, nodeType in scene.nodes.iteritems() if type is None or nodeType == type)
+
+    def file(*args, **kwargs):
+        if kwargs.get("new"):
+            scene.reset()
+
+    def undoInfo(query=False, state=None, **kwargs):
+        if query:
+            return True
+
+    def evaluationManager(query=False, mode=None, **kwargs):
+        if query:
+            return ["off"]
+
+    def currentUnit(query=False, linear=False, angle=False, **kwargs):
+        if query:
+            return "cm" if linear else "deg" if angle else "film"
+
+    def _noop(*args, **kwargs):
+        return None
+
+    for function in (createNode, objExists, nodeType, getAttr, setAttr, connectAttr, addAttr, listConnections,
+                     listHistory, attributeQuery, listAttr, ls, file, undoInfo, evaluationManager, currentUnit):
+        setattr(module, function.__name__, function)
+    for name in ("loadPlugin", "refresh", "pluginInfo"):
+        setattr(module, name, _noop)
+    module.about = lambda **kwargs: "standin"
+    module.exists = lambda name: False
+    return module
+# endregion
+
+
+# region maya.OpenMaya and maya.api.OpenMaya
+class _MSceneMessage(object):
+    kAfterNew, kAfterOpen, kAfterImport, kAfterCreateReference, kAfterPluginLoad, kAfterPluginUnload = range(6)
+
+    @staticmethod
+    def addCallback(message, function):
+        return 0
+
+
+class _MObjectHandle(object):
+    def __init__(self, mobject):
+        self._mobject = mobject
+
+    def isValid(self):
+        return True
+
+    def object(self):
+        return self._mobject
+
+    def hashCode(self):
+        return id(self._mobject)
+
+
+def _openMaya(name):
+    module = types.ModuleType(name, "Stand-in for `{0}`, see `nodex.benchmarks.standin`.".format(name))
+    for className in ("MVector", "MFloatVector", "MMatrix", "MFloatMatrix", "MFloatmatrix"):
+        setattr(module, className, type(className, (object,), {}))
+    module.MSceneMessage = _MSceneMessage
+    module.MObjectHandle = _MObjectHandle
+    return module
+# endregion
+
+
+# region pymel.core
+class _Attribute(object):
+    """ Stand-in for `pymel.core.Attribute`, referencing the plug by name. """
+    def __init__(self, name):
+        scene.attribute(name)
+        self._name = name
+
+    def name(self):
+        return self._name
+
+    def get(self):
+        return sys.modules["maya.cmds"].getAttr(self._name)
+
+    def set(self, *values, **kwargs):
+        sys.modules["maya.cmds"].setAttr(self._name, *values, **kwargs)
+
+    def connect(self, other, force=False):
+        sys.modules["maya.cmds"].connectAttr(self._name, other.name(), force=force)
+
+    def lock(self):
+        sys.modules["maya.cmds"].setAttr(self._name, lock=True)
+
+    def node(self):
+        return _PyNode(self._name.partition(".")[0])
+
+    def __str__(self):
+        return self._name
+
+
+class _PyNode(object):
+    def __new__(cls, *args):
+        name = ".".join(str(x) for x in args)
+        if "." in name:
+            return _Attribute(name)
+        return object.__new__(cls)
+
+    def __init__(self, *args):
+        self._name = str(args[0])
+
+    def name(self):
+        return self._name
+
+    def __str__(self):
+        return self._name
+
+
+class _Vector(tuple):
+    """ Stand-in for `pymel.core.datatypes.Vector` as a tuple of three floats. """
+    def __new__(cls, *args):
+        if len(args) == 1:
+            args = args[0]
+        values = tuple(float(x) for x in args) or (0.0, 0.0, 0.0)
+        return tuple.__new__(cls, values)
+
+    def isEquivalent(self, other, tol=1e-10):
+        return all(abs(a - b) <= tol for a, b in zip(self, other))
+
+
+class _Matrix(tuple):
+    """ Stand-in for `pymel.core.datatypes.Matrix` as a tuple of four rows, iterating like the pymel matrix. """
+    def __new__(cls, *args):
+        if len(args) == 1:
+            args = args[0]
+        values = []
+        for x in args:
+            if hasattr(x, '__iter__'):
+                values.extend(float(y) for y in x)
+            else:
+                values.append(float(x))
+        if not values:
+            values = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        return tuple.__new__(cls, (tuple(values[i:i + 4]) for i in range(0, 16, 4)))
+
+    def isEquivalent(self, other, tol=1e-10):
+        return all(abs(a - b) <= tol for row, otherRow in zip(self, other) for a, b in zip(row, otherRow))
+
+
+def _pymel():
+    core = types.ModuleType("pymel.core", "Stand-in for `pymel.core`, see `nodex.benchmarks.standin`.")
+    datatypes = types.ModuleType("pymel.core.datatypes", "Stand-in for `pymel.core.datatypes`.")
+    datatypes.Vector = _Vector
+    datatypes.FloatVector = type("FloatVector", (_Vector,), {})
+    datatypes.Matrix = _Matrix
+    datatypes.FloatMatrix = type("FloatMatrix", (_Matrix,), {})
+
+    core.datatypes = datatypes
+    core.Attribute = _Attribute
+    core.PyNode = _PyNode
+    core.createNode = lambda nodeType, **kwargs: _PyNode(sys.modules["maya.cmds"].createNode(nodeType, **kwargs))
+    core.objExists = lambda name: sys.modules["maya.cmds"].objExists(name)
+    return core, datatypes
+# endregion
+
+
+def isInstalled():
+    """ Returns True if nodex runs against the stand-in instead of Maya. """
+    module = sys.modules.get("maya.cmds")
+    return module is not None and (module.__doc__ or "").startswith("Stand-in")
+
+
+def install(force=False):
+    """ Installs the stand-in modules, unless Maya can be imported (or they're already installed).
+
+        :param force: If True the stand-in is also installed if Maya is available.
+        :return: True if nodex runs against the stand-in.
+        :rtype: bool
+    """
+    if isInstalled():
+        return True
+    if not force:
+        try:
+            import maya.cmds
+            import pymel.core
+            return False
+        except ImportError:
+            pass
+
+    maya = types.ModuleType("maya")
+    api = types.ModuleType("maya.api")
+    maya.cmds = _cmds()
+    maya.OpenMaya = _openMaya("maya.OpenMaya")
+    maya.api = api
+    api.OpenMaya = _openMaya("maya.api.OpenMaya")
+    pymel = types.ModuleType("pymel")
+    pymel.core, datatypes = _pymel()
+
+    sys.modules.update({"maya": maya,
+                        "maya.cmds": maya.cmds,
+                        "maya.OpenMaya": maya.OpenMaya,
+                        "maya.api": api,
+                        "maya.api.OpenMaya": api.OpenMaya,
+                        "pymel": pymel,
+                        "pymel.core": pymel.core,
+                        "pymel.core.datatypes": datatypes})
+    return True
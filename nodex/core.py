@@ -1,18 +1,30 @@
 # standard library
 from functools import partial
+from array import array
 import logging
 import abc
 logger = logging.getLogger(__name__)
 
-# maya library
-import pymel.core
+# maya library, imported on first use
+from nodex.lazy import pymel
 
 # local library
+import nodex.cost
+import nodex.graph
+import nodex.readback
 import nodex.utils
 
 VERBOSE = False
 
 
+# The kind of reference of a Nodex as bit flags, computed once in `Nodex.setReference()`
+_SINGLE_ATTRIBUTE = 1
+_ATTRIBUTE = 2
+_CONSTANT = 4
+_SINGLE_NUMERIC = 8
+_ARRAY_ATTRIBUTE = 16       # the dimensions depend on the number of elements, see `nodex.utils.arraySize()`
+
+
 class UndefinedNodexError(TypeError):
     """ Error that is raised when the Nodex can't be defined with a relevant datatype to the passed in data. """
     pass
@@ -27,7 +39,10 @@ class Nodex(object):
 
     If the value can't be converted to a valid data type an error will be raised.
     This behaviour is similar to Pymel's implementation of the `pymel.core.PyNode`
+
+    Attributes are referenced by a lightweight `nodex.utils.Plug`, use `attr()` to get the `pymel.core.Attribute`.
     """
+    __slots__ = ('_data', '_dimensions', '_flags')
     _priority = 999999
 
     @classmethod
@@ -63,6 +78,10 @@ class Nodex(object):
         if isinstance(data, Nodex):
             return data
 
+        # Resolve attribute references only once, the datatypes validate against the resolved plug's metadata.
+        if isinstance(data, (basestring, pymel.core.Attribute)):
+            data = nodex.utils.resolvePlug(data)
+
         # We shouldn't make this assumption here, plus it breaks a lot of stuff. :)
         #if isinstance(data, (list, tuple)) and len(data) == 1:
         #    data = data[0]
@@ -95,11 +114,63 @@ class Nodex(object):
         raise NotImplementedError()
 
     def setReference(self, data, validate=True):
-        self._dimensions = None     # remove cached dimensions
         if validate:
             if not self.isValidData(data):
                 raise TypeError("Can't set data to this datatype.")
         self._data = self.convertData(data)
+        self._describe()
+
+    def _describe(self):
+        """ Computes the dimensions and kind of the referenced data once, they're only recomputed by `refresh()`.
+
+            The dimensions of an array attribute are not stored since its number of elements can change, those are
+            looked up in the array size cache of `nodex.utils.arraySize()` instead.
+        """
+        data = self._data
+        kind = type(data)
+        if kind is float or kind is int or kind is bool:
+            self._dimensions = 1
+            self._flags = _SINGLE_NUMERIC | _CONSTANT
+            return
+
+        dimensions = None
+        if kind is CompactArray:
+            dimensions = len(data)
+            flags = (_ATTRIBUTE if data.isAttribute() else 0) | (_CONSTANT if data.isConstant() else 0)
+        elif isinstance(data, nodex.utils.Plug):
+            flags = _SINGLE_ATTRIBUTE | _ATTRIBUTE
+            info = data.info()
+            if info.isArray:
+                flags |= _ARRAY_ATTRIBUTE
+            elif info.isCompound:
+                dimensions = info.numChildren
+            else:
+                dimensions = 1
+                flags |= _SINGLE_NUMERIC
+        elif isinstance(data, tuple):
+            dimensions = len(data)
+            attributes = [isinstance(x, pymel.core.Attribute) or (isinstance(x, Nodex) and x.isAttribute())
+                          for x in data]
+            constants = [not isinstance(x, pymel.core.Attribute) and (not isinstance(x, Nodex) or x.isConstant())
+                         for x in data]
+            flags = (_ATTRIBUTE if attributes and all(attributes) else 0) | (_CONSTANT if all(constants) else 0)
+        elif isinstance(data, (int, float, bool)):
+            dimensions = 1
+            flags = _SINGLE_NUMERIC | _CONSTANT
+        else:
+            dimensions = len(data) if hasattr(data, '__len__') else None
+            flags = _CONSTANT
+        self._dimensions = dimensions
+        self._flags = flags
+
+    def refresh(self):
+        """ Recomputes the dimensions and kind of the referenced data, eg. after the attributes of the referenced
+            node were changed outside of nodex.
+
+            The number of elements of array attributes is also queried again, for all Nodex.
+        """
+        nodex.utils.invalidateArraySizes()
+        self._describe()
 
     @abc.abstractmethod
     def convertData(self, data):
@@ -121,32 +192,35 @@ class Nodex(object):
         data = self._data
         if self.isSingleAttribute():
             return data.get()
+        elif isinstance(data, CompactArray):
+            return data.value()
         elif isinstance(data, tuple):
             return tuple(x.get() if isinstance(x, pymel.core.Attribute) else x.value() for x in data)
         else:
             return data
 
+    def plainValue(self):
+        """ Returns the value as plain Python values, without the conversion of `value()` by a datatype (eg. to a
+            `pymel.core.datatypes.Vector`) so constants don't need pymel.
+        """
+        return Nodex.value(self)
+
     # region nodex combined methods (whilst referencing: attribute || single numeric || array)
     def dimensions(self):
         if self._dimensions is not None:
             return self._dimensions
-
-        if self.isSingleAttribute():
-            self._dimensions = nodex.utils.attrDimensions(self.attr())
-            return self._dimensions
-        elif self.isAttribute():
-            # Since it's not a single numeric we know it's a tuple (see `self.isAttribute()`)
-            return len(self._data)
-        elif self.isSingleNumeric():
-            return 1
-        else:
-            return len(self._data)
+        if self._flags & _ARRAY_ATTRIBUTE:
+            return nodex.utils.arraySize(self._data)
+        return len(self._data)
 
     def isSingleNumeric(self):
-        if self.isSingleAttribute():
-            return nodex.utils.attrDimensions(self.attr()) == 1
-        else:
-            return isinstance(self._data, (int, float, bool))
+        if self._flags & _ARRAY_ATTRIBUTE:
+            return nodex.utils.arraySize(self._data) == 1
+        return bool(self._flags & _SINGLE_NUMERIC)
+
+    def isConstant(self):
+        """ Returns True if this Nodex references only values and no attribute at all. """
+        return bool(self._flags & _CONSTANT)
     # endregion
 
     # region nodex attribute methods
@@ -154,33 +228,39 @@ class Nodex(object):
         """ Returns the attribute this Nodex instance is referencing.
             If not referencing an attribute an error is raised
 
-            :rtype: pymel.core.Attribute or tuple(pymel.core.Attribute)
+            :rtype: pymel.core.Attribute or nodex.core.CompactArray
         """
-        if self.isAttribute():
+        if self.isSingleAttribute():
+            return self._data.attribute()
+        elif self.isAttribute():
             return self._data
         else:
             raise AttributeError("Data referenced by this nodex is not a `pymel.core.Attribute`")
 
+    def plug(self):
+        """ Returns the lightweight plug this Nodex instance is referencing.
+            If not referencing a single attribute an error is raised
+
+            :rtype: nodex.utils.Plug
+        """
+        if self.isSingleAttribute():
+            return self._data
+        else:
+            raise AttributeError("Data referenced by this nodex is not a single attribute")
+
     def isSingleAttribute(self):
         """ Returns True if this instance references a single valid attribute.
 
             If this returns True then the output of self.attr() is accesible `pymel.core.Attribute`)
 
-            If this returns False but `isAttribute()` is True, then the output of self.attr() is a tuple of
-            `pymel.core.Attribute`
+            If this returns False but `isAttribute()` is True, then the output of self.attr() is a
+            `nodex.core.CompactArray` of attribute Nodex
         """
-        if isinstance(self._data, pymel.core.Attribute):
-            return True
+        return bool(self._flags & _SINGLE_ATTRIBUTE)
 
     def isAttribute(self):
         """ Returns True if this Nodex instance references a valid attribute, else False. """
-        if isinstance(self._data, tuple) and (all(isinstance(x, pymel.core.Attribute) or
-                                                  (isinstance(x, Nodex) and x.isAttribute())) for x in self._data):
-            return True
-        elif self.isSingleAttribute():
-            return True
-
-        return False
+        return bool(self._flags & _ATTRIBUTE)
 
     def node(self):
         """ Returns the node for the attribute that this Nodex instance is referencing.
@@ -199,10 +279,57 @@ class Nodex(object):
             raise RuntimeError("Can't clear the value for: {0}".format(self))
         self.setReference(defaultValue)
 
+    def _elementPlugs(self):
+        """ Returns the plug of each element of this attribute Nodex.
+
+            :rtype: list
+        """
+        data = self._data
+        if isinstance(data, nodex.utils.Plug):
+            info = data.info()
+            if info.isCompound and not info.isArray:
+                return [data.child(i) for i in xrange(info.numChildren)]
+            elif self.dimensions() == 1:
+                return [data]
+        return [x.plug() for x in self]
+
+    def _parentPlug(self):
+        """ Returns the single plug that holds all elements of this attribute Nodex, eg. ``b.translate`` for the
+            elements ``(b.translate.translateX, b.translate.translateY, b.translate.translateZ)``. Returns None if
+            there's no such plug.
+
+            :rtype: nodex.utils.Plug or None
+        """
+        if isinstance(self._data, nodex.utils.Plug):
+            return self._data
+
+        plugs = self._elementPlugs()
+        if len(plugs) == 1:
+            return plugs[0]
+
+        node = plugs[0].key()[0]
+        parent = plugs[0].attrName().rpartition(".")[0]
+        if not parent:
+            return None
+        children = []
+        for plug in plugs:
+            plugParent, _, child = plug.attrName().rpartition(".")
+            if plug.key()[0] != node or plugParent != parent:
+                return None
+            children.append(child)
+
+        parentPlug = plugs[0].nodeAttr(parent)
+        info = parentPlug.info()
+        if not info.isCompound or info.isArray or list(info.children) != children:
+            return None
+        return parentPlug
+
     def connect(self, other, allowGrow=True, clearLarger=False):
         """
             Connects one Nodex attribute/value to another attribute.
             This method ensures to perform a connection even if the dimensions between the Nodex attributes differs.
+            The connections are planned first so the parent attributes are connected whenever both sides hold all
+            children of a compound attribute, and then made in one batch.
 
             self (source) ---> other (destination)
 
@@ -222,26 +349,45 @@ class Nodex(object):
                              'Other is: {0}'.format(other))
 
         if dim == otherDim:
-            if self.isSingleAttribute():
-                self.attr().connect(other.attr()) # connect pymel attributes
-            elif self.isAttribute():
-                # non-single Attribute
-                for i, x in enumerate(self._data):
-                    x.connect(other[i].attr())
-            else:
-                if other.isSingleAttribute():
-                    other.attr().set(self.value())  # assign referenced value
+            if self.isAttribute():
+                # Connect the parents if both sides are (or consist of all children of) a single attribute
+                source, destination = self._parentPlug(), other._parentPlug()
+                if source is not None and destination is not None:
+                    nodex.graph.connectAttrs([(source, destination)])
                 else:
-                    if dim == 1 and otherDim == 1:  # the magical one-tuple array issue
-                        other[0].attr().set(self.value())  # assign referenced value
+                    nodex.graph.connectAttrs(zip(self._elementPlugs(), other._elementPlugs()))
+            elif not self.isConstant():
+                # Mixed constants and attributes; connect the attribute elements and set the constant ones
+                connections = []
+                for element, plug in zip(self, other._elementPlugs()):
+                    if element.isAttribute():
+                        connections.append((element.plug(), plug))
                     else:
-                        values = self.value()
-                        for i, other_element in enumerate(other):
-                            other_element.attr().set(values[i])  # assign referenced value
+                        plug.set(element.plainValue())
+                nodex.graph.connectAttrs(connections)
+            else:
+                destination = other._parentPlug()
+                if destination is not None:
+                    destination.set(self.plainValue())  # assign referenced value
+                else:
+                    values = self.plainValue()
+                    for i, plug in enumerate(other._elementPlugs()):
+                        plug.set(values[i])  # assign referenced value
             return dim
         elif dim == 1 and allowGrow:   # --> otherDim != 1 and otherDim > 1
-            for i in range(otherDim):
-                self.connect(other[i])
+            if self.isAttribute():
+                source = self._parentPlug()
+                nodex.graph.connectAttrs([(source, plug) for plug in other._elementPlugs()])
+            else:
+                value = self.plainValue()
+                if isinstance(value, tuple):    # the one-tuple array
+                    value = value[0]
+                destination = other._parentPlug()
+                if destination is not None:
+                    destination.set((value,) * otherDim)
+                else:
+                    for plug in other._elementPlugs():
+                        plug.set(value)
             logger.debug('Connected single attribute {0} to larger attribute {1}. '
                            'Attribute connected to all inputs of larger attribute'.format(
                            self, other))
@@ -267,14 +413,19 @@ class Nodex(object):
             It also directly allows you to access children attributes of a compound/array attribute.
         """
         if self.isSingleAttribute():
-            attr = self.attr()
-            if attr.isArray():
+            plug = self._data
+            info = plug.info()
+            if info.isArray:
+                if isinstance(item, int):
+                    return Nodex(plug.elementByPhysicalIndex(item))
+                elif isinstance(item, slice):
+                    # query the existing indices once for all elements of the slice
+                    return Nodex([plug.element(i) for i in plug.elementIndices()[item]])
+            elif info.isCompound:
                 if isinstance(item, int):
-                    return Nodex(attr.elementByPhysicalIndex(item))
+                    return Nodex(plug.child(item))
                 elif isinstance(item, slice):
-                    return Nodex([attr.elementByPhysicalIndex(i) for i in xrange(item.start, item.stop, item.step)])
-            elif attr.isCompound():
-                return Nodex(attr.children()[item])
+                    return Nodex([plug.child(i) for i in xrange(*item.indices(info.numChildren))])
 
         if isinstance(item, slice):
             return Nodex(self._data[item])
@@ -327,6 +478,127 @@ class Nodex(object):
 
 
 
+class CompactArray(object):
+    """ Compact storage for the elements of an `Array` (and so also a `Vector` or `Matrix`).
+
+        The constant elements are stored in a single `array.array('d')` buffer instead of a `Nodex` per element. The
+        elements that reference an attribute are kept as `Nodex` in a sparse mapping by index. A `Nodex` for a
+        constant element is only created when it's accessed.
+
+        Since a double holds all int and bool values exactly the original Python type of the elements is stored
+        alongside; as a single type if all constants share it, else as a kind code per element.
+    """
+    __slots__ = ('_values', '_types', '_attributes')
+
+    _kinds = (float, int, bool)
+    _kindCodes = {float: 0, int: 1, bool: 2}
+
+    def __init__(self, values, types=float, attributes=None):
+        self._values = values
+        self._types = types
+        self._attributes = attributes
+
+    @classmethod
+    def fromSequence(cls, data):
+        """ Create the compact storage from a sequence of numerical values, attributes or one-dimensional `Nodex`.
+
+            :raises ValueError: If any of the elements has more than one dimension.
+            :rtype: CompactArray
+        """
+        if isinstance(data, CompactArray):
+            return data
+
+        kinds = set(map(type, data))
+        if kinds.issubset(cls._kindCodes):
+            # Only constants; let `array` do the conversion in one go.
+            if len(kinds) == 1:
+                return cls(array('d', data), kinds.pop())
+            return cls(array('d', data), array('B', [cls._kindCodes[type(x)] for x in data]))
+
+        values = array('d')
+        codes = array('B')
+        attributes = {}
+        for i, x in enumerate(data):
+            kind = type(x)
+            if kind not in cls._kindCodes:
+                x = Nodex(x)
+                if x.dimensions() > 1:
+                    raise ValueError("Can't create an Array type of Nodex that nests attributes/values with a "
+                                     "higher dimension than one.")
+                if x.isAttribute():
+                    attributes[i] = x
+                    values.append(0.0)
+                    codes.append(0)
+                    continue
+
+                # constant Nodex, eg. a Float
+                x = x.value()
+                if isinstance(x, tuple):    # the one-tuple array
+                    x = x[0]
+                kind = type(x)
+
+            values.append(x)
+            codes.append(cls._kindCodes[kind])
+
+        return cls(values, codes, attributes or None)
+
+    def _kind(self, index):
+        types = self._types
+        if isinstance(types, type):
+            return types
+        return self._kinds[types[index]]
+
+    def isConstant(self):
+        """ Returns True if none of the elements references an attribute. """
+        return not self._attributes
+
+    def isAttribute(self):
+        """ Returns True if all elements reference an attribute. """
+        attributes = self._attributes
+        return bool(attributes) and len(attributes) == len(self._values)
+
+    def value(self):
+        """ Returns the values of all elements as tuple, getting the values of referenced attributes. """
+        types = self._types
+        if isinstance(types, type):
+            result = list(self._values) if types is float else [types(x) for x in self._values]
+        else:
+            kinds = self._kinds
+            result = [kinds[code](x) for code, x in zip(types, self._values)]
+
+        if self._attributes:
+            for i, x in self._attributes.iteritems():
+                result[i] = x.value()
+        return tuple(result)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            indices = xrange(*item.indices(len(self._values)))
+            types = self._types
+            if not isinstance(types, type):
+                types = types[item]
+            attributes = None
+            if self._attributes:
+                attributes = dict((i, self._attributes[x]) for i, x in enumerate(indices) if x in self._attributes)
+            return CompactArray(self._values[item], types, attributes or None)
+
+        if item < 0:
+            item += len(self._values)
+        if self._attributes and item in self._attributes:
+            return self._attributes[item]
+        return Nodex(self._kind(item)(self._values[item]))
+
+    def __iter__(self):
+        for i in xrange(len(self._values)):
+            yield self[i]
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
 # TODO: (Define behaviour) Implement Nodex.insertInput() so we can easily pass-through a graph of nodes like Pymel
 # TODO: (Define behaviour) Implement method to allow quick insert of any of the mathematical operations on an attribute.
 #       Thus basically grabbing the current outputs for an output and passing them through the newly created node.
@@ -341,7 +613,11 @@ class Math(object):
     """
     @staticmethod
     def bimath(self, other, func):
-        """ Convenience method for the special methods like __add__, __sub__, etc. """
+        """ Convenience method for the special methods like __add__, __sub__, etc.
+
+            Operations on constants only are evaluated in Python by the node functions, so only once an attribute is
+            involved a node is created.
+        """
         if not isinstance(other, Nodex):
             other = Nodex(other)
 
@@ -375,18 +651,12 @@ class Math(object):
     @staticmethod
     def sqrt(nodex, name='sqrt'):
         """ Return the square root of the given nodex """
-        sqrt_result = Math.power(nodex, 0.5, name=name)
-        sqrt_result.node().attr("input2").lock()    # lock this attribute to be safe
-        return sqrt_result
+        return Math.power(nodex, 0.5, name=name, lock=("input2",))    # lock this attribute to be safe
 
     @staticmethod
     def abs(nodex, name="abs", dimensions=None):
-        """ Return the absolute value of the given nodex """
-        pow_result = Math.power(nodex, 2.0, name="{0}_pow".format(name))
-        pow_result.node().attr("input2").lock()     # lock this attribute to be safe
-        sqrt_result = Math.power(pow_result, 0.5, name="{0}_sqrt".format(name))
-        sqrt_result.node().attr("input2").lock()    # lock this attribute to be safe
-        return sqrt_result
+        """ Return the absolute value of the given nodex, built with the cheapest recipe (see `nodex.cost`) """
+        return _abs(Nodex(nodex), name=name)
 
     @staticmethod
     def blend(input1, input2, blender=None, name='blend'):
@@ -411,18 +681,22 @@ class Math(object):
         raise NotImplementedError()
 
     @staticmethod
-    def lookupTable(fn, minInput, maxInput, steps=200):
+    def lookupTable(fn, minInput, maxInput, steps=200, input=None, tolerance=1e-4):
         """ Returns the output of an animCurve node where the curve has been set to the provided function calculated
-            at `steps` amount between minInput and maxInput.
+            between minInput and maxInput.
 
             This could be used to implement non-default algorithms/nodes into Maya; especially those with a repetitive
-            pattern like sin/cos/tan.
+            pattern like sin/cos/tan. A single curve is far cheaper to evaluate than a chain of nodes approximating
+            the function.
 
-            .. warning:: Not implemented yet.
+            The function is sampled adaptively so keys are only placed where the curvature needs them to stay within
+            the `tolerance`, with at most `steps` segments between minInput and maxInput. An identical table on the
+            same input reuses its curve, unless the curve was created while deferred, see `nodex.utils.lookupTable()`.
 
+            :param input: The input of the curve, if None it's left unconnected. Each component of a Vector is looked
+                          up separately.
         """
-        # TODO: Implement Math.lookupTable
-        raise NotImplementedError()
+        return nodex.utils.lookupTable(input, fn, minInput, maxInput, steps=steps, tolerance=tolerance)
 
     @staticmethod
     def overlay(input1, input2):
@@ -435,6 +709,13 @@ class Math(object):
         # TODO: Rewrite overlay implementation so node names are more relevant
         a = Nodex(input1)
         b = Nodex(input2)
+
+        # With a constant base only the branch that is chosen is needed
+        if a.isConstant() and a.dimensions() == 1:
+            if nodex.utils.constantValues(a, 1)[0] < 0.5:    # also for the one-tuple array
+                return 2*a*b
+            return 1 - 2 * (1-a) * (1-b)
+
         fn1 = 2*a*b
         fn2 = 1 - 2 * (1-a) * (1-b)
         overlay = Math.lessThan(a, 0.5, ifTrue=fn1, ifFalse=fn2)
@@ -453,30 +734,173 @@ class Math(object):
         raise NotImplementedError()
 
 
+# region lowering, the recipes of the operations that can be built in more than one way (see `nodex.cost`)
+_convertedTypes = nodex.readback._angularTypes | frozenset(["time"])    # converted when connected to a linear input
+
+
+def _abs(x, name="abs"):
+    if x.isConstant() and x.dimensions() <= 3:
+        return nodex.utils.constantResult([abs(value) for value in nodex.utils.constantValues(x, x.dimensions())])
+    if nodex.utils.isNonNegative(x):
+        return x
+    return nodex.cost.lower("abs", x, name=name)
+
+
+def _absPower(x, name="abs"):
+    """ The square root of the square, for all components at once. """
+    # lock these attributes to be safe
+    pow_result = Math.power(x, 2.0, name="{0}_pow".format(name), lock=("input2",))
+    return Math.power(pow_result, 0.5, name="{0}_sqrt".format(name), lock=("input2",))
+
+
+def _absDistance(x, name="abs"):
+    """ The distance to zero, per component. """
+    components = [nodex.utils.nodeHelper("distanceBetween", "distance", inputs=(("point1.point1X", component),),
+                                         lock=("point2",), name=name)
+                  for component in (x if x.dimensions() > 1 else [x])]
+    return components[0] if len(components) == 1 else Nodex(components)
+
+
+def _absDistanceApplies(x, **kwargs):
+    """ The points of distanceBetween are linear, so other inputs or a scene that isn't in centimetres would get
+        unitConversion nodes that change the result.
+    """
+    if x.dimensions() > 3:
+        return False
+    if nodex.utils.linearUnit() != "cm":
+        return False
+    return not any(component.isAttribute() and component.plug().info().type in _convertedTypes
+                   for component in (x if x.dimensions() > 1 else [x]))
+
+
+nodex.cost.registerRecipe("abs", "power", ("multiplyDivide", "multiplyDivide"), _absPower)
+nodex.cost.registerRecipe("abs", "distance", lambda x, **kwargs: ("distanceBetween",) * x.dimensions(),
+                          _absDistance, applies=_absDistanceApplies)
+# endregion
+
+
 # TODO: Math.reverse
 # TODO: Math.stencil
 # TODO: Math.unitConversion
 
 
-# Cache the nodex datatypes in sorted order
+# region datatype registry
+_registry = []          # registered datatypes sorted by priority
+_dispatch = {}          # type(data) -> {length: datatypes} for sequences, else datatypes
+_lengths = set()        # all lengths datatypes declared through `_data_lengths`
+_builtinsRegistered = False
+_sequenceTypes = (list, tuple, CompactArray)
+
+
+def registerDataType(datatype):
+    """ Register a Nodex datatype so the Nodex factory will consider it when determining the datatype for data.
+
+        The datatype is matched against data in order of its `priority()`. To keep the lookup fast the datatype can
+        declare the Python types (`_data_types`) it accepts data of, and for lists/tuples the lengths
+        (`_data_lengths`) it accepts. Only the datatypes that declared the type (and length) of the data are checked
+        with `isValidData`. A datatype that declares no types (None) is checked for any data.
+
+        This returns the datatype so it can also be used as a class decorator by third-party datatypes.
+
+        :type datatype: type
+        :rtype: type
+    """
+    if not isinstance(datatype, type) or not issubclass(datatype, Nodex):
+        raise TypeError("Datatype to register must be a subclass of Nodex, got: {0}".format(datatype))
+
+    if datatype not in _registry:
+        _registry.append(datatype)
+        _registry.sort(key=lambda x: x.priority())
+        lengths = getattr(datatype, '_data_lengths', None)
+        if lengths:
+            _lengths.update(lengths)
+        _dispatch.clear()
+
+    return datatype
+
+
+def deregisterDataType(datatype):
+    """ Remove a datatype from the registry so the Nodex factory will no longer consider it. """
+    if datatype in _registry:
+        _registry.remove(datatype)
+        _lengths.clear()
+        for registered in _registry:
+            _lengths.update(getattr(registered, '_data_lengths', None) or ())
+        _dispatch.clear()
+
+
+def registeredDataTypes():
+    """ Returns the registered datatypes in the order they are checked against data.
+
+        :rtype: tuple
+    """
+    return tuple(_registry)
+
+
 def find_subclasses(module, clazz):
-    import inspect
-    return [cls for name, cls in inspect.getmembers(module) if cls != clazz and
-                                                               inspect.isclass(cls) and
-                                                               issubclass(cls, clazz)]
+    """ Returns the registered datatypes defined in the module that are a subclass of clazz.
+
+        .. deprecated:: The datatypes are looked up through the registry, use `registeredDataTypes()` instead.
+    """
+    return [cls for cls in registeredDataTypes()
+            if cls is not clazz and cls.__module__ == module.__name__ and issubclass(cls, clazz)]
 
 
 def find_nodex_subclasses_sorted():
-    import nodex.datatypes
-    kls = find_subclasses(nodex.datatypes, Nodex)
-    return list(sorted(kls, key=lambda x: x.priority()))
-
+    """ Returns the registered datatypes sorted by priority, including those registered by third parties.
 
-def _getDataTypeFromData(data, datatype=None, cache=[]):
+        .. deprecated:: Use `registeredDataTypes()` instead.
     """
-        Secretly caches the sorted list in cache upon first run. :O
+    import nodex.datatypes      # registers the built-in datatypes on import
+    return list(registeredDataTypes())
+
+
+def _acceptsData(datatype, datatypeOfData, length=None):
+    types = getattr(datatype, '_data_types', None)
+    if types is None:
+        return True
+
+    if not issubclass(datatypeOfData, types):
+        return False
+
+    lengths = getattr(datatype, '_data_lengths', None)
+    if lengths is not None and issubclass(datatypeOfData, _sequenceTypes):
+        return length in lengths
+
+    return True
+
+
+def _getCandidateDataTypes(data):
+    """ Returns the registered datatypes that might accept the data sorted by priority.
+
+        The candidates are cached per type of data, for sequences additionally by length. Lengths that no
+        datatype declared share a single entry so the cache stays small.
     """
-    #TODO: Implement more pythonic/safer caching method, instead of doing the quick 'n' dirty route.
+    datatypeOfData = type(data)
+    candidates = _dispatch.get(datatypeOfData)
+    if candidates is None:
+        if issubclass(datatypeOfData, _sequenceTypes):
+            candidates = {}
+        else:
+            candidates = tuple(x for x in _registry if _acceptsData(x, datatypeOfData))
+        _dispatch[datatypeOfData] = candidates
+
+    if isinstance(candidates, dict):
+        length = len(data)
+        if length not in _lengths:
+            length = None
+        lengthCandidates = candidates.get(length)
+        if lengthCandidates is None:
+            lengthCandidates = tuple(x for x in _registry if _acceptsData(x, datatypeOfData, length))
+            candidates[length] = lengthCandidates
+        return lengthCandidates
+
+    return candidates
+
+
+def _getDataTypeFromData(data, datatype=None):
+    """ Returns the registered datatype with the highest priority that accepts the data. """
+    global _builtinsRegistered
     if datatype is not None:
         if not issubclass(datatype, Nodex):
             raise TypeError("Preferred datatype should be of type Nodex")
@@ -484,13 +908,15 @@ def _getDataTypeFromData(data, datatype=None, cache=[]):
         if datatype.isValidData(data):
             return datatype
 
-    if not cache:
-        cache[:] = find_nodex_subclasses_sorted()
+    if not _builtinsRegistered:
+        import nodex.datatypes      # registers the built-in datatypes on import
+        _builtinsRegistered = True
 
-    for cls in cache:
+    for cls in _getCandidateDataTypes(data):
         if VERBOSE:
             logger.debug("Checking data {0} against {1}".format(data, cls.__name__))
         if cls.isValidData(data):
             if VERBOSE:
-                logger.debug("Matched data {0} with {0}".format(data, cls.__name__))
-            return cls
\ No newline at end of file
+                logger.debug("Matched data {0} with {1}".format(data, cls.__name__))
+            return cls
+# endregion
@@ -0,0 +1,158 @@
+"""
+    The evaluation cost of the node types and the lowering of operations to their cheapest recipe.
+
+    Several operations can be built with different nodes, eg. `Math.abs()` of a scalar as the square root of its
+    square (two multiplyDivide nodes) or as its distance to zero (one distanceBetween node). Each way to build an
+    operation is registered as a recipe with `registerRecipe()` and `lower()` builds the cheapest one. The cost of a
+    recipe is the sum of the cost of the nodes it creates, where nodes that can only be evaluated by the dependency
+    graph (and not in parallel by the evaluation manager) count `DG_ONLY_PENALTY` times.
+
+    The default costs are estimates of the evaluation time per node relative to each other. They are measured in a
+    scene by ``python -m nodex.benchmarks evaluation`` (see `nodex.benchmarks.evaluation`), whose results can be
+    registered for the Maya version they were measured in with `registerNodeCosts()`:
+
+        >>> nodex.cost.registerNodeCosts(nodex.benchmarks.load("costs.json")["nodeCosts"], version=2018)
+"""
+
+# standard library
+import collections
+
+# local library
+import nodex.graph
+
+
+class NodeCost(collections.namedtuple('NodeCost', ['seconds', 'dgOnly'])):
+    """ The time it takes to evaluate a node of a type once, and whether it can only be evaluated by the DG. """
+    __slots__ = ()
+
+
+class Recipe(collections.namedtuple('Recipe', ['name', 'nodeTypes', 'build', 'applies'])):
+    """ A way to build an operation, see `registerRecipe()`. """
+    __slots__ = ()
+
+
+DG_ONLY_PENALTY = 4.0
+UNKNOWN_COST = NodeCost(1e-6, False)     # the cost of the node types that aren't in the table
+
+_costs = {None: {}}     # maya version (None for the defaults) -> node type -> NodeCost
+_recipes = collections.OrderedDict()    # operation -> list of Recipe
+_version = []           # the detected Maya version, see `mayaVersion()`
+
+
+def registerNodeCost(nodeType, seconds, dgOnly=False, version=None):
+    """ Register the evaluation cost of the node type.
+
+        :param seconds: The time it takes to evaluate a node of this type once.
+        :param dgOnly: If True the node type can only be evaluated by the DG, eg. an expression.
+        :param version: The Maya version (eg. 2018) from which on this cost applies, None for the default.
+    """
+    _costs.setdefault(version, {})[nodeType] = NodeCost(float(seconds), bool(dgOnly))
+
+
+def registerNodeCosts(costs, version=None):
+    """ Register the evaluation costs of many node types, eg. measured by `nodex.benchmarks.evaluation.nodeCosts()`.
+
+        :param costs: Dict of node type -> (seconds, dgOnly).
+    """
+    for nodeType, (seconds, dgOnly) in costs.iteritems():
+        registerNodeCost(nodeType, seconds, dgOnly=dgOnly, version=version)
+
+
+def mayaVersion():
+    """ Returns the major version of Maya (eg. 2018), None without Maya or when evaluating headless. """
+    if nodex.graph.isHeadless():
+        return None
+    if not _version:
+        from nodex.lazy import maya
+        try:
+            version = int(maya.cmds.about(apiVersion=True)) // 10000
+        except (AttributeError, RuntimeError, TypeError, ValueError):
+            version = None      # eg. the stand-in of `nodex.benchmarks.standin`
+        _version.append(version)
+    return _version[0]
+
+
+def nodeCost(nodeType, version=None):
+    """ Returns the cost of the node type in the Maya version, the current version if None.
+
+        The cost registered for the latest version up to and including the version is used, else the default.
+
+        :rtype: NodeCost
+    """
+    if version is None:
+        version = mayaVersion()
+    if version is not None:
+        for costVersion in sorted((x for x in _costs if x is not None and x <= version), reverse=True):
+            cost = _costs[costVersion].get(nodeType)
+            if cost is not None:
+                return cost
+    return _costs[None].get(nodeType, UNKNOWN_COST)
+
+
+def cost(nodeTypes, version=None):
+    """ Returns the cost of evaluating the nodes, see `nodeCost()`. """
+    total = 0.0
+    for nodeType in nodeTypes:
+        nodeTypeCost = nodeCost(nodeType, version=version)
+        total += nodeTypeCost.seconds * (DG_ONLY_PENALTY if nodeTypeCost.dgOnly else 1.0)
+    return total
+
+
+def registerRecipe(operation, name, nodeTypes, build, applies=None):
+    """ Register a way to build the operation.
+
+        :param operation: The name of the operation, eg. ``abs``.
+        :param name: The name of the recipe.
+        :param nodeTypes: Function called with the arguments of the operation that returns the types of the nodes
+                          the recipe creates, or that sequence itself if it doesn't depend on the arguments.
+        :param build: Function called with the arguments of the operation that builds it.
+        :param applies: Function called with the arguments of the operation that returns whether the recipe can
+                        build it, if None it always can.
+    """
+    if not callable(nodeTypes):
+        nodeTypes = (lambda types: lambda *args, **kwargs: types)(tuple(nodeTypes))
+    recipes = _recipes.setdefault(operation, [])
+    recipes[:] = [x for x in recipes if x.name != name]
+    recipes.append(Recipe(name, nodeTypes, build, applies))
+
+
+def recipes(operation, *args, **kwargs):
+    """ Returns the (cost, recipe) of the recipes that can build the operation with the arguments, cheapest first.
+
+        :rtype: list
+    """
+    found = [(cost(recipe.nodeTypes(*args, **kwargs)), i, recipe) for i, recipe in enumerate(_recipes[operation])
+             if recipe.applies is None or recipe.applies(*args, **kwargs)]
+    return [(recipeCost, recipe) for recipeCost, _, recipe in sorted(found)]
+
+
+def lower(operation, *args, **kwargs):
+    """ Builds the operation with its cheapest recipe, the first registered one if they cost the same. """
+    found = recipes(operation, *args, **kwargs)
+    if not found:
+        raise ValueError("No recipe can build {0} for the arguments: {1}".format(operation, args))
+    return found[0][1].build(*args, **kwargs)
+
+
+# Relative estimates of the evaluation time per node, measure them with `nodex.benchmarks.evaluation.nodeCosts()`
+for _nodeType, _seconds in (("addDoubleLinear", 0.4e-6),
+                            ("multDoubleLinear", 0.4e-6),
+                            ("plusMinusAverage", 1.0e-6),
+                            ("multiplyDivide", 0.8e-6),
+                            ("condition", 0.7e-6),
+                            ("clamp", 0.7e-6),
+                            ("blendColors", 0.7e-6),
+                            ("distanceBetween", 0.9e-6),
+                            ("vectorProduct", 0.9e-6),
+                            ("angleBetween", 1.5e-6),
+                            ("composeMatrix", 2.0e-6),
+                            ("decomposeMatrix", 2.5e-6),
+                            ("inverseMatrix", 1.5e-6),
+                            ("transposeMatrix", 0.8e-6),
+                            ("holdMatrix", 0.5e-6),
+                            ("passMatrix", 0.6e-6),
+                            ("multMatrix", 1.2e-6),
+                            ("animCurveUU", 0.5e-6),
+                            ("unitConversion", 0.3e-6)):
+    registerNodeCost(_nodeType, _seconds)
+registerNodeCost("expression", 10e-6, dgOnly=True)
@@ -7,19 +7,18 @@
 
 # standard library
 import itertools
+import math
 import logging
 logger = logging.getLogger(__name__)
 
-# maya library
-import pymel.core
-import pymel.core.datatypes
-import maya.OpenMaya
-import maya.api.OpenMaya
-import maya.cmds
+# maya library, imported on first use
+from nodex.lazy import pymel, maya
 
 # local library
 import nodex.utils
-from core import Nodex, Math
+import nodex.graph
+import nodex.cost
+from core import Nodex, Math, CompactArray, registerDataType
 
 # TODO: It's possibly simpler to remove the either convertData or isValidData method and create a single method that
 #       will return converted data but raise an InvalidDataError if it doesn't. This will reduce code duplicity, plus
@@ -33,17 +32,20 @@ class Numerical(Nodex):
                   numerical value (since Float/Integer/Boolean haven't been implemented like that as of yet).
                   Nevertheless all those classes should behave as expected.
     """
+    __slots__ = ()
     _priority = 25
+    _data_types = (float, int, bool, basestring, pymel.core.Attribute, nodex.utils.Plug)
 
     _attr_types = frozenset(["int", "float", "bool", "double", "doubleAngle", "time",
                            "doubleLinear", "long", "short", "byte", "enum", ])
 
     @staticmethod
     def validateAttr(attr):
-        if attr.isArray() or attr.isCompound():
+        info = nodex.utils.plugInfo(attr)
+        if info.isArray or info.isCompound:
             return False
 
-        if attr.type() in Numerical._attr_types:
+        if info.type in Numerical._attr_types:
             return True
 
         return False
@@ -55,19 +57,9 @@ class Numerical(Nodex):
             return True
 
         # attribute
-        if isinstance(data, pymel.core.Attribute):
+        if isinstance(data, (nodex.utils.Plug, pymel.core.Attribute, basestring)):
+            # TODO: check if node has a known conversion if so get the default output attribute (this should be extendible)
             return Numerical.validateAttr(data)
-        elif isinstance(data, basestring):
-            try:
-
-                attr = pymel.core.Attribute(data)
-                if Numerical.validateAttr(attr):
-                    return True
-
-            except TypeError:
-                # TODO: check if node has a known conversion if so get the default output attribute (this should be extendible)
-                data = pymel.core.PyNode(data)
-                raise
 
         return False
 
@@ -82,15 +74,8 @@ class Numerical(Nodex):
             return data
 
         # attribute
-        if isinstance(data, pymel.core.Attribute):
-            return data
-        elif isinstance(data, basestring):
-            try:
-                return pymel.core.Attribute(data)
-            except TypeError:
-                # TODO: check if node has a known conversion if so get the default output attribute (this should be extendible)
-                data = pymel.core.PyNode(data)
-                raise
+        if isinstance(data, (nodex.utils.Plug, pymel.core.Attribute, basestring)):
+            return nodex.utils.resolvePlug(data)
 
         raise TypeError("Can't convert {0}".format(data))
 
@@ -122,6 +107,10 @@ class Numerical(Nodex):
     def __div__(self, other):
         """ Divide this instance by other `Nodex` using / """
         return Math.bimath(self, other, func=Math.divide)
+
+    def __neg__(self):
+        """ Negate this instance using - """
+        return Math.bimath(self, -1, func=Math.multiply)
     #endregion
 
     # region special methods override: rich-comparisons-methods
@@ -152,11 +141,13 @@ class Numerical(Nodex):
         return Math.abs(self, **kwargs)
 
     def sign(self, **kwargs):
-        """ Returns whether this value is greater or equal to zero.
+        """ Returns whether this value is greater or equal to zero, built with the cheapest recipe (see `nodex.cost`)
 
             :rtype: :class:`nodex.datatypes.Float`
         """
-        return Math.greaterOrEqual(self, 0.0)
+        if nodex.utils.isNonNegative(self):
+            return Nodex(1.0)
+        return nodex.cost.lower("sign", self)
     # endregion
 
 
@@ -165,7 +156,9 @@ class Boolean(Numerical):
         The `Boolean` datatype represents a single True/False value where the given data is either a Python `bool`
         if it's referencing a value or a maya boolean attribute if it references an attribute.
     """
+    __slots__ = ()
     _priority = 5
+    _data_types = (bool,)
 
     @staticmethod
     def isValidData(data):
@@ -184,7 +177,9 @@ class Boolean(Numerical):
 
 
 class Integer(Numerical):
+    __slots__ = ()
     _priority = 10
+    _data_types = (int,)
 
     @staticmethod
     def isValidData(data):
@@ -199,7 +194,9 @@ class Integer(Numerical):
 
 
 class Float(Numerical):
+    __slots__ = ()
     _priority = 15
+    _data_types = (float,)
 
     @staticmethod
     def isValidData(data):
@@ -218,11 +215,14 @@ class Array(Nodex):
 
         The `Array` can only hold elements with a dimension of one. So it will not hold a nested list.
     """
+    __slots__ = ()
     _priority = 100
+    _data_types = (list, tuple, CompactArray, basestring, pymel.core.Attribute, nodex.utils.Plug)
 
     @staticmethod
     def validateAttr(attr):
-        if attr.isArray() or attr.isCompound():
+        info = nodex.utils.plugInfo(attr)
+        if info.isArray or info.isCompound:
             return True
         return False
 
@@ -230,22 +230,24 @@ class Array(Nodex):
     def isValidData(data):
 
         # attribute
-        if isinstance(data, pymel.core.Attribute):
-            return Array.validateAttr(data)
-        elif isinstance(data, basestring):
+        if isinstance(data, (nodex.utils.Plug, pymel.core.Attribute, basestring)):
             try:
-                attr = pymel.core.Attribute(data)
-                return Array.validateAttr(attr)
-            except RuntimeError:
+                return Array.validateAttr(data)
+            except (TypeError, RuntimeError):
                 return False
 
+        # compact storage (eg. a slice of another Array)
+        elif isinstance(data, CompactArray):
+            return len(data) > 0
+
         # list
         elif isinstance(data, (list, tuple)):
             if len(data) == 0:
                 return False
 
-            # This is relatively slow... but hey, let's keep it for now (should be mergeable with below)
-            if any(Nodex(x).dimensions() > 1 for x in data):
+            # Constants are always valid, only other elements need to be checked for their dimensions
+            numerical = CompactArray._kindCodes
+            if any(type(x) not in numerical and Nodex(x).dimensions() > 1 for x in data):
                 return False
 
             return True
@@ -254,19 +256,12 @@ class Array(Nodex):
 
     def convertData(self, data):
 
-        if isinstance(data, pymel.core.Attribute):
-            return data
-        elif isinstance(data, basestring):
-            return pymel.core.Attribute(data)
-
-        if isinstance(data, (tuple, list)):
-            # Convert any references internal to the array
-            data = tuple(Nodex(x) for x in data)
-            # Validate every element has max single dimension of depth
-            if any(x.dimensions() > 1 for x in data):
-                raise ValueError("Can't create an Array type of Nodex that nests attributes/values with a "
-                                 "higher dimension than one.")
-            return data
+        if isinstance(data, (nodex.utils.Plug, pymel.core.Attribute, basestring)):
+            return nodex.utils.resolvePlug(data)
+
+        if isinstance(data, (tuple, list, CompactArray)):
+            # Store constants compactly and only convert the references internal to the array
+            return CompactArray.fromSequence(data)
 
         raise TypeError()
 
@@ -299,6 +294,10 @@ class Array(Nodex):
     def __div__(self, other):
         """ Divide all individual components of this array by the other Nodex """
         return Math.bimath(self, other, func=Math.divide)
+
+    def __neg__(self):
+        """ Negate all individual components of this array """
+        return Math.bimath(self, -1, func=Math.multiply)
     #endregion
 
     # region special methods override: rich-comparisons-methods
@@ -330,18 +329,31 @@ class Vector(Array):
     """
         Vectorsssss
     """
+    __slots__ = ()
     _priority = 50
-    _allowed_iterables = (tuple, list)
+    _allowed_iterables = (tuple, list, CompactArray)
+    _data_types = (list, tuple, CompactArray, basestring, pymel.core.Attribute, nodex.utils.Plug,
+                   pymel.core.datatypes.Vector, pymel.core.datatypes.FloatVector,
+                   maya.OpenMaya.MVector, maya.OpenMaya.MFloatVector,
+                   maya.api.OpenMaya.MVector, maya.api.OpenMaya.MFloatVector)
+    _data_lengths = (3,)
     _attr_types = frozenset(["reflectance", "reflectanceRGB", "spectrum", "spectrumRGB",
                              "float3", "double3", "long3"])
 
+    # The values of the output (or its children) of a vectorProduct
+    _outputValues = {'output': lambda v: v,
+                     'output.outputX': lambda v: v[:1],
+                     'output.outputY': lambda v: v[1:2],
+                     'output.outputZ': lambda v: v[2:]}
+
     @staticmethod
     def validateAttr(attr):
-        if attr.isArray() or attr.isCompound():
+        info = nodex.utils.plugInfo(attr)
+        if info.isArray or info.isCompound:
             if nodex.utils.attrDimensions(attr) == 3:
                 return True
 
-        if attr.type() in Vector._attr_types:
+        if info.type in Vector._attr_types:
             return True
 
         return False
@@ -350,11 +362,8 @@ class Vector(Array):
     def isValidData(data):
 
         # attribute
-        if isinstance(data, pymel.core.Attribute):
+        if isinstance(data, (nodex.utils.Plug, pymel.core.Attribute, basestring)):
             return Vector.validateAttr(data)
-        elif isinstance(data, basestring):
-            attr = pymel.core.Attribute(data)
-            return Vector.validateAttr(attr)
 
         # matrix data
         elif isinstance(data, (pymel.core.datatypes.Vector, pymel.core.datatypes.FloatVector,
@@ -370,11 +379,8 @@ class Vector(Array):
 
     def convertData(self, data):
         # region attribute
-        if isinstance(data, pymel.core.Attribute):
-            if Vector.validateAttr(data):
-                return data
-        elif isinstance(data, basestring):
-            data = pymel.core.Attribute(data)
+        if isinstance(data, (nodex.utils.Plug, pymel.core.Attribute, basestring)):
+            data = nodex.utils.resolvePlug(data)
             if Vector.validateAttr(data):
                 return data
         # endregion
@@ -386,10 +392,6 @@ class Vector(Array):
                           maya.api.OpenMaya.MVector, maya.api.OpenMaya.MFloatVector)):
             data = tuple(data)
 
-        # convert list to tuple
-        elif isinstance(data, list):
-            data = tuple(data)
-
         return super(Vector, self).convertData(data)
         # endregion
 
@@ -407,51 +409,98 @@ class Vector(Array):
         return pymel.core.datatypes.Vector()
 
     @staticmethod
-    def _distanceBetween(point1=None, point2=None, **kwargs):
+    def _distanceBetween(point1=None, point2=None, lock=(), **kwargs):
+
+        # Evaluate constants directly instead of creating a node
+        if nodex.utils.isConstant(point1, point2):
+            points = [nodex.utils.constantValues(x, 3) if x is not None else (0.0, 0.0, 0.0) for x in (point1, point2)]
+            return Nodex(math.sqrt(sum((a - b) ** 2 for a, b in zip(*points))))
 
         name = kwargs.get('name', 'distanceBetween')
-        n = pymel.core.createNode("distanceBetween", name=name)
+        key = nodex.utils.nodeKey("distanceBetween", tuple(lock), (('point1', point1), ('point2', point2)), name=name)
+        n = nodex.utils.nodeCache.get(key)
+        if n is None:
+            n = nodex.graph.createNode("distanceBetween", name=name)
+
+            if point1 is not None:
+                Nodex(point1).connect(n.attr('point1'))
+            if point2 is not None:
+                Nodex(point2).connect(n.attr('point2'))
+
+            for attrName in lock:
+                n.attr(attrName).lock()
 
-        if point1 is not None:
-            Nodex(point1).connect(n.attr('point1'))
-        if point2 is not None:
-            Nodex(point2).connect(n.attr('point2'))
+            nodex.utils.nodeCache.set(key, n)
 
         return Nodex(n.attr('distance'))
 
     @staticmethod
-    def _vectorProduct(input1=None, input2=None, matrix=None, operation=None, normalizeOutput=None, **kwargs):
+    def _vectorProduct(input1=None, input2=None, matrix=None, operation=None, normalizeOutput=None,
+                       chainAttr='output', lock=(), **kwargs):
+
+        # Evaluate constants directly instead of creating a node
+        if nodex.utils.isConstant(input1, input2, matrix, normalizeOutput) and chainAttr in Vector._outputValues:
+            values = dict((key, nodex.utils.constantValues(x, 3)) for key, x in (('input1', input1),
+                                                                                  ('input2', input2))
+                          if x is not None)
+            if matrix is not None:
+                values['matrix'] = nodex.utils.constantValues(matrix, 16)
+            output = nodex.utils.vectorProductValue(operation if operation is not None else 1,
+                                                    normalizeOutput=bool(normalizeOutput is not None and
+                                                                         Nodex(normalizeOutput).value()),
+                                                    **values)
+            return nodex.utils.constantResult(Vector._outputValues[chainAttr](output))
+
+        if normalizeOutput is False:
+            normalizeOutput = None
 
         name = kwargs.get('name', 'vectorProduct')
-        n = pymel.core.createNode("vectorProduct", name=name)
+        key = nodex.utils.nodeKey("vectorProduct", (operation, tuple(lock)), (('input1', input1),
+                                                                             ('input2', input2),
+                                                                             ('matrix', matrix),
+                                                                             ('normalizeOutput', normalizeOutput)),
+                                  name=name)
+        n = nodex.utils.nodeCache.get(key)
+        if n is None:
+            n = nodex.graph.createNode("vectorProduct", name=name)
 
-        if operation is not None:
-            n.attr('operation').set(operation)
+            if operation is not None:
+                n.attr('operation').set(operation)
 
-        if input1 is not None:
-            Nodex(input1).connect(n.attr('input1'))
-        if input2 is not None:
-            Nodex(input2).connect(n.attr('input2'))
+            if input1 is not None:
+                Nodex(input1).connect(n.attr('input1'))
+            if input2 is not None:
+                Nodex(input2).connect(n.attr('input2'))
 
-        if matrix is not None: # used for operations: Vector Matrix Product and Point Matrix Product
-            Nodex(matrix).connect(n.attr('matrix'))
+            if matrix is not None: # used for operations: Vector Matrix Product and Point Matrix Product
+                Nodex(matrix).connect(n.attr('matrix'))
 
-        if normalizeOutput is not None and normalizeOutput is not False:
-            Nodex(normalizeOutput).connect(n.attr('normalizeOutput'))
+            if normalizeOutput is not None:
+                Nodex(normalizeOutput).connect(n.attr('normalizeOutput'))
 
-        return Nodex(n.attr('output'))
+            for attrName in lock:
+                n.attr(attrName).lock()
+
+            nodex.utils.nodeCache.set(key, n)
+
+        return Nodex(n.attr(chainAttr))
 
     @staticmethod
     def _angleBetween(vector1=None, vector2=None, angle=None, axis=None, euler=None, chainAttr='angle', **kwargs):
 
         name = kwargs.get('name', 'angleBetween')
-        n = pymel.core.createNode("angleBetween", name=name)
+        key = nodex.utils.nodeKey("angleBetween", inputs=(('vector1', vector1), ('vector2', vector2)), name=name)
+        n = nodex.utils.nodeCache.get(key)
+        if n is None:
+            n = nodex.graph.createNode("angleBetween", name=name)
 
-        # inputs
-        if vector1 is not None:
-            Nodex(vector1).connect(n.attr('vector1'))
-        if vector2 is not None:
-            Nodex(vector2).connect(n.attr('vector2'))
+            # inputs
+            if vector1 is not None:
+                Nodex(vector1).connect(n.attr('vector1'))
+            if vector2 is not None:
+                Nodex(vector2).connect(n.attr('vector2'))
+
+            nodex.utils.nodeCache.set(key, n)
 
         # outputs
         if angle is not None:
@@ -485,25 +534,22 @@ class Vector(Array):
         :return: The dot product
         :rtype: :class:`nodex.datatypes.Vector`
         """
-        output = self._vectorProduct(self, other, operation=1, normalizeOutput=normalizeOutput, name="vectorDot")
         # The dot product only results in one value, so get the outputX
-        return Nodex(output.node().attr('outputX'))
+        return self._vectorProduct(self, other, operation=1, normalizeOutput=normalizeOutput,
+                                   chainAttr='output.outputX', name="vectorDot")
 
     def length(self):
         """ Returns the magnitude of the vector.
 
             :rtype: :class:`nodex.datatypes.Float`"""
-        output = self._distanceBetween(self, point2=(0, 0, 0), name="vectorLength")
-        output.node().attr('point2').lock()     # lock this input to ensure output stays correct
-        return output
+        # lock this input to ensure output stays correct
+        return self._distanceBetween(self, point2=(0, 0, 0), lock=('point2',), name="vectorLength")
 
     def squareLength(self):
-        """ Returns the square length of this `Vector`.
+        """ Returns the square length of this `Vector`, built with the cheapest recipe (see `nodex.cost`)
 
             :rtype: :class:`nodex.datatypes.Float`"""
-        v = self ^ [2.0, 2.0, 2.0]          # square all components
-        v = Math.sum1D(v[0], v[1], v[2])    # sum all components
-        return v
+        return nodex.cost.lower("squareLength", self)
 
     def distanceTo(self, other):
         """ Returns the distance between this and another `Vector`.
@@ -524,9 +570,12 @@ class Vector(Array):
 
             :rtype: :class:`nodex.datatypes.Vector`
         """
-        output = self._vectorProduct(self, input2=None, operation=0, normalizeOutput=True, name="vectorNormalize")
-        output.node().attr('input2').lock()     # lock this input since it's not being used anyway
-        return output
+        # lock this input since it's not being used anyway
+        return self._vectorProduct(self, input2=None, operation=0, normalizeOutput=True, lock=('input2',),
+                                   name="vectorNormalize")
+
+
+_identityMatrix = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
 
 
 class Matrix(Array):
@@ -547,10 +596,16 @@ class Matrix(Array):
                   Maya) ensure the required nodes are available.
     """
     _plugins = ["matrixNodes"]
-    _allowed_iterables = (tuple, list)
+    _allowed_iterables = (tuple, list, CompactArray)
 
     # TODO: Implement matrix math
+    __slots__ = ()
     _priority = 60
+    _data_types = (list, tuple, CompactArray, basestring, pymel.core.Attribute, nodex.utils.Plug,
+                   pymel.core.datatypes.Matrix, pymel.core.datatypes.FloatMatrix,
+                   maya.OpenMaya.MMatrix, maya.OpenMaya.MFloatMatrix,
+                   maya.api.OpenMaya.MMatrix, maya.api.OpenMaya.MFloatMatrix)
+    _data_lengths = (4, 16)
 
     @staticmethod
     def validateAttr(attr):
@@ -560,30 +615,17 @@ class Matrix(Array):
         just after creating a node (when attribute hasn't been used yet) will result in 'attr.type()' returning
         None. Nevertheless maya.cmds.getAttr(attr, type=1) returns 'matrix' correctly.
 
-        .. note:: After using maya.cmds.getAttr(attr, type=1) once on that attribute it will somehow behave correctly
-                  in pymel as well.
-
         Then there's also the nitpicky behaviour of Matrix attributes that Maya will never give you the type of the
         attribute unless it's been set before. Otherwise it'll result in 'None' as type.
         (eg. This happens on multMatrix.matrixIn[0])
 
-        :type attr: pymel.core.Attribute
-        """
-        if isinstance(attr, pymel.core.Attribute):
-            attr_name = attr.name()
-
-            # workaround for worldMatrix[0] on transforms
-            t = maya.cmds.getAttr(attr_name, type=1)
-
-            if t is None:
-                # workaround for matrixIn[0] on multMatrix
-                try:
-                    attr.set(pymel.core.datatypes.Matrix(), type="matrix")
-                except RuntimeError:
-                    return False
-                t = maya.cmds.getAttr(attr_name, type=1)
+        Both are handled by the plug metadata (see `nodex.utils.plugInfo()` and `nodex.utils.isMatrixAttribute()`)
+        which never sets a value on the attribute.
 
-            return t == 'matrix'
+        :type attr: nodex.utils.Plug or pymel.core.Attribute
+        """
+        if isinstance(attr, (nodex.utils.Plug, pymel.core.Attribute)):
+            return nodex.utils.plugInfo(attr).isMatrix
         return False
 
     @staticmethod
@@ -591,11 +633,10 @@ class Matrix(Array):
 
         # attribute
         # TODO: Check what the actual type of a Matrix attribute is and implement support
-        if isinstance(data, pymel.core.Attribute):
+        if isinstance(data, (nodex.utils.Plug, pymel.core.Attribute)):
             return Matrix.validateAttr(data)
         elif isinstance(data, basestring):
-            attr = pymel.core.Attribute(data)
-            return Matrix.validateAttr(attr)
+            return Matrix.validateAttr(nodex.utils.resolvePlug(data))
 
         # matrix data
         elif isinstance(data, (pymel.core.datatypes.Matrix, pymel.core.datatypes.FloatMatrix,
@@ -617,14 +658,15 @@ class Matrix(Array):
     def convertData(self, data):
         # Convert the data to a matrix type
         # If the data refers to a Matrix attribute we store the reference directly.
-        # Else we store the data as a tuple so we can also hold mixed references like the normal Array datatype.
+        # Else we store the data compactly so we can also hold mixed references like the normal Array datatype.
+
+        # flat list of values (most common), skip all other checks
+        if type(data) in Matrix._allowed_iterables and len(data) == 16:
+            return CompactArray.fromSequence(data)
 
         # region attribute
-        if isinstance(data, pymel.core.Attribute):
-            if Matrix.validateAttr(data):
-                return data
-        elif isinstance(data, basestring):
-            data = pymel.core.Attribute(data)
+        if isinstance(data, (nodex.utils.Plug, pymel.core.Attribute, basestring)):
+            data = nodex.utils.resolvePlug(data)
             if Matrix.validateAttr(data):
                 return data
         # endregion
@@ -644,10 +686,6 @@ class Matrix(Array):
         elif isinstance(data, (maya.api.OpenMaya.MMatrix, maya.api.OpenMaya.MFloatMatrix)):
             data = tuple(data)
 
-        # convert list to tuple
-        elif isinstance(data, list):
-            data = tuple(data)
-
         return super(Matrix, self).convertData(data)
         # endregion
 
@@ -667,16 +705,24 @@ class Matrix(Array):
     @classmethod
     def compose(cls, translate=(0, 0, 0), rotate=(0, 0, 0), scale=(1, 1, 1), shear=(0, 0, 0)):
         nodex.utils.ensurePluginsLoaded(cls._plugins)
-        composeNode = pymel.core.createNode("composeMatrix")
-
-        if translate != (0, 0, 0):
-            Nodex(translate).connect(composeNode.attr('inputTranslate'))
-        if rotate != (0, 0, 0):
-            Nodex(rotate).connect(composeNode.attr('inputRotate'))
-        if scale != (1, 1, 1):
-            Nodex(scale).connect(composeNode.attr('inputScale'))
-        if shear != (0, 0, 0):
-            Nodex(shear).connect(composeNode.attr('inputShear'))
+        key = nodex.utils.nodeKey("composeMatrix", inputs=(('inputTranslate', translate),
+                                                           ('inputRotate', rotate),
+                                                           ('inputScale', scale),
+                                                           ('inputShear', shear)))
+        composeNode = nodex.utils.nodeCache.get(key)
+        if composeNode is None:
+            composeNode = nodex.graph.createNode("composeMatrix")
+
+            if translate != (0, 0, 0):
+                Nodex(translate).connect(composeNode.attr('inputTranslate'))
+            if rotate != (0, 0, 0):
+                Nodex(rotate).connect(composeNode.attr('inputRotate'))
+            if scale != (1, 1, 1):
+                Nodex(scale).connect(composeNode.attr('inputScale'))
+            if shear != (0, 0, 0):
+                Nodex(shear).connect(composeNode.attr('inputShear'))
+
+            nodex.utils.nodeCache.set(key, composeNode)
 
         return Nodex(composeNode.attr('outputMatrix'))
 
@@ -686,9 +732,7 @@ class Matrix(Array):
         :rtype: :class:`nodex.datatypes.Vector`
         """
         nodex.utils.ensurePluginsLoaded(self._plugins)
-        decomposeNode = pymel.core.createNode("decomposeMatrix")
-
-        self.connect(decomposeNode.attr("inputMatrix"))
+        decomposeNode = self._matrixNode("decomposeMatrix", "inputMatrix")
 
         if translate is not None:
             Nodex(decomposeNode.attr("outputTranslate")).connect(translate)
@@ -704,6 +748,19 @@ class Matrix(Array):
         # Assume chain output based on chainAttr
         return Nodex(decomposeNode.attr(chainAttr))
 
+    def _matrixNode(self, nodeType, inputAttr):
+        """ Returns the node of `nodeType` with this matrix connected to its `inputAttr`, reusing an identical one.
+
+            :rtype: nodex.graph.Node
+        """
+        key = nodex.utils.nodeKey(nodeType, inputs=((inputAttr, self),))
+        n = nodex.utils.nodeCache.get(key)
+        if n is None:
+            n = nodex.graph.createNode(nodeType)
+            self.connect(n.attr(inputAttr))
+            nodex.utils.nodeCache.set(key, n)
+        return n
+
     def passMatrix(self, scale=None):
         """ Multiply a matrix by a constant without caching anything
 
@@ -716,11 +773,16 @@ class Matrix(Array):
         # no plug-in required (tested maya 2015)
         # nodex.utils.ensurePluginsLoaded(self._plugins)
 
-        n = pymel.core.createNode("passMatrix")
-        self.connect(n.attr("inMatrix"))
+        key = nodex.utils.nodeKey("passMatrix", inputs=(("inMatrix", self), ("inScale", scale)))
+        n = nodex.utils.nodeCache.get(key)
+        if n is None:
+            n = nodex.graph.createNode("passMatrix")
+            self.connect(n.attr("inMatrix"))
 
-        if scale is not None:
-            Nodex(scale).connect(n.attr("inScale"))
+            if scale is not None:
+                Nodex(scale).connect(n.attr("inScale"))
+
+            nodex.utils.nodeCache.set(key, n)
 
         return Nodex(n.attr("outMatrix"))
 
@@ -732,8 +794,7 @@ class Matrix(Array):
             :rtype: :class:`nodex.datatypes.Matrix`
         """
         nodex.utils.ensurePluginsLoaded(self._plugins)
-        n = pymel.core.createNode("inverseMatrix")
-        self.connect(n.attr("inputMatrix"))
+        n = self._matrixNode("inverseMatrix", "inputMatrix")
         return Nodex(n.attr("outputMatrix"))
 
     def transpose(self):
@@ -744,8 +805,7 @@ class Matrix(Array):
             :rtype: :class:`nodex.datatypes.Matrix`
         """
         nodex.utils.ensurePluginsLoaded(self._plugins)
-        n = pymel.core.createNode("transposeMatrix")
-        self.connect(n.attr("inputMatrix"))
+        n = self._matrixNode("transposeMatrix", "inputMatrix")
         return Nodex(n.attr("outputMatrix"))
 
     def hold(self):
@@ -755,14 +815,15 @@ class Matrix(Array):
 
             :rtype: :class:`nodex.datatypes.Matrix`
         """
-        n = pymel.core.createNode("holdMatrix")
-        self.connect(n.attr("inMatrix"))
+        n = self._matrixNode("holdMatrix", "inMatrix")
         return Nodex(n.attr("outMatrix"))
 
     def multiply(self, *args):
         """ Returns the Nodex for the sumMatrix attribute for this matrix multiplied with the other arguments
 
-            Uses the `multMatrix` node from the `matrixNodes` plug-in in Maya.
+            Uses the `multMatrix` node from the `matrixNodes` plug-in in Maya. Within `nodex.deferred()` chained
+            multiplications like ``a * b * c`` are built as a single node with all the matrices as inputs. Constant
+            matrices that are adjacent in the chain are multiplied beforehand.
 
             :type *args: :class:`nodex.datatypes.Matrix`
             :rtype: :class:`nodex.datatypes.Matrix`
@@ -778,11 +839,37 @@ class Matrix(Array):
                 raise TypeError("Provided arguments must be of type 'nodex.datatypes.Matrix', "
                                 "instead got {0}".format(x))
 
-        n = pymel.core.createNode("multMatrix")
-
-        self.connect(n.attr("matrixIn[0]"))
-        for i, other_input_arg in enumerate(args):
-            other_input_arg.connect(n.attr("matrixIn[{0}]".format(i+1)))
+        # Take over the matrices of pending multiplications and multiply the adjacent constants beforehand
+        matrices = []
+        for x in (self,) + args:
+            found = nodex.utils.expression(x, "multMatrix", ("matrixSum",))
+            if found is not None and found[0].isPending():
+                node, (_, inputs) = found
+                node.absorb()
+                matrices.extend(value for _, value in inputs)
+            elif x.isConstant() and matrices and matrices[-1].isConstant():
+                product = nodex.utils.matrixProduct([nodex.utils.constantValues(matrices[-1], 16),
+                                                     nodex.utils.constantValues(x, 16)])
+                matrices[-1] = Nodex(product)
+            else:
+                matrices.append(x)
+
+        # leave out the identity matrices
+        matrices = [x for x in matrices
+                    if not (x.isConstant() and nodex.utils.constantValues(x, 16) == _identityMatrix)]
+        if len(matrices) <= 1:
+            return matrices[0] if matrices else Nodex(_identityMatrix)
+
+        key = nodex.utils.nodeKey("multMatrix", inputs=enumerate(matrices))
+        n = nodex.utils.nodeCache.get(key)
+        if n is None:
+            n = nodex.graph.createNode("multMatrix")
+
+            for i, matrix in enumerate(matrices):
+                matrix.connect(n.attr("matrixIn[{0}]".format(i)))
+
+            n.setExpression((), enumerate(matrices))
+            nodex.utils.nodeCache.set(key, n)
 
         return Nodex(n.attr("matrixSum"))
 
@@ -796,6 +883,23 @@ class Matrix(Array):
         return self.multiply(other)
 
 
+# Register the built-in datatypes with the Nodex factory
+for _datatype in (Numerical, Boolean, Integer, Float, Array, Vector, Matrix):
+    registerDataType(_datatype)
+
+
+# region lowering, the recipes of the operations that can be built in more than one way (see `nodex.cost`)
+def _squareLengthPower(v):
+    v = v ^ [2.0, 2.0, 2.0]             # square all components
+    return Math.sum1D(v[0], v[1], v[2])  # sum all components
+
+
+nodex.cost.registerRecipe("squareLength", "power", ("multiplyDivide", "plusMinusAverage"), _squareLengthPower)
+nodex.cost.registerRecipe("squareLength", "dot", ("vectorProduct",), lambda v: v.dot(v))
+nodex.cost.registerRecipe("sign", "condition", ("condition",), lambda x: Math.greaterOrEqual(x, 0.0))
+# endregion
+
+
 # TODO: Implement quaternion
 # class Quaternion(Array):
 #     """
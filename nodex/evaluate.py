@@ -0,0 +1,568 @@
+"""
+    Headless evaluation of node networks with NumPy.
+
+    Within `record()` the node network of an expression is only recorded, like `nodex.graph.deferred()` does, but it's
+    never built. Instead `Recording.evaluate()` computes the values of a Nodex in Python for many samples at once,
+    eg. all frames of a shot, without Maya. The inputs of the expression are either placeholders created with
+    `Recording.input()` or attributes in the scene (when Maya is available), their values are passed in per sample.
+
+    Each node type is evaluated by the function registered with `registerNodeEvaluator()`. Those of the math nodes
+    use the operations of `nodex.utils` that constant folding uses, so the results match the nodes in Maya. Angles are
+    in degrees and distances in centimeters, like Maya's default UI units.
+
+    Example:
+        >>> with nodex.evaluate.record() as recording:
+        >>>     position = recording.input("driver.translate", 3)
+        >>>     result = Math.clamp(position.length(), 0.0, 5.0)
+        >>> recording.evaluate(result, {"driver.translate": numpy.random.rand(1000000, 3)})
+        array([ 0.87,  1.21, ...])
+
+    Requires NumPy, which is imported on first use.
+"""
+
+# standard library
+import contextlib
+
+# local library
+import nodex.graph
+import nodex.utils
+import nodex.datatypes
+from nodex.core import Nodex
+
+# The node type and output attribute of the placeholder of an input, by its dimensions
+_placeholders = {1: ("addDoubleLinear", "output"),
+                 2: ("plusMinusAverage", "output2D"),
+                 3: ("plusMinusAverage", "output3D"),
+                 16: ("holdMatrix", "outMatrix")}
+
+_evaluators = {}    # node type -> function that evaluates the outputs of a node, see `registerNodeEvaluator()`
+
+
+class Recording(nodex.graph.Graph):
+    """ A node network that is recorded to be evaluated instead of built, see `record()`. """
+    headless = True
+
+    def __init__(self):
+        super(Recording, self).__init__(pack=False)
+        self._inputs = {}       # placeholder node -> name
+
+    def input(self, name, dimensions=1):
+        """ Returns a Nodex that is a placeholder for an input of the expression, its values are passed to
+            `evaluate()` by name.
+
+            :param dimensions: 1 for a scalar, 2 or 3 for a vector or 16 for a matrix.
+            :rtype: nodex.core.Nodex
+        """
+        if dimensions not in _placeholders:
+            raise ValueError("Inputs of {0} dimensions are not supported, use one of: {1}".format(
+                             dimensions, sorted(_placeholders)))
+        nodeType, attr = _placeholders[dimensions]
+        node = nodex.graph.Node(nodeType, requestedName=name, graph=self)
+        self._inputs[node] = name
+        return Nodex(node.attr(attr))
+
+    def evaluate(self, x, inputs=None):
+        """ Returns the values of the Nodex for each sample of the inputs.
+
+            :param x: The Nodex, or a list of them.
+            :param inputs: The values of the inputs by name, the name of a `input()` or of a plug (eg.
+                           ``pSphere1.translate``). The values are a `numpy.ndarray` with a row per sample (or a single
+                           row that's used for all samples), matrices as 16 values or 4x4 per sample.
+            :return: A `numpy.ndarray` with a value per sample, a row of values for multiple dimensions and a 4x4
+                     matrix for a Matrix. A list of them for a list of Nodex.
+        """
+        evaluator = Evaluator(self, inputs or {})
+        if isinstance(x, (list, tuple)):
+            return [evaluator.evaluate(Nodex(value)) for value in x]
+        return evaluator.evaluate(Nodex(x))
+
+    def flush(self):
+        raise RuntimeError("The node network is recorded to be evaluated headless, it can't be built.")
+
+    def materialize(self, node):
+        raise RuntimeError("The node {0} is recorded to be evaluated headless, it can't be built.".format(node))
+
+
+@contextlib.contextmanager
+def record():
+    """ Record the node network of the expressions within the context to evaluate them instead of building them.
+
+        The node cache is disabled while recording so no recorded node is reused afterwards.
+
+        :rtype: Recording
+    """
+    if nodex.graph._active is not None:
+        raise RuntimeError("Can't record to evaluate while deferred or already recording.")
+
+    recording = nodex.graph._active = Recording()
+    cacheEnabled = nodex.utils.nodeCache.enabled
+    nodex.utils.nodeCache.enabled = False
+    try:
+        yield recording
+    finally:
+        nodex.graph._active = None
+        nodex.utils.nodeCache.enabled = cacheEnabled
+
+
+def registerNodeEvaluator(nodeType, function):
+    """ Register the function that evaluates the nodes of a type.
+
+        :param function: Called with a `NodeInputs` of the node, returns a dict of the values of its output
+                         attributes (as `numpy.ndarray` with a row per sample) by name.
+    """
+    _evaluators[nodeType] = function
+
+
+class NodeInputs(object):
+    """ Access to the values of the input attributes of a node being evaluated. """
+
+    def __init__(self, evaluator, node):
+        self._evaluator = evaluator
+        self._node = node
+
+    def get(self, attr, default):
+        """ Returns the values of the input attribute as array with a row per sample (or a single row).
+
+            :param default: The default value of the attribute, a number, a sequence of its children's values or
+                            16 values for a matrix.
+        """
+        return self._evaluator._input(self._node, attr, default)
+
+    def setting(self, attr, default):
+        """ Returns the constant value of an input that isn't evaluated per sample, like the operation. """
+        values = self._evaluator._setAttrs.get((self._node, attr))
+        return values[0] if values else default
+
+    def elements(self, attr):
+        """ Returns the values set on the elements of the array attribute by index, including those set at once
+            for a range of elements, eg. ``keyTimeValue[0:9]``.
+
+            :rtype: dict
+        """
+        prefix = attr + "["
+        result = {}
+        for name in self._evaluator._attributes.get(self._node, ()):
+            if not name.startswith(prefix) or not name.endswith("]"):
+                continue
+            first, _, last = name[len(prefix):-1].partition(":")
+            values = self._evaluator._setAttrs.get((self._node, name))
+            if values is None:
+                continue
+            first = int(first)
+            count = int(last) - first + 1 if last else 1
+            size = len(values) // count
+            for i in xrange(count):
+                result[first + i] = values[i * size:(i + 1) * size]
+        return result
+
+    def indices(self, attr):
+        """ Returns the indices of the elements of the array attribute that have a value or connection. """
+        prefix = attr + "["
+        attributes = self._evaluator._attributes.get(self._node, ())
+        return sorted(set(int(x[len(prefix):].split("]")[0]) for x in attributes if x.startswith(prefix)))
+
+
+class Evaluator(object):
+    """ Evaluates the recorded nodes of a `Recording` for the given inputs. """
+
+    def __init__(self, recording, inputs):
+        import numpy
+        self._numpy = numpy
+        self._recording = recording
+        self._recorded = set(recording._nodes)
+        self._setAttrs = {}         # plug key -> values, the last set wins
+        self._sources = {}          # destination plug key -> source plug
+        self._attributes = {}       # node -> the attributes with a value or connection
+        self._dependencies = {}     # node -> the recorded nodes connected to it
+        self._outputs = {}          # node -> evaluated outputs by attribute
+
+        for plug, values, _ in recording._setAttrs:
+            self._setAttrs[plug.key()] = values
+            self._attributes.setdefault(plug.handle(), set()).add(plug.attrName())
+        for source, destination, _ in recording._connections:
+            self._sources[destination.key()] = source
+            self._attributes.setdefault(destination.handle(), set()).add(destination.attrName())
+            if source.handle() in self._recorded:
+                self._dependencies.setdefault(destination.handle(), set()).add(source.handle())
+
+        self._inputs = {}
+        samples = set()
+        for name, value in inputs.iteritems():
+            value = numpy.asarray(value, dtype=float)
+            if value.ndim == 0:
+                value = value.reshape(1, 1)
+            elif value.ndim == 1:
+                value = value.reshape(-1, 1)
+            self._inputs[name] = value
+            samples.add(len(value))
+        samples.discard(1)
+        if len(samples) > 1:
+            raise ValueError("All inputs must have the same number of samples (or one), got: {0}".format(
+                             sorted(samples)))
+        self.samples = samples.pop() if samples else 1
+
+    def evaluate(self, x):
+        """ Returns the values of the Nodex for each sample, see `Recording.evaluate()`.
+
+            :rtype: numpy.ndarray
+        """
+        numpy = self._numpy
+        if x.isSingleAttribute():
+            result = self._value(x.plug())
+        elif x.isConstant():
+            result = numpy.array([nodex.utils.constantValues(x, x.dimensions())])
+        else:
+            columns = [self._value(element.plug()) if element.isSingleAttribute() else
+                       numpy.array([nodex.utils.constantValues(element, 1)]) for element in x]
+            result = numpy.concatenate(numpy.broadcast_arrays(*columns), axis=1)
+
+        result = numpy.array(numpy.broadcast_to(result, (self.samples,) + result.shape[1:]))
+        if isinstance(x, nodex.datatypes.Matrix):
+            return result.reshape(-1, 4, 4)
+        if result.ndim == 2 and result.shape[1] == 1:
+            return result[:, 0]
+        return result
+
+    # region plugs
+    def _value(self, plug):
+        """ Returns the values of a plug as array with a row per sample (or a single row), a matrix as 4x4. """
+        node = plug.handle()
+        if node in self._recorded:
+            outputs = self._evaluateNode(node)
+            if plug.attrName() in outputs:
+                return outputs[plug.attrName()]
+            parent, index = self._component(plug)
+            if parent in outputs:
+                return outputs[parent][:, index:index + 1]
+            return self._input(node, plug.attrName(), 0.0)
+
+        name = self._recording._inputs.get(node)
+        if name is not None:
+            value = self._given(name)
+            parent, index = self._component(plug)
+        else:
+            name = str(plug)
+            parent, index = (None, None) if name in self._inputs else self._component(plug)
+            value = self._given(name if parent is None else "{0}.{1}".format(plug.nodeName(), parent))
+
+        if index is not None:
+            return value[:, index:index + 1]
+        if plug.info().isMatrix:
+            return value.reshape(-1, 4, 4)
+        return value
+
+    def _given(self, name):
+        """ Returns the values passed in for the input by name. """
+        value = self._inputs.get(name)
+        if value is None:
+            raise KeyError("No values are given for the input '{0}'.".format(name))
+        return value
+
+    @staticmethod
+    def _component(plug):
+        """ Returns the (parent attribute, index) of a child of a compound attribute, else (None, None). """
+        parent, _, child = plug.attrName().rpartition(".")
+        if not parent:
+            return None, None
+        info = nodex.utils.plugInfo(plug.nodeAttr(parent))
+        if child not in info.children:
+            return None, None
+        return parent, info.children.index(child)
+
+    def _input(self, node, attr, default):
+        """ Returns the values of an input attribute of a recorded node; from its connection, value or default. """
+        numpy = self._numpy
+        source = self._sources.get((node, attr))
+        if source is not None:
+            return self._value(source)
+
+        values = self._setAttrs.get((node, attr))
+        info = nodex.utils.plugInfo(nodex.utils.Plug(node, attr, nodeType=node.nodeType()))
+        if info.isMatrix:
+            return numpy.array(values[0] if values else default, dtype=float).reshape(1, 4, 4)
+
+        if info.isCompound:
+            if not hasattr(default, '__iter__'):
+                default = (default,) * len(info.children)
+            columns = []
+            for i, child in enumerate(info.children):
+                childAttr = "{0}.{1}".format(attr, child)
+                if (node, childAttr) in self._sources or (node, childAttr) in self._setAttrs:
+                    columns.append(self._input(node, childAttr, default[i]))
+                else:
+                    columns.append(numpy.array([[float(values[i]) if values else default[i]]]))
+            return numpy.concatenate(numpy.broadcast_arrays(*columns), axis=1)
+
+        return numpy.array([[float(values[0]) if values else default]])
+    # endregion
+
+    def _evaluateNode(self, node):
+        """ Returns the outputs of the recorded node by attribute, evaluating the nodes it depends on first. """
+        outputs = self._outputs.get(node)
+        if outputs is not None:
+            return outputs
+
+        # Evaluate the nodes it depends on in order, without recursing as deep as the network
+        stack = [(node, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if current in self._outputs:
+                continue
+            if expanded:
+                function = _evaluators.get(current.nodeType())
+                if function is None:
+                    raise NotImplementedError("Nodes of type {0} can't be evaluated headless.".format(
+                                              current.nodeType()))
+                with self._numpy.errstate(all="ignore"):
+                    self._outputs[current] = function(NodeInputs(self, current))
+            else:
+                stack.append((current, True))
+                stack.extend((x, False) for x in self._dependencies.get(current, ()) if x not in self._outputs)
+        return self._outputs[node]
+
+
+_identity = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+
+# region node evaluators
+def _numpy():
+    import numpy
+    return numpy
+
+
+def _plusMinusAverage(inputs):
+    operation = nodex.utils.plusMinusAverageOperations[int(inputs.setting("operation", 1))]
+    outputs = {}
+    for d, outputAttr in ((1, "output1D"), (2, "output2D"), (3, "output3D")):
+        inputAttr = "input{0}D".format(d)
+        values = [inputs.get("{0}[{1}]".format(inputAttr, i), 0.0) for i in inputs.indices(inputAttr)]
+        outputs[outputAttr] = operation(values) if values else _numpy().zeros((1, d))
+    return outputs
+
+
+def _multiplyDivide(inputs):
+    operation = nodex.utils.multiplyDivideOperations[int(inputs.setting("operation", 1))]
+    return {"output": operation(inputs.get("input1", 0.0), inputs.get("input2", 1.0))}
+
+
+def _condition(inputs):
+    operation = nodex.utils.conditionOperations[int(inputs.setting("operation", 0))]
+    chosen = operation(inputs.get("firstTerm", 0.0), inputs.get("secondTerm", 0.0))
+    return {"outColor": _numpy().where(chosen, inputs.get("colorIfTrue", 0.0), inputs.get("colorIfFalse", 1.0))}
+
+
+def _clamp(inputs):
+    numpy = _numpy()
+    value, minimum, maximum = inputs.get("input", 0.0), inputs.get("min", 0.0), inputs.get("max", 0.0)
+    return {"output": numpy.where(value < minimum, minimum, numpy.where(value > maximum, maximum, value))}
+
+
+def _blendColors(inputs):
+    blender = inputs.get("blender", 0.5)
+    color1, color2 = inputs.get("color1", (1.0, 0.0, 0.0)), inputs.get("color2", (0.0, 0.0, 1.0))
+    return {"output": color1 * blender + color2 * (1.0 - blender)}
+
+
+def _doubleLinear(nodeType):
+    operation = nodex.utils.doubleLinearOperations[nodeType]
+    return lambda inputs: {"output": operation(inputs.get("input1", 0.0), inputs.get("input2", 0.0))}
+
+
+def _length(vectors):
+    return _numpy().sqrt((vectors * vectors).sum(axis=1, keepdims=True))
+
+
+def _normalize(vectors):
+    """ Returns the vectors with a length of one, like `nodex.utils._normalize` a zero vector stays zero. """
+    length = _length(vectors)
+    return vectors / _numpy().where(length > 0.0, length, 1.0)
+
+
+def _transformPoints(points, matrices):
+    """ Returns the points (rows) multiplied by the matrices, like Maya's ``point * matrix``. """
+    return _numpy().einsum("ni,nij->nj", points, matrices[:, :3, :3]) + matrices[:, 3, :3]
+
+
+def _broadcastPointsMatrices(points, matrices):
+    samples = max(len(points), len(matrices))
+    numpy = _numpy()
+    return numpy.broadcast_to(points, (samples, 3)), numpy.broadcast_to(matrices, (samples, 4, 4))
+
+
+def _distanceBetween(inputs):
+    points = [_transformPoints(*_broadcastPointsMatrices(inputs.get(point, 0.0), inputs.get(matrix, _identity)))
+              for point, matrix in (("point1", "inMatrix1"), ("point2", "inMatrix2"))]
+    return {"distance": _length(points[0] - points[1])}
+
+
+def _vectorProduct(inputs):
+    """ Like `nodex.utils.vectorProductValue()` for many samples. """
+    numpy = _numpy()
+    operation = int(inputs.setting("operation", 1))
+    input1, input2 = inputs.get("input1", 0.0), inputs.get("input2", 0.0)
+    normalize = inputs.get("normalizeOutput", 0.0) > 0.5
+    if operation == 0:
+        output = input1
+    elif operation == 1:
+        input1 = numpy.where(normalize, _normalize(input1), input1)
+        input2 = numpy.where(normalize, _normalize(input2), input2)
+        dot = (input1 * input2).sum(axis=1, keepdims=True)
+        return {"output": numpy.concatenate([dot, dot, dot], axis=1)}
+    elif operation == 2:
+        output = numpy.cross(*numpy.broadcast_arrays(input1, input2))
+    elif operation in (3, 4):
+        points, matrices = _broadcastPointsMatrices(input1, inputs.get("matrix", _identity))
+        output = numpy.einsum("ni,nij->nj", points, matrices[:, :3, :3])
+        if operation == 4:  # points are translated
+            output = output + matrices[:, 3, :3]
+    else:
+        raise ValueError("Unknown vectorProduct operation: {0}".format(operation))
+    return {"output": numpy.where(normalize, _normalize(output), output)}
+
+
+def _rotation(angles):
+    """ Returns the rotation matrices (3x3, for row vectors) of the euler angles in degrees with rotate order xyz. """
+    numpy = _numpy()
+    x, y, z = numpy.radians(angles).T
+    cx, sx, cy, sy, cz, sz = numpy.cos(x), numpy.sin(x), numpy.cos(y), numpy.sin(y), numpy.cos(z), numpy.sin(z)
+    # Rx * Ry * Rz
+    return numpy.stack([numpy.stack([cy * cz, cy * sz, -sy], axis=-1),
+                        numpy.stack([sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy], axis=-1),
+                        numpy.stack([cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy], axis=-1)], axis=1)
+
+
+def _euler(rotations):
+    """ Returns the euler angles in degrees with rotate order xyz of the rotation matrices. """
+    numpy = _numpy()
+    sy = numpy.clip(-rotations[:, 0, 2], -1.0, 1.0)
+    gimbal = numpy.abs(sy) > 1.0 - 1e-12
+    x = numpy.where(gimbal, numpy.arctan2(-rotations[:, 2, 1], rotations[:, 1, 1]),
+                    numpy.arctan2(rotations[:, 1, 2], rotations[:, 2, 2]))
+    z = numpy.where(gimbal, 0.0, numpy.arctan2(rotations[:, 0, 1], rotations[:, 0, 0]))
+    return numpy.degrees(numpy.stack([x, numpy.arcsin(sy), z], axis=-1))
+
+
+def _quaternion(rotations):
+    """ Returns the quaternions (x, y, z, w) of the rotation matrices. """
+    numpy = _numpy()
+    m = rotations.transpose(0, 2, 1)     # for column vectors
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    candidates = []
+    for s, quaternion in (
+            (numpy.sqrt(numpy.maximum(1.0 + trace, 1e-12)) * 2.0,
+             lambda s: (m[:, 2, 1] - m[:, 1, 2], m[:, 0, 2] - m[:, 2, 0], m[:, 1, 0] - m[:, 0, 1], s * s / 4.0)),
+            (numpy.sqrt(numpy.maximum(1.0 + m[:, 0, 0] - m[:, 1, 1] - m[:, 2, 2], 1e-12)) * 2.0,
+             lambda s: (s * s / 4.0, m[:, 0, 1] + m[:, 1, 0], m[:, 0, 2] + m[:, 2, 0], m[:, 2, 1] - m[:, 1, 2])),
+            (numpy.sqrt(numpy.maximum(1.0 - m[:, 0, 0] + m[:, 1, 1] - m[:, 2, 2], 1e-12)) * 2.0,
+             lambda s: (m[:, 0, 1] + m[:, 1, 0], s * s / 4.0, m[:, 1, 2] + m[:, 2, 1], m[:, 0, 2] - m[:, 2, 0])),
+            (numpy.sqrt(numpy.maximum(1.0 - m[:, 0, 0] - m[:, 1, 1] + m[:, 2, 2], 1e-12)) * 2.0,
+             lambda s: (m[:, 0, 2] + m[:, 2, 0], m[:, 1, 2] + m[:, 2, 1], s * s / 4.0, m[:, 1, 0] - m[:, 0, 1]))):
+        candidates.append(numpy.stack(quaternion(s), axis=-1) / s[:, None])
+    case = numpy.argmax(numpy.stack([trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]], axis=-1), axis=-1)
+    return numpy.stack(candidates, axis=1)[numpy.arange(len(m)), case]
+
+
+def _composeMatrix(inputs):
+    numpy = _numpy()
+    translate, rotate = inputs.get("inputTranslate", 0.0), inputs.get("inputRotate", 0.0)
+    scale, shear = inputs.get("inputScale", 1.0), inputs.get("inputShear", 0.0)
+    translate, rotate, scale, shear = numpy.broadcast_arrays(translate, rotate, scale, shear)
+
+    # scale * shear * rotate * translate, for row vectors
+    zero, one = numpy.zeros(len(shear)), numpy.ones(len(shear))
+    scaleShear = numpy.stack([numpy.stack([one, zero, zero], axis=-1),
+                              numpy.stack([shear[:, 0], one, zero], axis=-1),
+                              numpy.stack([shear[:, 1], shear[:, 2], one], axis=-1)], axis=1) * scale[:, :, None]
+    result = numpy.zeros((len(shear), 4, 4))
+    result[:, :3, :3] = numpy.matmul(scaleShear, _rotation(rotate))
+    result[:, 3, :3] = translate
+    result[:, 3, 3] = 1.0
+    return {"outputMatrix": result}
+
+
+def _decomposeMatrix(inputs):
+    """ The inverse of `_composeMatrix()`, a mirroring matrix results in negative scales. """
+    numpy = _numpy()
+    matrices = inputs.get("inputMatrix", _identity)
+    rows = matrices[:, :3, :3]
+    scale = numpy.where(numpy.linalg.det(rows) < 0.0, -1.0, 1.0)[:, None]
+
+    x = rows[:, 0]
+    scaleX = _length(x) * scale
+    x = x / numpy.where(scaleX != 0.0, scaleX, 1.0)
+    shearXY = (rows[:, 1] * x).sum(axis=1, keepdims=True)
+    y = rows[:, 1] - shearXY * x
+    scaleY = _length(y) * scale
+    y = y / numpy.where(scaleY != 0.0, scaleY, 1.0)
+    shearXZ, shearYZ = (rows[:, 2] * x).sum(axis=1, keepdims=True), (rows[:, 2] * y).sum(axis=1, keepdims=True)
+    z = rows[:, 2] - shearXZ * x - shearYZ * y
+    scaleZ = _length(z) * scale
+    z = z / numpy.where(scaleZ != 0.0, scaleZ, 1.0)
+
+    rotations = numpy.stack([x, y, z], axis=1)
+    safe = lambda s: numpy.where(s != 0.0, s, 1.0)
+    return {"outputTranslate": matrices[:, 3, :3],
+            "outputRotate": _euler(rotations),
+            "outputScale": numpy.concatenate([scaleX, scaleY, scaleZ], axis=1),
+            "outputShear": numpy.concatenate([shearXY / safe(scaleY), shearXZ / safe(scaleZ),
+                                              shearYZ / safe(scaleZ)], axis=1),
+            "outputQuat": _quaternion(rotations)}
+
+
+def _angleBetween(inputs):
+    numpy = _numpy()
+    vector1, vector2 = numpy.broadcast_arrays(inputs.get("vector1", (1.0, 0.0, 0.0)),
+                                              inputs.get("vector2", (1.0, 0.0, 0.0)))
+    cross = numpy.cross(vector1, vector2)
+    angle = numpy.arctan2(_length(cross), (vector1 * vector2).sum(axis=1, keepdims=True))
+    axis = _normalize(cross)
+
+    # the rotation of the angle around the axis (Rodrigues' formula), transposed for row vectors
+    c, s = numpy.cos(angle)[:, :, None], numpy.sin(angle)[:, :, None]
+    skew = numpy.zeros((len(axis), 3, 3))
+    skew[:, 0, 1], skew[:, 0, 2], skew[:, 1, 2] = axis[:, 2], -axis[:, 1], axis[:, 0]
+    skew -= skew.transpose(0, 2, 1)
+    rotations = c * numpy.eye(3) + s * skew + (1.0 - c) * axis[:, :, None] * axis[:, None, :]
+    return {"angle": numpy.degrees(angle),
+            "axisAngle.axis": axis,
+            "euler": _euler(rotations)}
+
+
+def _multMatrix(inputs):
+    numpy = _numpy()
+    result = numpy.eye(4)[None]
+    for i in inputs.indices("matrixIn"):
+        result = numpy.matmul(result, inputs.get("matrixIn[{0}]".format(i), _identity))
+    return {"matrixSum": result}
+
+
+def _animCurveUU(inputs):
+    """ Evaluates a curve with linear keys, like the lookup tables of `nodex.utils.lookupTable()`. """
+    keys = inputs.elements("keyTimeValue")
+    indices = sorted(keys)
+    return {"output": _numpy().interp(inputs.get("input", 0.0), [keys[i][0] for i in indices],
+                                      [keys[i][1] for i in indices])}
+
+
+for _nodeType, _function in (
+        ("plusMinusAverage", _plusMinusAverage),
+        ("animCurveUU", _animCurveUU),
+        ("multiplyDivide", _multiplyDivide),
+        ("condition", _condition),
+        ("clamp", _clamp),
+        ("blendColors", _blendColors),
+        ("addDoubleLinear", _doubleLinear("addDoubleLinear")),
+        ("multDoubleLinear", _doubleLinear("multDoubleLinear")),
+        ("distanceBetween", _distanceBetween),
+        ("vectorProduct", _vectorProduct),
+        ("angleBetween", _angleBetween),
+        ("composeMatrix", _composeMatrix),
+        ("decomposeMatrix", _decomposeMatrix),
+        ("inverseMatrix", lambda inputs: {"outputMatrix": _numpy().linalg.inv(inputs.get("inputMatrix", _identity))}),
+        ("transposeMatrix", lambda inputs: {"outputMatrix": inputs.get("inputMatrix", _identity).transpose(0, 2, 1)}),
+        ("holdMatrix", lambda inputs: {"outMatrix": inputs.get("inMatrix", _identity)}),
+        ("passMatrix", lambda inputs: {"outMatrix": inputs.get("inMatrix", _identity) *
+                                                    inputs.get("inScale", 1.0)[:, :, None]}),
+        ("multMatrix", _multMatrix)):
+    registerNodeEvaluator(_nodeType, _function)
+# endregion
@@ -0,0 +1,427 @@
+"""
+    Deferred building of node networks.
+
+    Usually every operation on a Nodex directly creates its node, sets its values and makes its connections one at a
+    time. Within `deferred()` these are only recorded in a `Graph` and the whole network is materialized at once when
+    leaving the context; first all nodes are created, then all values are set, then all connections are made and
+    finally the attributes are locked.
+
+    The resulting Nodex behave the same while deferred (slicing, `dimensions()`, `connect()`) since the node helpers
+    only use the metadata of their node type's attributes (see `nodex.utils.registerNodeSchema()`). Anything that
+    needs the node to exist in the scene, like getting its name or a value, materializes what was recorded up to then.
+
+    Nodes can be absorbed by the node that rewrote their computation, eg. ``(a + b) + c`` is built as a single sum of
+    ``a, b, c``. An absorbed node that nothing is connected from isn't created, unless it's requested later on.
+
+    With ``deferred(pack=True)`` independent scalar operations share the channels of a node, see `nodex.packing`.
+
+    Example:
+        >>> with nodex.deferred():
+        >>>     result = Nodex("pSphere1.translate") * 2.0 + (0, 1, 0)
+        >>>     result.connect("pSphere2.translate")
+"""
+
+# standard library
+import contextlib
+import logging
+logger = logging.getLogger(__name__)
+
+# local library
+import nodex.backend
+import nodex.utils
+import nodex.packing
+
+_active = None          # the Graph that is recording, if any
+_statistics = []        # the statistics that count what is emitted, see `nodex.session`
+_created = set()        # the names of the nodes created in the current scene, see `createdNodes()`
+
+
+class Node(object):
+    """ Reference to a node created by nodex.
+
+        While the node is still recorded in a deferred `Graph` (pending) it only knows its type and requested name.
+        Requesting its name materializes the graph.
+    """
+    __slots__ = ('_nodeType', '_requestedName', '_name', '_graph', '_expression', '_absorbed', '_packable', '_channel')
+
+    def __init__(self, nodeType, name=None, requestedName=None, graph=None):
+        self._nodeType = nodeType
+        self._requestedName = requestedName
+        self._name = name
+        self._graph = graph
+        self._expression = None
+        self._absorbed = False
+        self._packable = False
+        self._channel = None
+
+    def name(self):
+        """ Returns the name of the node, creating it (and everything recorded before it) if still pending. """
+        if self._channel is not None and self._channel[0] is not self:
+            return self._channel[0].name()
+        if self._name is None:
+            if self._graph is None:
+                raise RuntimeError("The deferred node {0} was discarded and never created.".format(self))
+            self._graph.materialize(self)
+        return self._name
+
+    def nodeType(self):
+        return self._nodeType
+
+    def isPending(self):
+        if self._channel is not None and self._channel[0] is not self:
+            return self._channel[0].isPending()
+        return self._name is None
+
+    def plugName(self, attr):
+        """ Returns the name of the plug for the attribute, on the channel of the shared node if it was packed. """
+        if self._channel is not None:
+            host, channel = self._channel
+            return nodex.packing.plugName(host.name(), self._nodeType, attr, channel)
+        return "{0}.{1}".format(self.name(), attr)
+
+    def expression(self):
+        """ Returns the (settings, inputs) of the computation this node was created for, if registered.
+
+            :rtype: tuple or None
+        """
+        return self._expression
+
+    def setExpression(self, settings, inputs):
+        """ Registers the computation the node was created for so a next operation can rewrite it.
+
+            :param settings: The static settings, eg. the operation.
+            :param inputs: Sequence of (attribute name, Nodex) for the inputs.
+        """
+        self._expression = (settings, tuple(inputs))
+
+    def absorb(self, absorbed=True):
+        """ Marks that the computation of this node was taken over by another node.
+
+            If still pending and nothing gets connected from it, it won't be created when the graph is materialized.
+            With `absorbed` False the node is marked as used again, eg. when it's reused for an identical computation.
+        """
+        self._absorbed = absorbed
+
+    def setPackable(self):
+        """ Marks that only the first channel (X or R) of this node is used by its operation, so it can share the node
+            with other operations when packing (see `nodex.packing`).
+        """
+        self._packable = True
+
+    def isPackable(self):
+        return self._packable
+
+    def setChannel(self, host, channel):
+        """ Packs the operation of this node into the channel of the host node, which is created instead.
+
+            The host itself uses the first channel, the attributes of its operation are mapped to that channel.
+        """
+        self._channel = (host, channel)
+        if host is not self:
+            self._graph = None
+
+    def isDiscarded(self):
+        """ Returns True if the node was pending and got discarded, so it will never be created. """
+        if self._channel is not None and self._channel[0] is not self:
+            return self._channel[0].isDiscarded()
+        return self._name is None and self._graph is None
+
+    def exists(self):
+        """ Returns True if the node exists in the scene or is still pending to be created. """
+        if self._channel is not None and self._channel[0] is not self:
+            return self._channel[0].exists()
+        if self._name is None:
+            return self._graph is not None
+        return nodex.backend.current().objExists(self._name)
+
+    def attr(self, attr):
+        """ Returns the plug for the attribute on this node.
+
+            :rtype: nodex.utils.Plug
+        """
+        return nodex.utils.Plug(self, attr, nodeType=self._nodeType)
+
+    def __str__(self):
+        if self._channel is not None and self._channel[0] is not self:
+            return "{0}[{1}]".format(self._channel[0], self._channel[1])
+        if self._name is None:
+            return "<pending {0}>".format(self._requestedName or self._nodeType)
+        return self._name
+
+    def __repr__(self):
+        return "Node('{0}')".format(self)
+
+
+class Graph(object):
+    """ Records the nodes, values, connections and locks of a node network to materialize them in batches.
+
+        :param pack: If True independent scalar operations share nodes when materialized, see `nodex.packing`.
+    """
+    headless = False    # True if recorded to be evaluated instead of built, see `nodex.evaluate`
+
+    def __init__(self, pack=False):
+        self.pack = pack
+        self._nodes = []
+        self._setAttrs = []
+        self._connections = []
+        self._locks = []
+        self._held = {}         # absorbed node -> (setAttrs, connections, locks) to create it on request
+
+    def createNode(self, nodeType, name=None):
+        """ :rtype: Node """
+        node = Node(nodeType, requestedName=name, graph=self)
+        self._nodes.append(node)
+        return node
+
+    def setAttr(self, plug, values, attrType=None):
+        self._setAttrs.append((plug, values, attrType))
+
+    def connectAttr(self, source, destination, force=False):
+        self._connections.append((source, destination, force))
+
+    def connectAttrs(self, connections, force=False):
+        self._connections.extend((source, destination, force) for source, destination in connections)
+
+    def lockAttr(self, plug):
+        self._locks.append(plug)
+
+    def isEmpty(self):
+        return not (self._nodes or self._setAttrs or self._connections or self._locks)
+
+    def flush(self):
+        """ Materializes everything recorded so far; nodes, then values, then connections and lastly the locks.
+
+            The absorbed nodes that nothing is connected from are held back, see `materialize()`.
+        """
+        nodes, setAttrs, connections, locks = self._nodes, self._setAttrs, self._connections, self._locks
+        self._nodes, self._setAttrs, self._connections, self._locks = [], [], [], []
+
+        skipped = self._unused(nodes, connections)
+        if skipped:
+            for node in skipped:
+                self._held[node] = ([], [], [])
+            setAttrs = self._hold(setAttrs, lambda x: x[0].handle(), 0)
+            connections = self._hold(connections, lambda x: x[1].handle(), 1)
+            locks = self._hold(locks, lambda x: x.handle(), 2)
+            nodes = [node for node in nodes if node not in skipped]
+
+        if self.pack:
+            nodes, setAttrs, connections, locks = nodex.packing.pack(nodes, setAttrs, connections, locks)
+
+        for node in nodes:
+            node._name = _createNodeNow(node._nodeType, node._requestedName)
+            node._graph = None
+        for plug, values, attrType in setAttrs:
+            _setAttrNow(plug, values, attrType)
+        for source, destination, force in connections:
+            _connectAttrNow(source, destination, force)
+        for plug in locks:
+            _lockAttrNow(plug)
+
+        logger.debug("Materialized {0} nodes, {1} values, {2} connections and {3} locks. "
+                     "Held back {4} absorbed nodes.".format(len(nodes), len(setAttrs), len(connections), len(locks),
+                                                           len(skipped)))
+
+    @staticmethod
+    def _unused(nodes, connections):
+        """ Returns the absorbed nodes that no created node (or existing attribute) is connected from. """
+        unused = set(node for node in nodes if node._absorbed)
+        if not unused:
+            return unused
+
+        # A node is used when it's connected to a node that is used, so walk up the inputs of the used nodes
+        inputs = {}
+        used = []
+        for source, destination, _ in connections:
+            sourceNode = source.handle()
+            if sourceNode in unused:
+                destinationNode = destination.handle()
+                if destinationNode in unused:
+                    inputs.setdefault(destinationNode, []).append(sourceNode)
+                else:
+                    used.append(sourceNode)
+        while used:
+            node = used.pop()
+            if node in unused:
+                unused.remove(node)
+                used.extend(inputs.get(node, ()))
+        return unused
+
+    def _hold(self, operations, getNode, index):
+        """ Moves the operations on held nodes from `operations` to the held operations for that node. """
+        result = []
+        for operation in operations:
+            held = self._held.get(getNode(operation))
+            if held is None:
+                result.append(operation)
+            else:
+                held[index].append(operation)
+        return result
+
+    def materialize(self, node):
+        """ Creates the node, for a pending node by flushing the graph. """
+        if node not in self._held:
+            self.flush()
+            if node not in self._held:
+                return
+
+        # An absorbed node that was held back is created on request (and the held nodes it's connected from)
+        setAttrs, connections, locks = self._held.pop(node)
+        node._name = _createNodeNow(node._nodeType, node._requestedName)
+        node._graph = None
+        for plug, values, attrType in setAttrs:
+            _setAttrNow(plug, values, attrType)
+        for source, destination, force in connections:
+            _connectAttrNow(source, destination, force)
+        for plug in locks:
+            _lockAttrNow(plug)
+
+    def discard(self):
+        """ Forgets everything recorded so far, the pending and held nodes will never be created. """
+        for node in self._nodes + list(self._held):
+            node._graph = None
+        self._nodes, self._setAttrs, self._connections, self._locks = [], [], [], []
+        self._held = {}
+
+
+@contextlib.contextmanager
+def deferred(pack=False):
+    """ Defer building the node network until leaving the context.
+
+        Nested use records into the outermost graph. If an error is raised within the context the recorded network
+        is discarded, only the parts that got materialized before (eg. by requesting a node name) remain. Identical
+        computations within the context share their nodes, see `nodex.utils.reuseNodes()`.
+
+        :param pack: If True independent scalar operations share nodes, see `nodex.packing`.
+        :rtype: Graph
+    """
+    global _active
+    if _active is not None:
+        yield _active
+        return
+
+    graph = _active = Graph(pack=pack)
+    with nodex.utils.reuseNodes():
+        try:
+            yield graph
+        except:
+            graph.discard()
+            raise
+        finally:
+            _active = None
+        graph.flush()
+
+
+def isDeferred():
+    """ Returns True when the node network is being recorded by `deferred()` instead of built directly. """
+    return _active is not None
+
+
+def isHeadless():
+    """ Returns True if the network is recorded to be evaluated without Maya, see `nodex.evaluate.record()` """
+    return _active is not None and _active.headless
+
+
+# region funnel; record when deferred, else emit directly with the current backend (see `nodex.backend`)
+def createNode(nodeType, name=None):
+    """ Creates a node, or records it to be created when deferred.
+
+        :rtype: Node
+    """
+    if _active is not None:
+        return _active.createNode(nodeType, name=name)
+    return Node(nodeType, name=_createNodeNow(nodeType, name))
+
+
+def setAttr(plug, values, attrType=None):
+    """ Sets the values on the plug, or records it to be set when deferred.
+
+        :param values: The positional values as passed to `maya.cmds.setAttr`
+        :type values: tuple
+    """
+    if _active is not None:
+        _active.setAttr(plug, values, attrType)
+    else:
+        _setAttrNow(plug, values, attrType)
+
+
+def connectAttr(source, destination, force=False):
+    if _active is not None:
+        _active.connectAttr(source, destination, force=force)
+    else:
+        _connectAttrNow(source, destination, force)
+
+
+def connectAttrs(connections, force=False):
+    """ Makes the (source, destination) connections in one batch, or records them when deferred. """
+    if _active is not None:
+        _active.connectAttrs(connections, force=force)
+    else:
+        for source, destination in connections:
+            _connectAttrNow(source, destination, force)
+
+
+def lockAttr(plug):
+    if _active is not None:
+        _active.lockAttr(plug)
+    else:
+        _lockAttrNow(plug)
+
+
+def addAttr(node, longName, dataType):
+    """ Adds a dynamic attribute to the node with the current backend. This isn't recorded, a pending node is created
+        first.
+
+        :type node: Node
+    """
+    nodex.backend.current().addAttr(node.name(), longName, dataType)
+
+
+def createdNodes():
+    """ Returns the names of the nodes that nodex created in the current scene. They're forgotten when a new scene is
+        created or opened, so the nodes of a scene built in an earlier session aren't included.
+
+        :rtype: set
+    """
+    return _created
+
+
+def forgetCreatedNodes(*args):
+    """ Clears the names of the created nodes, eg. when the scene changes. """
+    _created.clear()
+
+
+def _count(key):
+    for statistics in _statistics:
+        statistics[key] += 1
+
+
+def _createNodeNow(nodeType, name=None):
+    if _statistics:
+        _count("nodes")
+    if not nodex.utils._sceneCallbacks:
+        nodex.utils._installSceneCallbacks()    # forget the created nodes when the scene changes
+    name = nodex.backend.current().createNode(nodeType, name=name)
+    _created.add(name)
+    return name
+
+
+def _setAttrNow(plug, values, attrType=None):
+    if _statistics:
+        _count("setAttrs")
+    if nodex.utils._arraySizes:
+        nodex.utils.invalidateArraySizes()    # might add an element to an array attribute
+    nodex.backend.current().setAttr(plug.name(), values, attrType=attrType)
+
+
+def _connectAttrNow(source, destination, force=False):
+    if _statistics:
+        _count("connections")
+    if nodex.utils._arraySizes:
+        nodex.utils.invalidateArraySizes()
+    nodex.backend.current().connectAttr(source.name(), destination.name(), force=force)
+
+
+def _lockAttrNow(plug):
+    nodex.backend.current().lockAttr(plug.name())
+# endregion
@@ -0,0 +1,207 @@
+"""
+    Opt-in instrumentation of where a build spends its time.
+
+    Within `profile()` the Nodex creations, datatype checks, created nodes (by node type), connections, values and
+    plug-in checks are counted and timed. Each is attributed to the outermost `nodex.core.Math` or datatype method that
+    caused it, eg. ``Vector.normal`` or ``Numerical.__mul__``. Anything done outside of those methods is attributed to
+    `TOPLEVEL`.
+
+    The instrumentation wraps those functions when entering the context and restores them when leaving it, so the
+    hot paths are untouched when not profiling.
+
+    Example:
+        >>> with nodex.profile() as report:
+        >>>     Nodex("pSphere1.translate").normal()
+        >>> print report["Vector.normal"]["createNode.vectorProduct"]
+        {'count': 1, 'seconds': 0.0004}
+        >>> report.dump("build.json")
+"""
+
+# standard library
+import contextlib
+import functools
+import json
+import timeit
+import types
+
+# local library
+import nodex.core
+import nodex.datatypes
+import nodex.graph
+import nodex.utils
+
+TOPLEVEL = "<toplevel>"
+CALL = "call"
+
+# The methods that only query the data, these are not attributed to
+_queries = frozenset(["__new__", "__init__", "__str__", "__repr__", "__len__", "__iter__", "__getitem__",
+                      "isValidData", "priority", "default", "convertData", "setReference", "refresh", "value",
+                      "dimensions", "validateAttr", "isConstant", "isAttribute", "isSingleAttribute",
+                      "isSingleNumeric", "attr", "plug", "node", "plainValue"])
+
+_timer = timeit.default_timer
+_active = None      # the Report that is recorded into, if any
+
+
+class Report(dict):
+    """ The count and seconds of each event by the method it's attributed to, eg. ``report[method][event]``.
+
+        Besides the events each method has a `CALL` entry with its own calls and (inclusive) time, also when it was
+        called by another method.
+    """
+
+    def add(self, owner, event, seconds, count=1):
+        entry = self.setdefault(owner, {}).setdefault(event, {"count": 0, "seconds": 0.0})
+        entry["count"] += count
+        entry["seconds"] += seconds
+
+    def totals(self):
+        """ Returns the count and seconds of each event summed over all methods, without the calls.
+
+            :rtype: dict
+        """
+        result = {}
+        for events in self.itervalues():
+            for event, entry in events.iteritems():
+                if event == CALL:
+                    continue
+                total = result.setdefault(event, {"count": 0, "seconds": 0.0})
+                total["count"] += entry["count"]
+                total["seconds"] += entry["seconds"]
+        return result
+
+    def toJSON(self, indent=None):
+        return json.dumps(self, indent=indent, sort_keys=True)
+
+    def dump(self, path, indent=2):
+        """ Writes the report as JSON to the file at path. """
+        with open(path, "w") as f:
+            f.write(self.toJSON(indent=indent))
+
+    def __str__(self):
+        rows = sorted(((owner, event, entry) for owner, events in self.iteritems()
+                       for event, entry in events.iteritems()), key=lambda x: -x[2]["seconds"])
+        return "\n".join("{0:<32} {1:<32} {2[count]:>8} {2[seconds]:>10.6f}".format(*row) for row in rows)
+
+
+def _owner(stack):
+    return stack[0] if stack else TOPLEVEL
+
+
+def _methodWrapper(func, name, report, stack):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stack.append(name)
+        start = _timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            report.add(name, CALL, _timer() - start)
+            stack.pop()
+    return wrapper
+
+
+def _eventWrapper(func, event, report, stack, count=None):
+    """ Wraps the function to record an event for each call.
+
+        :param event: The name of the event, or a function that returns it for the (args, kwargs) of the call.
+        :param count: Function that returns the number of events for the (args, kwargs) of the call, defaults to one.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = _timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = _timer() - start
+            name = event(args, kwargs) if callable(event) else event
+            report.add(_owner(stack), name, seconds, count(args, kwargs) if count else 1)
+    return wrapper
+
+
+def _partialFunction(raw):
+    """ Returns a function that calls the partial, which has a name and doc that `functools.wraps` can copy. """
+    def function(*args, **kwargs):
+        return raw(*args, **kwargs)
+    function.__name__ = raw.func.__name__
+    function.__doc__ = raw.func.__doc__
+    return function
+
+
+def _wrapMember(raw, wrap):
+    """ Returns the wrapped function of a class member keeping it a static or class method, None if not a method.
+
+        A `functools.partial` isn't bound when accessed on the class, so it's wrapped as a static method.
+    """
+    if isinstance(raw, staticmethod):
+        return staticmethod(wrap(raw.__func__))
+    elif isinstance(raw, classmethod):
+        return classmethod(wrap(raw.__func__))
+    elif isinstance(raw, types.FunctionType):
+        return wrap(raw)
+    elif isinstance(raw, functools.partial):
+        return staticmethod(wrap(_partialFunction(raw)))
+    return None
+
+
+def _createNodeEvent(args, kwargs):
+    return "createNode." + (args[0] if args else kwargs["nodeType"])
+
+
+def _patches(report, stack):
+    """ Returns the (target, name, replacement) of all functions that are wrapped while profiling. """
+    patches = []
+    classes = [nodex.core.Math, nodex.core.Nodex] + list(nodex.core.registeredDataTypes())
+    for cls in classes:
+        for name, raw in vars(cls).items():
+            if name in _queries or (name.startswith("_") and not name.endswith("__")):
+                continue
+            qualifiedName = "{0}.{1}".format(cls.__name__, name)
+            replacement = _wrapMember(raw, lambda func: _methodWrapper(func, qualifiedName, report, stack))
+            if replacement is not None:
+                patches.append((cls, name, replacement))
+
+        raw = vars(cls).get("isValidData")
+        if raw is not None:
+            event = "isValidData." + cls.__name__
+            patches.append((cls, "isValidData",
+                            _wrapMember(raw, lambda func: _eventWrapper(func, event, report, stack))))
+
+    patches.append((nodex.core.Nodex, "__new__",
+                    staticmethod(_eventWrapper(vars(nodex.core.Nodex)["__new__"].__func__, "Nodex.__new__",
+                                               report, stack))))
+    patches.append((nodex.graph, "createNode",
+                    _eventWrapper(nodex.graph.createNode, _createNodeEvent, report, stack)))
+    patches.append((nodex.graph, "setAttr", _eventWrapper(nodex.graph.setAttr, "setAttr", report, stack)))
+    patches.append((nodex.graph, "connectAttr",
+                    _eventWrapper(nodex.graph.connectAttr, "connectAttr", report, stack)))
+    patches.append((nodex.graph, "connectAttrs",
+                    _eventWrapper(nodex.graph.connectAttrs, "connectAttr", report, stack,
+                                  count=lambda args, kwargs: len(args[0]))))
+    patches.append((nodex.utils, "ensurePluginsLoaded",
+                    _eventWrapper(nodex.utils.ensurePluginsLoaded, "ensurePluginsLoaded", report, stack,
+                                  count=lambda args, kwargs: len(args[0]))))
+    return patches
+
+
+@contextlib.contextmanager
+def profile():
+    """ Count and time what is built within the context.
+
+        :rtype: Report
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("Already profiling, nested profiles are not supported.")
+
+    report = _active = Report()
+    originals = []
+    try:
+        for target, name, replacement in _patches(report, []):
+            originals.append((target, name, vars(target)[name]))
+            setattr(target, name, replacement)
+        yield report
+    finally:
+        for target, name, original in reversed(originals):
+            setattr(target, name, original)
+        _active = None
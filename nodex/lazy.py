@@ -0,0 +1,102 @@
+"""
+    The Maya and pymel modules nodex uses, imported on first use.
+
+    Importing `pymel.core` takes seconds (it initializes Maya) while building expression plans or inspecting the
+    datatypes doesn't touch the scene. Nodex references the modules through the `LazyModule` proxies of this module
+    instead, eg. ``from nodex.lazy import pymel`` after which ``pymel.core.PyNode(name)`` imports `pymel.core` on
+    that first call.
+
+    The classes that are checked against with `isinstance()` are declared per module. Accessing those returns a
+    `LazyType` which doesn't import its module for the check: if the module isn't imported yet there can't be an
+    instance of the class either. Calling it imports the module and creates the instance.
+"""
+
+# standard library
+import importlib
+import sys
+
+
+class LazyType(object):
+    """ A class of a module that isn't imported for `isinstance()` and `issubclass()` checks. """
+    __slots__ = ("module", "name")
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+
+    def resolve(self):
+        """ Returns the class, importing its module. """
+        return getattr(importlib.import_module(self.module), self.name)
+
+    def __instancecheck__(self, instance):
+        module = sys.modules.get(self.module)
+        return module is not None and isinstance(instance, getattr(module, self.name))
+
+    def __subclasscheck__(self, cls):
+        module = sys.modules.get(self.module)
+        return module is not None and issubclass(cls, getattr(module, self.name))
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return "LazyType({0}.{1})".format(self.module, self.name)
+
+
+class LazyModule(object):
+    """ A module that's imported when one of its attributes is first accessed.
+
+        :param name: The full name of the module, eg. ``maya.cmds``.
+        :param types: The names of the classes that are accessed as `LazyType`.
+        :param submodules: The `LazyModule` of submodules that are accessed as attribute.
+    """
+
+    def __init__(self, name, types=(), submodules=()):
+        self._lazyName = name
+        for typeName in types:
+            setattr(self, typeName, LazyType(name, typeName))
+        for submodule in submodules:
+            setattr(self, submodule._lazyName.rpartition(".")[2], submodule)
+
+    def isImported(self):
+        return self._lazyName in sys.modules
+
+    def __getattr__(self, attr):
+        """ Imports the module and caches the attribute, so next accesses are plain attribute lookups. """
+        module = importlib.import_module(self._lazyName)
+        try:
+            value = getattr(module, attr)
+        except AttributeError:
+            if attr.startswith("__"):
+                raise
+            # submodules aren't always imported by their package
+            value = importlib.import_module("{0}.{1}".format(self._lazyName, attr))
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self):
+        return "LazyModule({0})".format(self._lazyName)
+
+
+_vectorMatrixTypes = ("MVector", "MFloatVector", "MMatrix", "MFloatMatrix")
+
+maya = LazyModule("maya", submodules=[LazyModule("maya.cmds"),
+                                      LazyModule("maya.OpenMaya", types=_vectorMatrixTypes),
+                                      LazyModule("maya.api", submodules=[
+                                          LazyModule("maya.api.OpenMaya", types=_vectorMatrixTypes)])])
+
+pymel = LazyModule("pymel", submodules=[
+    LazyModule("pymel.core", types=("Attribute", "PyNode"), submodules=[
+        LazyModule("pymel.core.datatypes", types=("Vector", "FloatVector", "Matrix", "FloatMatrix"))])])
+
+
+def imported():
+    """ Returns the names of the Maya and pymel modules that are imported.
+
+        :rtype: list
+    """
+    return sorted(name for name, module in sys.modules.items()
+                  if module is not None and name.split(".")[0] in ("maya", "pymel"))
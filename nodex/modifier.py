@@ -0,0 +1,199 @@
+"""
+    Transactional building with a single `maya.api.OpenMaya.MDGModifier`.
+
+    Within `transaction()` the nodes, connections and values of all node helpers are queued in one modifier that
+    is applied with one ``doIt()`` when leaving the context, instead of running thousands of separate commands that
+    each have their own undo entry and DG notifications. The whole build undoes as one step. If an error is raised
+    within the context nothing is applied.
+
+    The created nodes get their (unique) names when queued so they can be referenced as usual, but since they only
+    exist after the transaction their values can't be queried within it.
+
+    Example:
+        >>> with nodex.modifier.transaction():
+        >>>     result = Nodex("pSphere1.translate") * 2.0
+        >>>     result.connect("pSphere2.translate")
+
+    This module is also the Maya plug-in that registers the command that applies the modifier undoably.
+"""
+
+# standard library
+import contextlib
+import os
+import re
+
+# local library
+import nodex.backend
+
+COMMAND = "nodexApplyModifier"
+_pending = []       # the modifiers handed over to the command that applies them
+_trailingDigits = re.compile(r"\d+$")
+
+
+def _melString(value):
+    """ Returns the value as a quoted MEL string. """
+    return '"{0}"'.format(value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                          .replace("\t", "\\t"))
+
+
+def _melValue(value):
+    if isinstance(value, basestring):
+        return _melString(value)
+    elif isinstance(value, bool):
+        return "1" if value else "0"
+    elif hasattr(value, '__iter__'):
+        return " ".join(_melValue(x) for x in value)
+    elif isinstance(value, float):
+        return repr(value)
+    return str(int(value))
+
+
+class ModifierBackend(nodex.backend.Backend):
+    """ Queues everything into one `MDGModifier` that is applied with `commit()`.
+
+        The connections are queued with the plugs, values, locks and dynamic attributes are queued as MEL commands (so
+        they're done with the units and types of their attribute) in the same modifier.
+
+        :param api: The `maya.api.OpenMaya` module, or a stand-in with its `MDGModifier`, `MSelectionList` and
+                    `MFnDependencyNode`.
+        :param cmds: The `maya.cmds` module, or a stand-in.
+    """
+    def __init__(self, api=None, cmds=None):
+        if api is None:
+            import maya.api.OpenMaya as api
+        if cmds is None:
+            import maya.cmds as cmds
+        self.api = api
+        self.cmds = cmds
+        self.modifier = api.MDGModifier()
+        self.counts = {"createNode": 0, "connectAttr": 0, "setAttr": 0, "lockAttr": 0, "addAttr": 0}
+        self._created = {}          # name -> MObject of the nodes created by the modifier
+
+    def _uniqueName(self, name):
+        if not self.objExists(name):
+            return name
+        stem = _trailingDigits.sub("", name)
+        i = 1
+        while self.objExists("{0}{1}".format(stem, i)):
+            i += 1
+        return "{0}{1}".format(stem, i)
+
+    def _plug(self, name):
+        """ Returns the `MPlug` for the plug name, also for the nodes that are only created by the modifier. """
+        nodeName, _, attr = name.partition(".")
+        mobject = self._created.get(nodeName)
+        if mobject is None:
+            selection = self.api.MSelectionList()
+            selection.add(name)
+            return selection.getPlug(0)
+
+        fn = self.api.MFnDependencyNode(mobject)
+        plug = None
+        for part in attr.split("."):
+            attrName, _, index = part.partition("[")
+            if plug is None:
+                plug = fn.findPlug(attrName, False)
+            else:
+                plug = plug.child(fn.attribute(attrName))
+            if index:
+                plug = plug.elementByLogicalIndex(int(index[:-1]))
+        return plug
+
+    def createNode(self, nodeType, name=None):
+        name = self._uniqueName(name or nodeType + "1")
+        mobject = self.modifier.createNode(nodeType)
+        self.modifier.renameNode(mobject, name)
+        self._created[name] = mobject
+        self.counts["createNode"] += 1
+        return name
+
+    def setAttr(self, plug, values, attrType=None):
+        flags = '-type "{0}" '.format(attrType) if attrType else ""
+        if attrType == "matrix":
+            values = values[0]
+        self.modifier.commandToExecute('setAttr {0}"{1}" {2}'.format(flags, plug, _melValue(values)))
+        self.counts["setAttr"] += 1
+
+    def connectAttr(self, source, destination, force=False):
+        destinationPlug = self._plug(destination)
+        if force and destinationPlug.isDestination:
+            self.modifier.disconnect(destinationPlug.source(), destinationPlug)
+        self.modifier.connect(self._plug(source), destinationPlug)
+        self.counts["connectAttr"] += 1
+
+    def lockAttr(self, plug):
+        self.modifier.commandToExecute('setAttr -lock true "{0}"'.format(plug))
+        self.counts["lockAttr"] += 1
+
+    def addAttr(self, node, longName, dataType):
+        self.modifier.commandToExecute('addAttr -longName "{0}" -dataType "{1}" "{2}"'.format(longName, dataType, node))
+        self.counts["addAttr"] += 1
+
+    def objExists(self, name):
+        return name in self._created or self.cmds.objExists(name)
+
+    def commit(self, undoable=True):
+        """ Applies the queued modifier, if undoable by the command so it undoes as one step. """
+        if undoable:
+            if not self.cmds.exists(COMMAND):
+                self.cmds.loadPlugin(os.path.splitext(__file__)[0] + ".py", quiet=True)
+            _pending.append(self.modifier)
+            getattr(self.cmds, COMMAND)()
+        else:
+            self.modifier.doIt()
+
+
+@contextlib.contextmanager
+def transaction(undoable=True, api=None, cmds=None):
+    """ Queue everything that nodex builds within the context in one `MDGModifier` and apply it when leaving.
+
+        :param undoable: If False the modifier is applied without an undo entry.
+        :rtype: ModifierBackend
+    """
+    backend = ModifierBackend(api=api, cmds=cmds)
+    with nodex.backend.using(backend):
+        yield backend
+    backend.commit(undoable=undoable)
+
+
+# region plug-in
+def maya_useNewAPI():
+    pass
+
+
+def _commandClass():
+    import maya.api.OpenMaya as om2
+
+    class ApplyModifier(om2.MPxCommand):
+        """ Applies the modifier handed over by `ModifierBackend.commit()` and undoes it as one step. """
+        def __init__(self):
+            om2.MPxCommand.__init__(self)
+            self.modifier = None
+
+        def doIt(self, args):
+            import nodex.modifier   # the plug-in is loaded as a separate module
+            self.modifier = nodex.modifier._pending.pop()
+            self.modifier.doIt()
+
+        def redoIt(self):
+            self.modifier.doIt()
+
+        def undoIt(self):
+            self.modifier.undoIt()
+
+        def isUndoable(self):
+            return True
+
+    return ApplyModifier
+
+
+def initializePlugin(plugin):
+    import maya.api.OpenMaya as om2
+    command = _commandClass()
+    om2.MFnPlugin(plugin).registerCommand(COMMAND, command)
+
+
+def uninitializePlugin(plugin):
+    import maya.api.OpenMaya as om2
+    om2.MFnPlugin(plugin).deregisterCommand(COMMAND)
+# endregion
@@ -0,0 +1,244 @@
+"""
+    Packing of independent scalar operations into the channels of shared nodes.
+
+    A scalar operation only uses the first channel (X or R) of its node, eg. ``outputX`` of a `multiplyDivide`. When
+    materializing a deferred graph built with ``nodex.deferred(pack=True)`` the operations of the same kind and
+    settings that don't depend on each other share a node, each using its own channel. This makes up to three times
+    less nodes for scalar heavy setups.
+
+    Operations only share a node if they are at the same level in the graph; the longest chain of connections from
+    the existing nodes. Since connections always go to a higher level the shared nodes can't depend on each other.
+    Connections to existing nodes are taken into account, as are the dependencies that already exist in the scene
+    between them: an operation that reads from an existing node downstream of (or on) an existing node that another
+    operation writes to depends on that operation, see `sceneDependencies()`.
+"""
+
+# standard library
+import collections
+import re
+
+# maya library, imported on first use
+from nodex.lazy import maya
+mc = maya.cmds
+
+# local library
+import nodex.utils
+
+# The kind of attribute of a packable node
+CHANNEL = "channel"     # attribute of the first channel
+COMPOUND = "compound"   # the parent of the channels, only a set or lock can be packed (the first value is used)
+OTHER = "other"         # attribute of one of the other channels, not used by the scalar operation
+SHARED = "shared"       # attribute that is the same for all channels
+
+# nodeType: (channel suffices, parent attributes of the channels, shared attributes)
+packableNodes = {"multiplyDivide": ("XYZ", ("input1", "input2", "output"), ("operation",)),
+                 "plusMinusAverage": ("xyz", (), ("operation",)),
+                 "condition": ("RGB", ("colorIfTrue", "colorIfFalse", "outColor"),
+                               ("operation", "firstTerm", "secondTerm")),
+                 "clamp": ("RGB", ("input", "min", "max", "output"), ())}
+
+_inputPattern = re.compile(r"^input1D\[(\d+)\]$")
+
+
+def channelAttr(nodeType, attr):
+    """ Returns the kind of the attribute of a packable node and the format for the attribute of a channel.
+
+        The format is formatted with the channel suffix, eg. ``input1.input1{0}`` for ``input1.input1X``.
+        Returns (None, None) if the attribute can't be packed.
+
+        :rtype: tuple
+    """
+    suffices, parents, shared = packableNodes[nodeType]
+    if attr in shared:
+        return SHARED, None
+
+    # The scalar plusMinusAverage uses the 1D attributes, when packed they become the channels of the 3D attributes
+    if nodeType == "plusMinusAverage":
+        if attr == "output1D":
+            return CHANNEL, "output3D.output3D{0}"
+        match = _inputPattern.match(attr)
+        if match:
+            return CHANNEL, "input3D[" + match.group(1) + "].input3D{0}"
+        return None, None
+
+    parent, _, child = attr.rpartition(".")
+    if not parent:
+        if attr in parents:
+            return COMPOUND, "{0}.{0}{{0}}".format(attr)
+        parent, child = attr[:-1], attr     # short name of the child, eg. outColorR
+    if parent not in parents or child[:-1] != parent or child[-1] not in suffices:
+        return None, None
+    if child[-1] != suffices[0]:
+        return OTHER, None
+    return CHANNEL, "{0}.{0}{{0}}".format(parent)
+
+
+def plugName(nodeName, nodeType, attr, channel):
+    """ Returns the name of the plug for the attribute of a packed operation at the channel of the shared node. """
+    kind, attrFormat = channelAttr(nodeType, attr)
+    if attrFormat is not None:
+        attr = attrFormat.format(packableNodes[nodeType][0][channel])
+    return "{0}.{1}".format(nodeName, attr)
+
+
+def sceneDependencies(nodes, connections):
+    """ Returns the (source, destination) of the pending nodes where the destination reads from an existing node that
+        is downstream of an existing node the source writes to, so it depends on it through the scene. Reading from
+        the node that is written to counts as well, since its attributes can affect each other.
+
+        :rtype: list
+    """
+    pending = set(nodes)
+    writers = collections.defaultdict(set)      # existing node name -> pending nodes connected to it
+    readers = collections.defaultdict(set)      # existing node name -> pending nodes connected from it
+    for source, destination, _ in connections:
+        sourceNode, destinationNode = source.key()[0], destination.key()[0]
+        if sourceNode in pending and destinationNode not in pending:
+            writers[destination.nodeName()].add(sourceNode)
+        elif destinationNode in pending and sourceNode not in pending:
+            readers[source.nodeName()].add(destinationNode)
+    if not writers or not readers:
+        return []
+
+    result = []
+    for name, destinations in readers.iteritems():
+        for upstream in set(mc.listHistory(name) or []).intersection(writers):
+            result.extend((source, destination) for source in writers[upstream] for destination in destinations
+                          if source is not destination)
+    return result
+
+
+def levels(nodes, connections, dependencies=()):
+    """ Returns the level of the pending nodes and the existing nodes that are connected to, None if cyclic.
+
+        :param dependencies: The (source, destination) of pending nodes where the destination depends on the source
+                             other than by the connections, see `sceneDependencies()`.
+        :rtype: dict
+    """
+    vertices = set(nodes)
+    vertices.update(destination.key()[0] for _, destination, _ in connections)
+
+    inputs = collections.defaultdict(list)
+    outputs = collections.defaultdict(list)
+    for source, destination, _ in connections:
+        sourceNode, destinationNode = source.key()[0], destination.key()[0]
+        if sourceNode in vertices and sourceNode != destinationNode:
+            inputs[destinationNode].append(sourceNode)
+            outputs[sourceNode].append(destinationNode)
+    for sourceNode, destinationNode in dependencies:
+        inputs[destinationNode].append(sourceNode)
+        outputs[sourceNode].append(destinationNode)
+
+    result = {}
+    remaining = dict((vertex, len(inputs[vertex])) for vertex in vertices)
+    ready = [vertex for vertex, count in remaining.iteritems() if not count]
+    while ready:
+        vertex = ready.pop()
+        result[vertex] = max([result[x] + 1 for x in inputs[vertex]] or [0])
+        for x in outputs[vertex]:
+            remaining[x] -= 1
+            if not remaining[x]:
+                ready.append(x)
+
+    if len(result) != len(vertices):
+        return None
+    return result
+
+
+def pack(nodes, setAttrs, connections, locks):
+    """ Shares the nodes of the packable operations recorded in a graph, see `nodex.graph.Graph.flush()`.
+
+        The operations that are packed into the channel of another node are removed from `nodes` and their values,
+        connections and locks are done on the channel of the shared node instead.
+
+        :return: The nodes, values, connections and locks to materialize.
+        :rtype: tuple
+    """
+    candidates = [node for node in nodes if node.isPackable() and node.nodeType() in packableNodes]
+    if not candidates:
+        return nodes, setAttrs, connections, locks
+
+    nodeLevels = levels(nodes, connections, sceneDependencies(nodes, connections))
+    if nodeLevels is None:
+        return nodes, setAttrs, connections, locks
+
+    # Collect the settings that must be equal to share a node, the operations on other attributes can't be packed
+    settings = dict((node, {}) for node in candidates)
+    inputs = dict((node, set()) for node in candidates)
+    unpackable = set()
+
+    def check(plug, isSource=False, setting=None):
+        node = plug.key()[0]
+        if node not in settings:
+            return
+        kind, attrFormat = channelAttr(node.nodeType(), plug.attrName())
+        isConnected = setting is not None and setting[0] == "connect"
+        if kind is None or (kind is not CHANNEL and isSource) or (kind is COMPOUND and isConnected):
+            unpackable.add(node)
+        elif kind is SHARED and setting is not None:
+            settings[node][plug.attrName()] = setting
+        elif kind is CHANNEL and not isSource:
+            inputs[node].add(attrFormat)
+
+    for plug, values, attrType in setAttrs:
+        check(plug, setting=("set", values))
+    for source, destination, _ in connections:
+        check(source, isSource=True)
+        check(destination, setting=("connect", source.key()))
+    for plug in locks:
+        check(plug)
+
+    # Group the operations that can share a node
+    groups = collections.OrderedDict()
+    for node in candidates:
+        if node in unpackable:
+            continue
+        signature = tuple(sorted(settings[node].items()))
+        if node.nodeType() == "plusMinusAverage" and settings[node].get("operation") == ("set", (3,)):
+            signature += (frozenset(inputs[node]),)   # an average depends on the number of inputs
+        groups.setdefault((node.nodeType(), nodeLevels[node], signature), []).append(node)
+
+    channels = {}
+    for (nodeType, _, _), group in groups.iteritems():
+        size = len(packableNodes[nodeType][0])
+        for i in range(0, len(group) - 1, size):
+            shared = group[i:i + size]
+            for channel, node in enumerate(shared):
+                channels[node] = (shared[0], channel)
+    if not channels:
+        return nodes, setAttrs, connections, locks
+
+    def channelPlug(plug):
+        """ Returns the plug on the channel of the shared node, None if the operation isn't needed anymore. """
+        packed = channels.get(plug.key()[0])
+        if packed is None:
+            return plug
+        host, channel = packed
+        nodeType = host.nodeType()
+        kind, attrFormat = channelAttr(nodeType, plug.attrName())
+        if kind is OTHER or (kind is SHARED and host is not plug.handle()):
+            return None
+        if kind is SHARED:
+            return plug
+        return nodex.utils.Plug(host, attrFormat.format(packableNodes[nodeType][0][channel]), nodeType=nodeType)
+
+    packedSetAttrs = []
+    for plug, values, attrType in setAttrs:
+        packedPlug = channelPlug(plug)
+        if packedPlug is not None:
+            if packedPlug is not plug:
+                values = values[:1]
+            packedSetAttrs.append((packedPlug, values, attrType))
+
+    packedConnections = []
+    for source, destination, force in connections:
+        source, destination = channelPlug(source), channelPlug(destination)
+        if source is not None and destination is not None:
+            packedConnections.append((source, destination, force))
+
+    packedLocks = [plug for plug in (channelPlug(x) for x in locks) if plug is not None]
+
+    for node, (host, channel) in channels.iteritems():
+        node.setChannel(host, channel)
+    packedNodes = [node for node in nodes if not channels.get(node, (None, 0))[1]]
+    return packedNodes, packedSetAttrs, packedConnections, packedLocks
@@ -0,0 +1,159 @@
+"""
+    Bulk readback of the values of many Nodex.
+
+    `nodex.core.Nodex.value()` gets each attribute with its own ``getAttr`` and returns vectors and matrices as pymel
+    datatypes. `values()` first collects the plugs of all given Nodex, then resolves each node once and reads every
+    distinct plug once through `maya.api.OpenMaya`. The values are returned as plain floats and tuples, or as a single
+    NumPy array.
+
+    Like ``getAttr`` the values of distance, angle and time attributes are returned in the UI units.
+
+    Example:
+        >>> positions = nodex.values([Nodex(x + ".translate") for x in mc.ls(type="transform")], asArray=True)
+"""
+
+# standard library
+import collections
+
+# local library
+import nodex.utils
+
+# The attribute types (as returned by ``getAttr -type``) that aren't read as a double
+_linearTypes = frozenset(["doubleLinear", "floatLinear", "distance"])
+_angularTypes = frozenset(["doubleAngle", "floatAngle", "angle"])
+_integerTypes = frozenset(["long", "short", "byte", "char", "enum"])
+
+
+def _elements(x):
+    """ Returns the plugs and constant values that make up the value of the Nodex, in order.
+
+        :rtype: list
+    """
+    if x.isSingleAttribute():
+        return [x.plug()]
+    if x.isConstant():
+        return list(nodex.utils.constantValues(x, x.dimensions()))
+    return [element.plug() if element.isSingleAttribute() else nodex.utils.constantValues(element, 1)[0]
+            for element in x]
+
+
+def _findPlug(fn, attr):
+    """ Returns the `MPlug` for the attribute path (eg. ``input3D[1].input3Dx``) on the node of the function set. """
+    plug = None
+    for part in attr.split("."):
+        attrName, _, index = part.partition("[")
+        if plug is None:
+            plug = fn.findPlug(attrName, False)
+        else:
+            plug = plug.child(fn.attribute(attrName))
+        if index:
+            plug = plug.elementByLogicalIndex(int(index[:-1]))
+    return plug
+
+
+def _plugValue(api, mplug, plug):
+    """ Returns the value of the `MPlug`, read according to the metadata of the `nodex.utils.Plug`.
+
+        The value of an array attribute holds the values of its existing elements in order, flattened.
+    """
+    info = plug.info()
+    if info.isArray:
+        values = []
+        for index in plug.elementIndices():
+            value = _plugValue(api, mplug.elementByLogicalIndex(index), plug.element(index))
+            values.extend(value if isinstance(value, tuple) else (value,))
+        return tuple(values)
+    if info.isMatrix:
+        return tuple(api.MFnMatrixData(mplug.asMObject()).matrix())
+    if info.isCompound:
+        return tuple(_plugValue(api, mplug.child(i), plug.child(i)) for i in xrange(info.numChildren))
+
+    attrType = info.type
+    if attrType in _linearTypes:
+        return mplug.asMDistance().asUnits(api.MDistance.uiUnit())
+    elif attrType in _angularTypes:
+        return mplug.asMAngle().asUnits(api.MAngle.uiUnit())
+    elif attrType == "time":
+        return mplug.asMTime().asUnits(api.MTime.uiUnit())
+    elif attrType == "bool":
+        return mplug.asBool()
+    elif attrType in _integerTypes:
+        return mplug.asInt()
+    return mplug.asDouble()
+
+
+def resolvePlugs(plugs, api=None):
+    """ Returns the (`MPlug`, `nodex.utils.Plug`) of the plugs by their `nodex.utils.Plug.key()`. Each node is only
+        resolved once.
+
+        :param api: The `maya.api.OpenMaya` module, or a stand-in, see `readPlugs()`.
+        :rtype: collections.OrderedDict
+    """
+    if api is None:
+        import maya.api.OpenMaya as api
+
+    # The full name maps the plugs of packed operations to their channel on the shared node
+    byNode = collections.OrderedDict()
+    for plug in plugs:
+        nodeName, _, attr = plug.name().partition(".")
+        byNode.setdefault(nodeName, {})[plug.key()] = (attr, plug)
+
+    result = collections.OrderedDict()
+    for nodeName, nodePlugs in byNode.iteritems():
+        selection = api.MSelectionList()
+        selection.add(nodeName)
+        fn = api.MFnDependencyNode(selection.getDependNode(0))
+        for key, (attr, plug) in nodePlugs.iteritems():
+            result[key] = (_findPlug(fn, attr), plug)
+    return result
+
+
+def readPlugs(plugs, api=None):
+    """ Returns the values of the plugs by their `nodex.utils.Plug.key()`. Each node is only resolved once.
+
+        :param api: The `maya.api.OpenMaya` module, or a stand-in with its `MSelectionList`, `MFnDependencyNode`,
+                    `MFnMatrixData` and unit classes.
+        :rtype: dict
+    """
+    if api is None:
+        import maya.api.OpenMaya as api
+
+    return dict((key, _plugValue(api, mplug, plug)) for key, (mplug, plug) in resolvePlugs(plugs, api).iteritems())
+
+
+def values(nodexes, asArray=False, api=None):
+    """ Returns the values of all Nodex, reading the plugs in bulk.
+
+        A single numeric value is returned as float (or int/bool for those attribute types), anything with more
+        dimensions as a flat tuple, eg. 16 values for a matrix.
+
+        :param nodexes: Sequence of Nodex (or anything a Nodex can be created from).
+        :param asArray: If True return a `numpy.ndarray` with a row per Nodex; all must have the same dimensions.
+        :param api: The `maya.api.OpenMaya` module, or a stand-in, see `readPlugs()`.
+        :rtype: list or numpy.ndarray
+    """
+    from nodex.core import Nodex
+
+    layouts = [_elements(Nodex(x)) for x in nodexes]
+    plugs = [element for layout in layouts for element in layout if isinstance(element, nodex.utils.Plug)]
+    read = readPlugs(plugs, api=api)
+
+    result = []
+    for layout in layouts:
+        row = []
+        for element in layout:
+            if isinstance(element, nodex.utils.Plug):
+                value = read[element.key()]
+                if isinstance(value, tuple):
+                    row.extend(value)
+                    continue
+                element = value
+            row.append(element)
+        result.append(row[0] if len(row) == 1 else tuple(row))
+
+    if asArray:
+        if len(set(len(row) if isinstance(row, tuple) else 1 for row in result)) > 1:
+            raise ValueError("Can't return the values as array, the Nodex have different dimensions.")
+        import numpy
+        return numpy.array(result, dtype=float)
+    return result
@@ -0,0 +1,124 @@
+"""
+    Build sessions for building node networks interactively.
+
+    Every node, connection and value normally gets its own undo entry, refreshes the viewport and dirties the
+    evaluation graph. Within `buildSession()` everything is undone as one step (or not recorded for undo at all),
+    refresh is suspended and the evaluation manager is switched off so its graph is only rebuilt once afterwards.
+    The network is recorded as within `nodex.deferred()` and built when leaving the session, so chained sums and
+    matrix products are built as a single node and identical computations share their nodes. Everything is restored
+    when leaving the session, also when an error is raised.
+
+    Example:
+        >>> with nodex.build_session() as statistics:
+        >>>     result = Nodex("pSphere1.translate") * 2.0
+        >>> print statistics
+        Built 1 nodes, 1 connections and 2 setAttrs in 0.002 seconds
+"""
+
+# standard library
+import contextlib
+import logging
+import time
+logger = logging.getLogger(__name__)
+
+# maya library, imported on first use
+from nodex.lazy import maya
+mc = maya.cmds
+
+# local library
+import nodex.graph
+import nodex.utils
+
+
+class BuildStatistics(dict):
+    """ The number of `nodes`, `connections` and `setAttrs` emitted in a session and its wall time in `seconds`. """
+    def __init__(self):
+        super(BuildStatistics, self).__init__(nodes=0, connections=0, setAttrs=0, seconds=0.0)
+
+    def __str__(self):
+        return "Built {nodes} nodes, {connections} connections and {setAttrs} setAttrs in {seconds:.3f} " \
+               "seconds".format(**self)
+
+
+@contextlib.contextmanager
+def _undoChunk(undo, name):
+    """ Records what is done within the context as one undo step, or not at all if `undo` is False. """
+    if undo:
+        mc.undoInfo(openChunk=True, chunkName=name)
+        try:
+            yield
+        finally:
+            mc.undoInfo(closeChunk=True)
+    else:
+        undoState = mc.undoInfo(query=True, state=True)
+        mc.undoInfo(state=False)
+        try:
+            yield
+        finally:
+            mc.undoInfo(state=undoState)
+
+
+@contextlib.contextmanager
+def _evaluationManagerOff():
+    """ Switches the evaluation manager off within the context (Maya 2016+). """
+    evaluationMode = None
+    if hasattr(mc, "evaluationManager"):
+        evaluationMode = mc.evaluationManager(query=True, mode=True)[0]
+    if evaluationMode in (None, "off"):
+        yield
+        return
+
+    mc.evaluationManager(mode="off")
+    try:
+        yield
+    finally:
+        mc.evaluationManager(mode=evaluationMode)
+
+
+@contextlib.contextmanager
+def _refreshSuspended():
+    mc.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        mc.refresh(suspend=False)
+
+
+@contextlib.contextmanager
+def buildSession(undo=True, name="nodex", defer=True):
+    """ Build within a single undo chunk with refresh and evaluation graph rebuilds suspended.
+
+        Each change is only undone once it was made, so everything is restored also when setting up the session fails.
+
+        Nested in `nodex.deferred()` the session records into the outer graph and builds everything that graph
+        recorded up to then when leaving the session, so it's done as one step and counted in its statistics. The
+        outer graph keeps recording what follows the session.
+
+        :param undo: If False undo is disabled during the session instead of recorded as one step.
+                     Note that disabling undo flushes the undo queue.
+        :param name: The name of the undo chunk.
+        :param defer: If True the network is built when leaving the session, see `nodex.graph.deferred()`. Else it's
+                      built directly and only the nodes of identical computations are reused.
+        :rtype: BuildStatistics
+    """
+    if nodex.graph.isHeadless():
+        raise RuntimeError("Can't start a build session while recording to evaluate, see `nodex.evaluate.record()`.")
+    nested = nodex.graph.isDeferred()
+
+    statistics = BuildStatistics()
+    nodex.graph._statistics.append(statistics)
+    start = time.time()
+    try:
+        with _undoChunk(undo, name), _evaluationManagerOff(), _refreshSuspended():
+            if nested:
+                # the outer graph would only be built when leaving it, after the session
+                with nodex.graph.deferred() as graph:
+                    yield statistics
+                    graph.flush()
+            else:
+                with nodex.graph.deferred() if defer else nodex.utils.reuseNodes():
+                    yield statistics
+    finally:
+        nodex.graph._statistics.remove(statistics)
+        statistics["seconds"] = time.time() - start
+        logger.info(str(statistics))
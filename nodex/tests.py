@@ -3,59 +3,122 @@ import unittest
 import nodex.datatypes
 import pymel.core
 import maya.cmds as mc
-import time
+import json
+import sys
 import logging
 import nodex.utils
 
 logger = logging.getLogger('nodex.tests')
 
 
-class speedMeasure(object):
-    def __init__(self, max_duration, msg=None):
-        self._max_duration = max_duration
-        self._msg = msg
-        self._start = 0
-
-    def __enter__(self):
-        self._start = time.time()
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self._end = time.time()
-        self._duration = self._end - self._start
-        if self._duration > self._max_duration:
-            raise AssertionError("{0} is longer than {1}. {2}".format(self._duration, self._max_duration, self._msg))
-        else:
-            logger.debug("speedMeasure: {0}s <= {1}s; msg: {2}".format(self._duration, self._max_duration, self._msg))
-
-
 class TestNodexSpeed(unittest.TestCase):
     """ Ensuring code changes don't slow the Nodex down too much """
 
+    def _benchmark(self, name):
+        """ Runs a benchmark of `nodex.benchmarks.micro` briefly. There are no thresholds, the trends are followed by
+            comparing the results of ``python -m nodex.benchmarks`` across commits.
+        """
+        import nodex.benchmarks
+        result = nodex.benchmarks.measure(nodex.benchmarks.suites()["micro"][name](), warmup=1, repeat=5,
+                                          minSampleTime=0.001)
+        logger.debug("{0}: median {1:.2f}us (p5 {2:.2f}us, p95 {3:.2f}us)".format(
+                     name, result["median"] * 1e6, result["p5"] * 1e6, result["p95"] * 1e6))
+        self.assertTrue(result["p5"] <= result["median"] <= result["p95"])
+        return result
+
     def test_long_array(self):
         """ This is a good test since each element within the Array gets converted to a single Nodex() element.
             So it calls the Nodex __new__ method many times.
         """
-        with speedMeasure(0.4, msg="array: list multiplied"):
-            Nodex([1]*10000)
-
-        with speedMeasure(0.4, msg="array: range"):
-            Nodex(range(10000))
+        self._benchmark("construct.Array[10000]")
 
     def test_many_matrices(self):
+        for name in ("construct.Matrix", "construct.Matrix explicit", "value.Matrix"):
+            self._benchmark(name)
+
+    def test_scaling(self):
+        """ The nodes of a chain grow linearly with its length, a quadratic growth is flagged. """
+        import nodex.benchmarks
+        results = nodex.benchmarks.scaling(sizes=(4, 8, 16), pattern="overlay chain", isolate=False)
+        result = results["results"]["overlay chain"]
+        self.assertEqual(len(result["measurements"]), 3)
+        self.assertAlmostEqual(result["exponents"]["nodes"], 1.0, delta=0.1)
+        self.assertNotIn("nodes", result["superLinear"])
+        self.assertAlmostEqual(nodex.benchmarks.growthExponent((10, 100, 1000), (1, 100, 10000)), 2.0)
+
+    def test_import_time(self):
+        """ Importing nodex doesn't import Maya or pymel, they're imported on first use. """
+        import nodex.benchmarks
+        import nodex.lazy
+        result = nodex.benchmarks.importTime(repeat=1)
+        self.assertEqual(result["imported"], [])
+        logger.debug("import nodex.core, nodex.datatypes: {0:.1f}ms".format(result["seconds"]["median"] * 1e3))
+
+        # checking against a class of a module that isn't imported doesn't import it
+        missing = nodex.lazy.LazyType("nodex_missing_module", "Missing")
+        self.assertFalse(isinstance(1.0, (basestring, missing)))
+        self.assertFalse(issubclass(float, missing))
+        self.assertNotIn("nodex_missing_module", sys.modules)
+
+        # the attributes of a lazy module are cached on the proxy once imported
+        lazy = nodex.lazy.LazyModule("json")
+        self.assertIs(lazy.dumps, json.dumps)
+        self.assertIs(vars(lazy)["dumps"], json.dumps)
+
+    def test_benchmark_compare(self):
+        """ Only changes beyond the threshold with non-overlapping interquartile ranges are reported. """
+        import nodex.benchmarks
+
+        def results(**medians):
+            return {"results": dict((name, {"median": x, "p25": x * 0.98, "p75": x * 1.02})
+                                    for name, x in medians.iteritems())}
+
+        rows = nodex.benchmarks.compare(results(a=1.0, b=1.0, c=1.0, d=1.0),
+                                        results(a=1.5, b=0.5, c=1.03, e=1.0), threshold=0.05)
+        self.assertEqual(dict((row[0], row[-1]) for row in rows), {"a": nodex.benchmarks.SLOWER,
+                                                                   "b": nodex.benchmarks.FASTER,
+                                                                   "c": nodex.benchmarks.SAME})
+        self.assertEqual(nodex.benchmarks.percentile([1.0, 2.0, 3.0, 4.0], 0.5), 2.5)
+
+    def test_memory(self):
+        """ Measure the memory of a build holding 50k Nodex, half constants and half attribute references. """
+        import nodex.benchmarks
 
-        l = [0]*16
-        with speedMeasure(0.08, msg="init matrices"):
-            for x in range(250):
-                m = Nodex(l)
+        mc.file(new=True, force=True)
+        node = mc.createNode("transform")
+        plugs = [nodex.utils.Plug(node, attr, nodeType="transform") for attr in ("tx", "ty", "tz", "rx", "ry")]
+
+        memory = nodex.benchmarks._peakMemory()
+        nodes = [Nodex(float(i)) for i in range(25000)]
+        nodes.extend(Nodex(plugs[i % len(plugs)]) for i in range(25000))
+        peak = nodex.benchmarks._peakMemory()
+
+        # the size of the instances and the constants they hold, the plugs are shared
+        size = sum(sys.getsizeof(x) + (sys.getsizeof(x._data) if x.isConstant() else 0) for x in nodes)
+        self.assertFalse(any(hasattr(x, '__dict__') for x in nodes[::1000]))
+        self.assertLess(size / len(nodes), 128)
+        logger.debug("memory: 50k Nodex use {0:.2f}MB, {1:.0f} bytes per Nodex (peak memory grew {2})".format(
+                     size / 1e6, size / float(len(nodes)),
+                     "unknown" if memory is None else "{0:.2f}MB".format((peak - memory) / 1e6)))
+
+    def test_datatype_dispatch(self):
+        """ Compare the per-construction cost of the type-keyed registry against the previous linear scan over all
+            datatypes sorted by priority.
+        """
+        import timeit
+        import nodex.core
+        from nodex.benchmarks.micro import linearScan
 
-        with speedMeasure(0.30, msg="init matrices & getting values"):
-            for x in range(50):
-                m = Nodex(l)
-                m.value()
+        samples = [1.0, 5, True, [1, 2, 3], [0]*16, [1]*10, pymel.core.datatypes.Vector(), pymel.core.datatypes.Matrix()]
+        number = 2000
+        for data in samples:
+            self.assertEqual(linearScan(data), nodex.core._getDataTypeFromData(data))
 
-        with speedMeasure(0.08, msg="init matrices explicit"):
-            for x in range(250):
-                m = nodex.datatypes.Matrix(l)
+            before = timeit.timeit(lambda: linearScan(data), number=number) / number
+            after = timeit.timeit(lambda: nodex.core._getDataTypeFromData(data), number=number) / number
+            construct = timeit.timeit(lambda: Nodex(data), number=number) / number
+            logger.debug("dispatch {0}: linear scan {1:.2f}us, registry {2:.2f}us, Nodex() {3:.2f}us".format(
+                         type(data).__name__, before * 1e6, after * 1e6, construct * 1e6))
 
 
 class TestNodexTypes(unittest.TestCase):
@@ -96,6 +159,47 @@ class TestNodexTypes(unittest.TestCase):
         nodex.datatypes.Integer()
         nodex.datatypes.Matrix()
 
+    def test_register_datatype(self):
+        import nodex.core
+
+        class Pair(nodex.datatypes.Array):
+            _priority = 1
+            _data_types = (tuple,)
+            _data_lengths = (2,)
+
+            @staticmethod
+            def isValidData(data):
+                return isinstance(data, tuple) and len(data) == 2
+
+        nodex.core.registerDataType(Pair)
+        try:
+            self.assertEqual(type(Nodex((1, 2))), Pair)
+            self.assertEqual(type(Nodex([1, 2])), nodex.datatypes.Array)
+            self.assertEqual(type(Nodex((1, 2, 3))), nodex.datatypes.Vector)
+
+            # the deprecated lookups return the registered datatypes
+            self.assertEqual(nodex.core.find_nodex_subclasses_sorted(), list(nodex.core.registeredDataTypes()))
+            subclasses = nodex.core.find_subclasses(nodex.datatypes, nodex.datatypes.Array)
+            self.assertIn(nodex.datatypes.Vector, subclasses)
+            self.assertNotIn(Pair, subclasses)
+        finally:
+            nodex.core.deregisterDataType(Pair)
+
+        self.assertEqual(type(Nodex((1, 2))), nodex.datatypes.Array)
+        self.assertNotIn(2, nodex.core._lengths)
+
+        # registering it again resolves to it again
+        nodex.core.registerDataType(Pair)
+        try:
+            self.assertEqual(type(Nodex((1, 2))), Pair)
+        finally:
+            nodex.core.deregisterDataType(Pair)
+        self.assertEqual(type(Nodex((1, 2))), nodex.datatypes.Array)
+        self.assertEqual(type(Nodex((1, 2, 3))), nodex.datatypes.Vector)
+
+        with self.assertRaises(TypeError):
+            nodex.core.registerDataType(object)
+
 
 class TestNodexMethods(unittest.TestCase):
     def setUp(self):
@@ -269,6 +373,138 @@ class TestNodexMethods(unittest.TestCase):
         self.assertEqual(n[1:].dimensions(), len(iterable[1:]))
         self.assertEqual(n[2:].dimensions(), len(iterable[2:]))
 
+    def test_compact_array(self):
+        from nodex.core import CompactArray
+
+        # Constant arrays are stored compactly, elements are only converted to a Nodex when accessed
+        n = Nodex([1.0]*10000)
+        self.assertIsInstance(n._data, CompactArray)
+        self.assertTrue(n._data.isConstant())
+        self.assertEqual(type(n[10]), nodex.datatypes.Float)
+        self.assertEqual(n[-1].value(), 1.0)
+
+        m = Nodex([1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1])
+        self.assertIsInstance(m._data, CompactArray)
+        self.assertEqual(type(m[0]), nodex.datatypes.Integer)
+
+        # Mixed constant and attribute elements keep the attributes in a sparse map
+        mc.xform("pSphere1", t=(0, 3, 0), absolute=True, objectSpace=True)
+        n = Nodex([1, "pSphere1.ty", 2.0, True])
+        self.assertEqual(type(n), nodex.datatypes.Array)
+        self.assertFalse(n.isAttribute())
+        self.assertTrue(n[1].isAttribute())
+        self.assertEqual(n.value(), (1, 3.0, 2.0, True))
+        self.assertEqual(n[1:3].value(), (3.0, 2.0))
+
+        # All attribute elements
+        n = Nodex(["pSphere1.tx", "pSphere1.ty", "pSphere1.tz"])
+        self.assertTrue(n.isAttribute())
+        self.assertEqual(n.value(), pymel.core.datatypes.Vector(0, 3, 0))
+
+    def test_connect_mixed_array(self):
+        """ The attribute elements of a mixed array are connected, only its constant elements are set. """
+        mc.polySphere()  # "pSphere2"
+        mc.setAttr("pSphere1.tx", 5.0)
+        Nodex(["pSphere1.tx", 0.0, 1.0]).connect("pSphere2.translate")
+        self.assertEqual(mc.listConnections("pSphere2.tx", plugs=True), ["pSphere1.translateX"])
+        self.assertEqual(mc.getAttr("pSphere2.translate")[0], (5.0, 0.0, 1.0))
+        mc.setAttr("pSphere1.tx", 2.0)
+        self.assertEqual(mc.getAttr("pSphere2.translate")[0], (2.0, 0.0, 1.0))
+
+        result = Nodex(["pSphere1.tx", 0, 1]) + Nodex("pSphere2.translate")
+        node = result.plug().nodeName()
+        self.assertEqual(mc.listConnections(node + ".input3D[0].input3Dx", plugs=True), ["pSphere1.translateX"])
+        mc.setAttr("pSphere1.tx", 3.0)
+        self.assertEqual(tuple(result.value()), (6.0, 0.0, 2.0))
+
+    def test_constant_folding(self):
+        """ Operations on constants only are evaluated without creating nodes. """
+        mathNodes = ("multiplyDivide", "plusMinusAverage", "condition", "vectorProduct", "distanceBetween")
+
+        self.assertEqual((Nodex(2.0) * 3.0).value(), 6.0)
+        self.assertEqual((Nodex(1) / Nodex(2)).value(), 0.5)
+        self.assertEqual(Math.sum(1.0, 2.0, 3.0).value(), 6.0)
+        self.assertEqual((Nodex(3) == 2).value(), 0.0)
+        self.assertEqual(tuple(Nodex((1, 0, 0)).cross((0, 1, 0)).value()), (0.0, 0.0, 1.0))
+        self.assertEqual(Nodex((1, 0, 0)).dot((0.5, 1, 0)).value(), 0.5)
+        self.assertAlmostEqual(Math.overlay(0.3, 0.6).value(), 0.36)
+        self.assertAlmostEqual(Math.overlay(0.7, 0.6).value(), 0.76)
+        self.assertAlmostEqual(Math.overlay([0.3], 0.6).value(), 0.36)
+        self.assertEqual(mc.ls(type=mathNodes), [])
+
+        # A constant condition only uses the chosen input
+        result = Math.lessThan(0.1, 0.5, ifTrue=Nodex("pSphere1.translate"), ifFalse=(0, 0, 0))
+        self.assertEqual(result.plug().name(), "pSphere1.translate")
+
+        # Nodes are only created once an attribute is involved
+        result = Math.overlay(0.3, "pSphere1.translateX")
+        self.assertEqual(len(mc.ls(type=mathNodes)), 1)
+        mc.setAttr("pSphere1.translateX", 0.5)
+        self.assertAlmostEqual(result.value(), 0.3)
+
+    def test_node_cache(self):
+        """ Identical computations within a build reuse the existing node. """
+        t = Nodex("pSphere1.translate")
+        tx = Nodex("pSphere1.translateX")
+        with nodex.utils.reuseNodes():
+            self.assertEqual(t.length().plug().name(), t.length().plug().name())
+            self.assertEqual(t.normal().plug().name(), t.normal().plug().name())
+            self.assertEqual((tx * 2).plug().name(), (2 * tx).plug().name())
+            self.assertNotEqual((tx - 1).plug().name(), (1 - tx).plug().name())
+
+            # A node is only reused for the same name
+            self.assertNotEqual(Math.clamp(tx, 0, 1).plug().name(), Math.clamp(tx, 0, 1, name="other").plug().name())
+            self.assertEqual(nodex.utils.nodeCache.saved, 3)
+        self.assertEqual(len(mc.ls(type=("distanceBetween", "vectorProduct"))), 2)
+
+        # The nodes of an earlier build aren't reused, so a deleted or renamed node is never returned
+        self.assertEqual(len(nodex.utils.nodeCache), 0)
+        self.assertNotEqual((tx * 2).plug().name(), (2 * tx).plug().name())
+        with nodex.deferred():
+            result = tx * 3
+        mc.delete(result.plug().nodeName())
+        with nodex.deferred():
+            self.assertTrue(mc.objExists((tx * 3).plug().name()))
+
+        nodex.utils.nodeCache.enabled = False
+        try:
+            with nodex.utils.reuseNodes():
+                self.assertNotEqual((tx * 2).plug().name(), (2 * tx).plug().name())
+        finally:
+            nodex.utils.nodeCache.enabled = True
+
+    def test_lookup_table_shared(self):
+        """ An identical lookup table on the same input reuses the tagged curve of an earlier build. """
+        import math
+        tx = Nodex("pSphere1.translateX")
+        sine = Math.lookupTable(lambda x: math.sin(x), 0.0, 2 * math.pi, input=tx)
+        self.assertEqual(Math.lookupTable(lambda x: math.sin(x), 0.0, 2 * math.pi, input=tx).plug().name(),
+                         sine.plug().name())
+        self.assertNotEqual(Math.lookupTable(math.cos, 0.0, 2 * math.pi, input=tx).plug().name(), sine.plug().name())
+        ty = Nodex("pSphere1.translateY")
+        self.assertNotEqual(Math.lookupTable(math.sin, 0.0, 2 * math.pi, input=ty).plug().name(), sine.plug().name())
+        self.assertEqual(len(mc.ls(type="animCurveUU")), 3)
+
+    def test_simplification(self):
+        """ Operations that don't change the value are left out, chained operations by constants are combined. """
+        nodex.utils.clearNodeCache()
+        tx = Nodex("pSphere1.translateX")
+        t = Nodex("pSphere1.translate")
+        for result in (tx * 1, 1 * tx, tx / 1, tx ** 1, tx + 0, tx - 0):
+            self.assertEqual(result.plug().name(), "pSphere1.translateX")
+        self.assertEqual((t + (0, 0, 0)).plug().name(), "pSphere1.translate")
+        with nodex.deferred():
+            self.assertEqual((-(-tx)).plug().name(), "pSphere1.translateX")
+            self.assertEqual((-(-t)).plug().name(), "pSphere1.translate")
+        self.assertEqual(len(mc.ls(type="multiplyDivide")), 0)
+
+        # abs(x) is never negative, so its abs is itself
+        mc.xform("pSphere1", t=(-3, 0, 0), absolute=True, objectSpace=True)
+        absolute = Math.abs(tx)
+        self.assertEqual(absolute.value(), 3.0)
+        self.assertEqual(Math.abs(absolute).plug().name(), absolute.plug().name())
+        self.assertEqual(((tx * 2) * 3).value(), -18.0)
+
     def test_len(self):
         # __len__ and dimensions
         n = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 123, 3213, 125, 245]
@@ -615,6 +851,167 @@ class TestMatrixMethods(unittest.TestCase):
         check_node_vs_composed_matrix(src, t, r, s)
 
 
+class TestDeferred(unittest.TestCase):
+    def setUp(self):
+        mc.file(new=True, force=True)
+        mc.polySphere()  # "pSphere1"
+        mc.polySphere()  # "pSphere2"
+
+    def test_deferred(self):
+        import nodex.graph
+        mc.xform("pSphere1", t=(1, 2, 3), absolute=True, objectSpace=True)
+
+        with nodex.deferred():
+            self.assertTrue(nodex.graph.isDeferred())
+            result = Nodex("pSphere1.translate") * 2.0 + (0, 1, 0)
+
+            # Results behave as Nodex while the nodes don't exist yet
+            self.assertEqual(result.dimensions(), 3)
+            self.assertEqual(result[0].dimensions(), 1)
+            self.assertEqual(result[:2].dimensions(), 2)
+            length = result.length()
+            result.connect("pSphere2.translate")
+            self.assertEqual(mc.ls(type=("multiplyDivide", "plusMinusAverage", "distanceBetween")), [])
+
+        self.assertFalse(nodex.graph.isDeferred())
+        self.assertEqual(len(mc.ls(type=("multiplyDivide", "plusMinusAverage", "distanceBetween"))), 3)
+        self.assertEqual(tuple(result.value()), (2.0, 5.0, 6.0))
+        self.assertEqual(mc.getAttr("pSphere2.translate")[0], (2.0, 5.0, 6.0))
+        self.assertAlmostEqual(length.value(), 65 ** 0.5, places=5)
+
+    def test_deferred_value(self):
+        """ Getting a value while deferred creates the nodes recorded up to then. """
+        with nodex.deferred():
+            result = Nodex("pSphere1.translateX") + 2.0
+            self.assertEqual(result.value(), 2.0)
+            result = result * 3.0
+        self.assertEqual(result.value(), 6.0)
+
+    def test_deferred_flatten(self):
+        """ Chained sums and matrix multiplications are built as a single node. """
+        with nodex.deferred():
+            result = Nodex("pSphere1.translateX") + Nodex("pSphere1.translateY") + Nodex("pSphere1.translateZ") + 1.0
+            partial = Nodex("pSphere2.translateX") + Nodex("pSphere2.translateY")
+            total = partial + Nodex("pSphere2.translateZ")
+            matrix = Nodex("pSphere1.worldMatrix[0]")
+            product = matrix * matrix.inverse() * matrix
+        self.assertEqual(len(mc.ls(type="plusMinusAverage")), 2)
+        self.assertEqual(len(mc.ls(type="multMatrix")), 1)
+        self.assertEqual(mc.getAttr(product.plug().nodeName() + ".matrixIn", size=True), 3)
+        self.assertEqual(result.value(), 1.0)
+        self.assertEqual(total.value(), 0.0)
+
+        # The node that was absorbed is created when requested
+        self.assertEqual(partial.value(), 0.0)
+        self.assertEqual(len(mc.ls(type="plusMinusAverage")), 3)
+
+    def test_deferred_product(self):
+        """ Chained matrix multiplications are built as a single node, adjacent constants are multiplied. """
+        matrix = Nodex("pSphere1.worldMatrix[0]")
+        scale = Nodex([2, 0, 0, 0, 0, 2, 0, 0, 0, 0, 2, 0, 0, 0, 0, 1])
+        translate = Nodex([1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 1, 2, 3, 1])
+        with nodex.deferred():
+            product = matrix * scale * translate * matrix.inverse() * Nodex("pSphere2.worldMatrix[0]")
+        self.assertEqual(len(mc.ls(type="multMatrix")), 1)
+        self.assertEqual(mc.getAttr(product.plug().nodeName() + ".matrixIn", size=True), 4)
+
+        constant = scale * translate
+        self.assertTrue(constant.isConstant())
+        self.assertEqual(nodex.utils.constantValues(constant, 16),
+                         (2.0, 0.0, 0.0, 0.0, 0.0, 2.0, 0.0, 0.0, 0.0, 0.0, 2.0, 0.0, 1.0, 2.0, 3.0, 1.0))
+
+    def test_deferred_pack(self):
+        """ Independent scalar operations share the channels of a node. """
+        mc.xform("pSphere1", t=(1, 2, 3), absolute=True, objectSpace=True)
+        tx, ty, tz = Nodex("pSphere1.translateX"), Nodex("pSphere1.translateY"), Nodex("pSphere1.translateZ")
+
+        with nodex.deferred(pack=True):
+            products = [tx * 2, ty * 3, tz * 4, tx * 5]
+            sums = [tx + ty, ty + tz]
+            conditions = [Math.greaterThan(tx, ty, ifTrue=tz), Math.greaterThan(tx, ty, ifTrue=tx, ifFalse=tz)]
+            dependent = products[0] * ty
+            dependent.connect("pSphere2.translateX")
+
+        # the dependent multiplication can't share the node of its input
+        self.assertEqual(len(mc.ls(type="multiplyDivide")), 3)
+        self.assertEqual(len(mc.ls(type="plusMinusAverage")), 1)
+        self.assertEqual(len(mc.ls(type="condition")), 1)
+        self.assertEqual([x.value() for x in products], [2.0, 6.0, 12.0, 5.0])
+        self.assertEqual([x.value() for x in sums], [3.0, 5.0])
+        self.assertEqual([x.value() for x in conditions], [0.0, 3.0])
+        self.assertEqual(mc.getAttr("pSphere2.translateX"), 4.0)
+
+    def test_deferred_discard(self):
+        with self.assertRaises(ValueError):
+            with nodex.deferred():
+                result = Nodex("pSphere1.translate") * 2.0
+                raise ValueError()
+
+        self.assertEqual(mc.ls(type="multiplyDivide"), [])
+        with self.assertRaises(RuntimeError):
+            result.value()
+
+
+class TestBuildSession(unittest.TestCase):
+    def setUp(self):
+        mc.file(new=True, force=True)
+        mc.polySphere()  # "pSphere1"
+        mc.undoInfo(state=True)
+
+    def test_build_session(self):
+        with nodex.build_session() as statistics:
+            result = Nodex("pSphere1.translate") * 2.0 + (0, 1, 0)
+            result.connect("pSphere1.scale")
+        self.assertEqual(statistics["nodes"], 2)
+        self.assertEqual(statistics["connections"], 3)
+        self.assertGreater(statistics["seconds"], 0.0)
+
+        # The whole build undoes as one step
+        mc.undo()
+        self.assertEqual(mc.ls(type=("multiplyDivide", "plusMinusAverage")), [])
+
+    def test_build_session_flatten(self):
+        """ Chained sums and matrix products are built as a single node, like within `nodex.deferred()`. """
+        with nodex.build_session():
+            total = Nodex("pSphere1.tx") + Nodex("pSphere1.ty") + Nodex("pSphere1.tz") + Nodex("pSphere1.sx")
+            matrix = Nodex("pSphere1.worldMatrix[0]")
+            product = matrix * matrix.inverse() * matrix * matrix
+        self.assertEqual(len(mc.ls(type="plusMinusAverage")), 1)
+        self.assertEqual(mc.getAttr(total.plug().nodeName() + ".input1D", size=True), 4)
+        self.assertEqual(total.value(), 1.0)
+        self.assertEqual(len(mc.ls(type="multMatrix")), 1)
+        self.assertEqual(mc.getAttr(product.plug().nodeName() + ".matrixIn", size=True), 4)
+
+    def test_build_session_restore(self):
+        """ The undo state is restored, also when an error is raised. """
+        with self.assertRaises(ValueError):
+            with nodex.build_session(undo=False):
+                self.assertFalse(mc.undoInfo(query=True, state=True))
+                raise ValueError()
+        self.assertTrue(mc.undoInfo(query=True, state=True))
+
+        # also when setting up the session fails after undo was disabled
+        import nodex.session
+        cmds = nodex.session.mc
+
+        class FailingRefresh(object):
+            def __getattr__(self, name):
+                return getattr(cmds, name)
+
+            @staticmethod
+            def refresh(**kwargs):
+                raise RuntimeError()
+
+        nodex.session.mc = FailingRefresh()
+        try:
+            with self.assertRaises(RuntimeError):
+                with nodex.build_session(undo=False):
+                    pass
+        finally:
+            nodex.session.mc = cmds
+        self.assertTrue(mc.undoInfo(query=True, state=True))
+
+
 class TestExampleGraphs(unittest.TestCase):
     def test_scene1(self):
         mc.file(new=True, force=True)
@@ -640,6 +1037,732 @@ class TestExampleGraphs(unittest.TestCase):
 
         print sphere2.getTranslation()
 
+class FakeCmds(object):
+    """ Minimal local stand-in for the `maya.cmds` queries used to resolve plug metadata and the commands used by
+        the `nodex.backend.CmdsBackend`.
+
+        :param nodes: Mapping of node name to node type.
+        :param attrs: Mapping of (node type, attribute) to (attribute type, multi, children)
+    """
+    def __init__(self, nodes, attrs):
+        self.nodes = nodes
+        self.attrs = attrs
+        self.calls = []
+        self.values = {}
+        self.connections = []
+        self.sizes = {}
+        self.indices = {}
+        self.history = {}       # node -> the upstream nodes in the scene
+
+    def _attr(self, plug):
+        node, _, attr = plug.partition(".")
+        attr = attr.rsplit(".", 1)[-1].split("[")[0]
+        return self.attrs[(self.nodes[node], attr)]
+
+    def objExists(self, name):
+        self.calls.append("objExists")
+        node, _, attr = name.partition(".")
+        return node in self.nodes
+
+    def nodeType(self, node):
+        self.calls.append("nodeType")
+        return self.nodes[node]
+
+    def getAttr(self, plug, type=False, size=False, multiIndices=False):
+        self.calls.append("getAttr")
+        if size:
+            return self.sizes.get(plug, 0)
+        if multiIndices:
+            return self.indices.get(plug)
+        return self._attr(plug)[0]
+
+    def attributeQuery(self, attr, node=None, multi=False, listChildren=False):
+        self.calls.append("attributeQuery")
+        attrType, isMulti, children = self.attrs[(self.nodes[node], attr)]
+        if multi:
+            return isMulti
+        if listChildren:
+            return list(children) if children else None
+
+    def listAttr(self, node, userDefined=False):
+        self.calls.append("listAttr")
+        return None
+
+    def createNode(self, nodeType, name=None):
+        self.calls.append("createNode")
+        name = name or nodeType
+        while name in self.nodes:
+            name += "1"
+        self.nodes[name] = nodeType
+        return name
+
+    def setAttr(self, plug, *values, **kwargs):
+        self.calls.append("setAttr")
+        self.values[plug] = values
+
+    def connectAttr(self, source, destination, force=False):
+        self.calls.append("connectAttr")
+        self.connections.append((source, destination))
+
+    def delete(self, nodes):
+        self.calls.append("delete")
+        for node in nodes:
+            del self.nodes[node]
+
+    def listHistory(self, nodes):
+        self.calls.append("listHistory")
+        nodes = [nodes] if isinstance(nodes, basestring) else nodes
+        return [x for node in nodes for x in self.history.get(node, [node])]
+
+    def listConnections(self, plug, source=True, destination=True, type=None):
+        self.calls.append("listConnections")
+        return [d.partition(".")[0] for s, d in self.connections
+                if destination and s == plug and (type is None or self.nodes[d.partition(".")[0]] == type)] or None
+
+
+class TestPlugInfo(unittest.TestCase):
+    def setUp(self):
+        self._cmds = nodex.utils.mc
+        nodex.utils.mc = FakeCmds(nodes={"a": "transform", "b": "transform"},
+                                  attrs={("transform", "translate"): ("double3", False, ("tx", "ty", "tz")),
+                                         ("transform", "tx"): ("doubleLinear", False, ()),
+                                         ("transform", "worldMatrix"): ("matrix", True, ())})
+        nodex.utils.clearPlugInfoCache()
+
+    def tearDown(self):
+        nodex.utils.mc = self._cmds
+        nodex.utils.clearPlugInfoCache()
+
+    def test_plug_info(self):
+        info = nodex.utils.plugInfo("a.translate")
+        self.assertEqual(info.type, "double3")
+        self.assertFalse(info.isArray)
+        self.assertTrue(info.isCompound)
+        self.assertEqual(info.numChildren, 3)
+        self.assertFalse(info.isMatrix)
+
+        info = nodex.utils.plugInfo("a.worldMatrix")
+        self.assertTrue(info.isArray)
+        self.assertTrue(info.isMatrix)
+
+        # elements of an array attribute are not an array themselves
+        info = nodex.utils.plugInfo("a.worldMatrix[0]")
+        self.assertFalse(info.isArray)
+        self.assertTrue(info.isMatrix)
+
+        with self.assertRaises(TypeError):
+            nodex.utils.resolvePlug("c.translate")
+
+    def test_plug_info_cache(self):
+        fake = nodex.utils.mc
+        nodex.utils.plugInfo("a.translate")
+        self.assertIn("getAttr", fake.calls)
+
+        # The same attribute on another node of the same type is served from the cache
+        fake.calls[:] = []
+        info = nodex.utils.plugInfo("b.translate")
+        self.assertEqual(info.numChildren, 3)
+        self.assertNotIn("getAttr", fake.calls)
+        self.assertNotIn("attributeQuery", fake.calls)
+
+        # A resolved plug doesn't query the scene again for its metadata
+        plug = nodex.utils.resolvePlug("b.worldMatrix[1]")
+        plug.info()
+        fake.calls[:] = []
+        plug.info()
+        nodex.utils.plugInfo(plug)
+        self.assertEqual(fake.calls, [])
+
+        # The scene change callbacks clear the cache
+        nodex.utils.clearPlugInfoCache()
+        fake.calls[:] = []
+        nodex.utils.plugInfo("b.translate")
+        self.assertIn("getAttr", fake.calls)
+
+    def test_matrix_probe(self):
+        """ The type of a matrix attribute that was never set is resolved without setting the attribute. """
+        fake = nodex.utils.mc
+        fake.nodes["matrixNode1"] = "matrixNode"
+        fake.attrs[("matrixNode", "matrixIn")] = (None, True, ())
+        nodex.utils._matrixAttributes[("matrixNode", "matrixIn")] = True     # as memoized by the om2 probe
+
+        try:
+            for i in range(4):
+                info = nodex.utils.plugInfo("matrixNode1.matrixIn[{0}]".format(i))
+                self.assertTrue(info.isMatrix)
+                self.assertEqual(info.type, "matrix")
+            self.assertTrue(nodex.utils.isMatrixAttribute("matrixNode1.matrixIn[5]"))
+            self.assertTrue(nodex.utils.plugInfo("matrixNode1.matrixIn").isArray)
+        finally:
+            del nodex.utils._matrixAttributes[("matrixNode", "matrixIn")]
+
+        # Only the first element queried the scene (the FakeCmds has no setAttr so any set would've failed)
+        self.assertEqual(fake.calls.count("getAttr"), 2)
+
+    def test_node_schema(self):
+        """ The attributes of the nodes created by the node helpers are never queried from the scene. """
+        fake = nodex.utils.mc
+        fake.nodes["multMatrix1"] = "multMatrix"
+        fake.nodes["plusMinusAverage1"] = "plusMinusAverage"
+
+        self.assertTrue(nodex.utils.plugInfo("multMatrix1.matrixIn[3]").isMatrix)
+        self.assertTrue(nodex.utils.plugInfo("multMatrix1.matrixIn").isArray)
+        info = nodex.utils.plugInfo("plusMinusAverage1.input3D[2]")
+        self.assertEqual(info.children, ("input3Dx", "input3Dy", "input3Dz"))
+        self.assertFalse(info.isArray)
+        self.assertEqual(nodex.utils.plugInfo("plusMinusAverage1.input3D[2].input3Dy").type, "double")
+        self.assertNotIn("getAttr", fake.calls)
+        self.assertNotIn("attributeQuery", fake.calls)
+
+    def test_plug_info_cache_bounded(self):
+        cache = nodex.utils._LRUCache(2)
+        cache.set(1, 1)
+        cache.set(2, 2)
+        cache.get(1)
+        cache.set(3, 3)
+        self.assertIn(1, cache)
+        self.assertNotIn(2, cache)
+        self.assertEqual(len(cache), 2)
+
+
+class FakeOpenMaya(object):
+    """ Minimal local stand-in for the `maya.api.OpenMaya` classes used by the `nodex.modifier.ModifierBackend` and
+        `nodex.readback`. The plugs read their value from `values` by name.
+    """
+    values = {}
+    calls = []
+    frame = 0.0
+
+    @staticmethod
+    def value(name):
+        value = FakeOpenMaya.values[name]
+        return value(FakeOpenMaya.frame) if callable(value) else value
+
+    class MPlug(object):
+        isDestination = False
+
+        def __init__(self, name):
+            self._name = name
+
+        def name(self):
+            return self._name
+
+        def asDouble(self):
+            FakeOpenMaya.calls.append("asDouble")
+            return FakeOpenMaya.value(self._name)
+
+        def asMDistance(self):
+            FakeOpenMaya.calls.append("asMDistance")
+            return FakeOpenMaya.MDistance(FakeOpenMaya.value(self._name))
+
+        def asMObject(self):
+            return FakeOpenMaya.value(self._name)
+
+        def child(self, attribute):
+            return FakeOpenMaya.MPlug("{0}.{1}".format(self._name, attribute))
+
+        def elementByLogicalIndex(self, index):
+            return FakeOpenMaya.MPlug("{0}[{1}]".format(self._name, index))
+
+    class MFnMatrixData(object):
+        def __init__(self, mobject):
+            self._matrix = mobject
+
+        def matrix(self):
+            return self._matrix
+
+    class MDistance(object):
+        def __init__(self, value):
+            self._value = value
+
+        def asUnits(self, unit):
+            return self._value
+
+        @staticmethod
+        def uiUnit():
+            return None
+
+    class MTime(object):
+        def __init__(self, value, unit):
+            self.value = value
+
+        @staticmethod
+        def uiUnit():
+            return None
+
+    class MDGContext(object):
+        def __init__(self, time=None):
+            self._time = time
+
+        def makeCurrent(self):
+            previous = FakeOpenMaya.MDGContext(FakeOpenMaya.MTime(FakeOpenMaya.frame, None))
+            FakeOpenMaya.frame = self._time.value
+            return previous
+
+    class MSelectionList(object):
+        def add(self, name):
+            FakeOpenMaya.calls.append("add")
+            self._name = name
+
+        def getPlug(self, index):
+            return FakeOpenMaya.MPlug(self._name)
+
+        def getDependNode(self, index):
+            return {"name": self._name}
+
+    class MFnDependencyNode(object):
+        def __init__(self, mobject):
+            self._mobject = mobject
+
+        def findPlug(self, attr, wantNetworkedPlug):
+            return FakeOpenMaya.MPlug("{0}.{1}".format(self._mobject["name"], attr))
+
+        def attribute(self, attr):
+            return attr
+
+    class MDGModifier(object):
+        def __init__(self):
+            self.operations = []
+            self.done = False
+
+        def createNode(self, nodeType):
+            return {"type": nodeType, "name": None}
+
+        def renameNode(self, mobject, name):
+            mobject["name"] = name
+            self.operations.append(("createNode", mobject["type"], name))
+
+        def connect(self, source, destination):
+            self.operations.append(("connect", source.name(), destination.name()))
+
+        def commandToExecute(self, command):
+            self.operations.append(("command", command))
+
+        def doIt(self):
+            self.done = True
+
+
+class TestBackend(unittest.TestCase):
+    def setUp(self):
+        self._cmds = nodex.utils.mc
+        nodex.utils.mc = FakeCmds(nodes={"a": "transform", "b": "transform"},
+                                  attrs={("transform", "tx"): ("doubleLinear", False, ()),
+                                         ("transform", "translate"): ("double3", False,
+                                                                      ("translateX", "translateY", "translateZ")),
+                                         ("transform", "translateX"): ("doubleLinear", False, ()),
+                                         ("transform", "translateY"): ("doubleLinear", False, ()),
+                                         ("transform", "translateZ"): ("doubleLinear", False, ()),
+                                         ("transform", "weights"): ("double", True, ())})
+        nodex.utils.clearPlugInfoCache()
+        nodex.utils.clearNodeCache()
+
+    def tearDown(self):
+        nodex.utils.mc = self._cmds
+        nodex.utils.clearPlugInfoCache()
+        nodex.utils.clearNodeCache()
+
+    def test_cmds_backend(self):
+        """ The nodes are built with the commands of the backend, without creating any pymel objects. """
+        import nodex.backend
+        fake = nodex.utils.mc
+        with nodex.backend.using(nodex.backend.CmdsBackend(fake)):
+            result = Nodex("a.tx") * Nodex("b.tx")
+            result.connect("b.tx")
+        self.assertIsNot(nodex.backend.current().cmds, fake)     # restored after the context
+
+        self.assertEqual(fake.nodes["multiply"], "multiplyDivide")
+        self.assertEqual(fake.values["multiply.operation"], (1,))
+        self.assertEqual(fake.connections, [("a.tx", "multiply.input1.input1X"),
+                                            ("b.tx", "multiply.input2.input2X"),
+                                            ("multiply.output.outputX", "b.tx")])
+        self.assertEqual(result.plug().name(), "multiply.output.outputX")
+        self.assertIsNone(result.plug()._attribute)
+
+    def test_connect_parent(self):
+        """ Connecting all children of a compound attribute is done with a single connection of the parents. """
+        import nodex.backend
+        fake = nodex.utils.mc
+        with nodex.backend.using(nodex.backend.CmdsBackend(fake)):
+            children = Nodex("a.translate")[0:3]
+            children.connect("b.translate")
+            Nodex("b.translate").connect(Nodex(["a.translate.translateX", "a.translate.translateY",
+                                                "a.translate.translateZ"]))
+            Nodex(["b.translate.translateZ", "b.translate.translateY", "b.translate.translateX"]).connect("a.translate")
+            Nodex(2.0).connect("b.translate")
+        self.assertEqual(fake.connections, [("a.translate", "b.translate"),
+                                            ("b.translate", "a.translate"),
+                                            ("b.translate.translateZ", "a.translate.translateX"),
+                                            ("b.translate.translateY", "a.translate.translateY"),
+                                            ("b.translate.translateX", "a.translate.translateZ")])
+        self.assertEqual(fake.calls.count("connectAttr"), 5)
+        self.assertEqual(fake.values["b.translate"], (2.0, 2.0, 2.0))
+        self.assertEqual(fake.calls.count("setAttr"), 1)
+
+    def test_reference_metadata(self):
+        """ The kind and dimensions of the reference are computed once, array sizes are cached until invalidated. """
+        fake = nodex.utils.mc
+        mixed = Nodex(["a.translate.translateX", 1.0])
+        self.assertEqual((mixed.dimensions(), mixed.isAttribute(), mixed.isConstant()), (2, False, False))
+        self.assertTrue(Nodex(["a.translate.translateX", "a.tx"]).isAttribute())
+        self.assertTrue(Nodex("a.tx").isSingleNumeric())
+        self.assertFalse(Nodex("a.translate").isSingleNumeric())
+
+        fake.sizes["a.weights"] = 2
+        weights = Nodex("a.weights")
+        self.assertEqual(weights.dimensions(), 2)
+        fake.sizes["a.weights"] = 4
+        calls = len(fake.calls)
+        self.assertEqual(weights.dimensions(), 2)
+        self.assertEqual(len(fake.calls), calls)
+        weights.refresh()
+        self.assertEqual(weights.dimensions(), 4)
+
+    def test_profile(self):
+        """ The created nodes and connections are attributed to the method that caused them, and the wrapped
+            functions are restored afterwards.
+        """
+        import nodex.backend
+        import nodex.instrument
+        new, mathSum = vars(Nodex)["__new__"], vars(Math)["sum"]
+        with nodex.backend.using(nodex.backend.CmdsBackend(nodex.utils.mc)):
+            with nodex.instrument.profile() as report:
+                result = Nodex("a.tx") * Nodex("b.tx")
+                result.connect("b.tx")
+                Math.sum(Nodex("a.tx"), result)
+        self.assertIs(vars(Nodex)["__new__"], new)
+        self.assertIs(vars(Math)["sum"], mathSum)
+        self.assertEqual(report["Numerical.__mul__"]["createNode.multiplyDivide"]["count"], 1)
+        self.assertEqual(report["Numerical.__mul__"]["connectAttr"]["count"], 2)
+        self.assertEqual(report["Nodex.connect"]["connectAttr"]["count"], 1)
+        self.assertEqual(report["Math.sum"]["createNode.plusMinusAverage"]["count"], 1)
+        self.assertEqual(report["Math.sum"]["connectAttr"]["count"], 2)
+        self.assertEqual(report.totals()["connectAttr"]["count"], 5)
+        self.assertIn("Nodex.__new__", report[nodex.instrument.TOPLEVEL])
+        self.assertEqual(json.loads(report.toJSON()), report)
+
+    def test_simplification_immediate(self):
+        """ Chained operations are only combined while deferred, immediate mode leaves the existing nodes alone. """
+        import nodex.backend
+        fake = nodex.utils.mc
+        x = Nodex("a.tx")
+        with nodex.backend.using(nodex.backend.CmdsBackend(fake)):
+            (x * 2) * 3
+            -(-x)
+            (x ** 2) ** 3
+            self.assertEqual(fake.nodes.values().count("multiplyDivide"), 6)
+            self.assertEqual(len(fake.connections), 6)      # the inner nodes drive the outer ones
+
+            with nodex.deferred():
+                (x * 2) * 3
+                self.assertIs((-(-x)).plug(), x.plug())
+                (x ** 2) ** 3
+            self.assertEqual(fake.nodes.values().count("multiplyDivide"), 8)
+
+    def test_deferred_pack_scene_dependency(self):
+        """ Operations don't share a node when one reads from an existing node that the other one drives. """
+        import nodex.backend
+        import nodex.packing
+        cmds, fake = nodex.packing.mc, nodex.utils.mc
+        nodex.packing.mc = fake
+        fake.nodes["c"] = "transform"
+        fake.history["b"] = ["b", "a"]      # a drives b in the scene
+        try:
+            with nodex.backend.using(nodex.backend.CmdsBackend(fake)):
+                with nodex.deferred(pack=True):
+                    driver = Nodex("c.tx") * 2
+                    driver.connect("a.tx")
+                    driven = Nodex("b.tx") * 3
+                    independent = Nodex("c.tx") * 4
+        finally:
+            nodex.packing.mc = cmds
+        self.assertEqual(fake.nodes.values().count("multiplyDivide"), 2)
+        self.assertEqual(driver.plug().nodeName(), independent.plug().nodeName())
+        self.assertNotEqual(driven.plug().nodeName(), driver.plug().nodeName())
+
+    def test_delete_unused(self):
+        """ Only the unused nodes that nodex created in the current scene are deleted after baking. """
+        import nodex.backend
+        import nodex.baking
+        cmds, fake = nodex.baking.mc, nodex.utils.mc
+        nodex.baking.mc = fake
+        nodex.graph.forgetCreatedNodes()
+        try:
+            with nodex.backend.using(nodex.backend.CmdsBackend(fake)):
+                built = (Nodex("a.tx") * 2).plug().nodeName()
+            handmade = fake.createNode("multiplyDivide", name="handmade")
+            self.assertEqual(nodex.graph.createdNodes(), set([built]))
+            nodex.baking._deleteUnused([built, handmade])
+        finally:
+            nodex.baking.mc = cmds
+        self.assertNotIn(built, fake.nodes)
+        self.assertIn(handmade, fake.nodes)
+
+    def test_build_session_nested(self):
+        """ Nested in a deferred build the session builds the outer graph within its scope and counts it. """
+        import nodex.backend
+        import nodex.session
+        fake = nodex.utils.mc
+        calls = []
+        fake.undoInfo = lambda **kwargs: calls.append(("undoInfo", "openChunk" in kwargs))
+        fake.refresh = lambda **kwargs: calls.append(("refresh", kwargs["suspend"]))
+        createNode = fake.createNode
+        fake.createNode = lambda *args, **kwargs: calls.append(("createNode", None)) or createNode(*args, **kwargs)
+        cmds, nodex.session.mc = nodex.session.mc, fake
+        try:
+            with nodex.backend.using(nodex.backend.CmdsBackend(fake)):
+                with nodex.deferred():
+                    with nodex.build_session() as statistics:
+                        result = Nodex("a.tx") * 2
+                        result.connect("b.tx")
+                    self.assertFalse(result.plug().handle().isPending())
+                    after = Nodex("a.tx") * 3
+                    self.assertTrue(after.plug().handle().isPending())
+        finally:
+            nodex.session.mc = cmds
+        self.assertEqual(calls, [("undoInfo", True), ("refresh", True), ("createNode", None),
+                                 ("refresh", False), ("undoInfo", False), ("createNode", None)])
+        self.assertEqual((statistics["nodes"], statistics["connections"]), (1, 2))
+
+    def test_modifier_backend(self):
+        """ Everything is queued in one modifier that is only applied when leaving the transaction. """
+        import nodex.modifier
+        fake = nodex.utils.mc
+        with nodex.modifier.transaction(undoable=False, api=FakeOpenMaya, cmds=fake) as backend:
+            result = Nodex("a.tx") + Nodex("b.tx") * 2
+            result.connect("b.tx")
+            self.assertFalse(backend.modifier.done)
+        self.assertTrue(backend.modifier.done)
+
+        self.assertEqual(backend.modifier.operations, [
+            ("createNode", "multiplyDivide", "multiply"),
+            ('command', 'setAttr "multiply.operation" 1'),
+            ("connect", "b.tx", "multiply.input1.input1X"),
+            ('command', 'setAttr "multiply.input2.input2X" 2'),
+            ("createNode", "plusMinusAverage", "sum"),
+            ('command', 'setAttr "sum.operation" 1'),
+            ("connect", "a.tx", "sum.input1D[0]"),
+            ("connect", "multiply.output.outputX", "sum.input1D[1]"),
+            ("connect", "sum.output1D", "b.tx")])
+        self.assertEqual(backend.counts, {"createNode": 2, "connectAttr": 4, "setAttr": 3, "lockAttr": 0,
+                                          "addAttr": 0})
+        self.assertNotIn("createNode", fake.calls)
+
+        # Strings are quoted and escaped, locks are counted like the other commands
+        with nodex.modifier.transaction(undoable=False, api=FakeOpenMaya, cmds=fake) as backend:
+            backend.setAttr("a.notes", ('say "hi"\\n',), attrType="string")
+            backend.lockAttr("a.notes")
+        self.assertEqual(backend.modifier.operations, [
+            ('command', 'setAttr -type "string" "a.notes" "say \\"hi\\"\\\\n"'),
+            ('command', 'setAttr -lock true "a.notes"')])
+        self.assertEqual(backend.counts, {"createNode": 0, "connectAttr": 0, "setAttr": 1, "lockAttr": 1,
+                                          "addAttr": 0})
+
+        # Nothing is applied when an error is raised
+        with self.assertRaises(ValueError):
+            with nodex.modifier.transaction(undoable=False, api=FakeOpenMaya, cmds=fake) as backend:
+                Nodex("a.tx") * 3
+                raise ValueError()
+        self.assertFalse(backend.modifier.done)
+
+    def test_modifier_lookup_table(self):
+        """ A lookup table on an attribute is tagged with the commands of the modifier, its curve doesn't exist yet. """
+        import nodex.modifier
+        fake = nodex.utils.mc
+        square = lambda x: x * x
+        with nodex.modifier.transaction(undoable=False, api=FakeOpenMaya, cmds=fake) as backend:
+            Math.lookupTable(square, 0.0, 1.0, input=Nodex("a.tx"))
+        operations = backend.modifier.operations
+        self.assertEqual(operations[0], ("createNode", "animCurveUU", "lookupTable"))
+        digest = nodex.utils._keysDigest(nodex.utils.sampleFunction(square, 0.0, 1.0))
+        self.assertEqual(operations[-3:], [
+            ('command', 'addAttr -longName "nodexLookupTable" -dataType "string" "lookupTable"'),
+            ('command', 'setAttr -type "string" "lookupTable.nodexLookupTable" "{0}"'.format(digest)),
+            ("connect", "a.tx", "lookupTable.input")])
+        self.assertEqual(backend.counts["addAttr"], 1)
+        self.assertNotIn("createNode", fake.calls)
+
+
+class TestReadback(unittest.TestCase):
+    def setUp(self):
+        self._cmds = nodex.utils.mc
+        nodex.utils.mc = FakeCmds(nodes={"a": "transform", "b": "transform"},
+                                  attrs={("transform", "tx"): ("doubleLinear", False, ()),
+                                         ("transform", "v"): ("double", False, ()),
+                                         ("transform", "worldMatrix"): ("matrix", True, ()),
+                                         ("transform", "weights"): ("double", True, ())})
+        nodex.utils.clearPlugInfoCache()
+        FakeOpenMaya.values = {"a.tx": 1.0, "a.v": 2.0, "b.tx": 3.0}
+        FakeOpenMaya.calls = []
+
+    def tearDown(self):
+        nodex.utils.mc = self._cmds
+        nodex.utils.clearPlugInfoCache()
+
+    def test_values(self):
+        """ Each node is resolved once and each distinct plug is read once, returned as plain values. """
+        import nodex.readback
+        result = nodex.readback.values([Nodex("a.tx"), Nodex(["a.v", 5.0, "b.tx"]), Nodex("a.tx"), 4.0, (1, 2)],
+                                       api=FakeOpenMaya)
+        self.assertEqual(result, [1.0, (2.0, 5.0, 3.0), 1.0, 4.0, (1.0, 2.0)])
+        self.assertEqual(FakeOpenMaya.calls.count("add"), 2)
+        self.assertEqual(FakeOpenMaya.calls.count("asMDistance"), 2)
+        self.assertEqual(FakeOpenMaya.calls.count("asDouble"), 1)
+
+        with self.assertRaises(ValueError):
+            nodex.readback.values([Nodex("a.tx"), (1, 2)], asArray=True, api=FakeOpenMaya)
+
+        # array attributes hold the values of their existing elements
+        matrix = tuple(float(i) for i in range(16))
+        nodex.utils.mc.indices = {"a.worldMatrix": [0], "a.weights": [0, 3]}
+        FakeOpenMaya.values.update({"a.worldMatrix[0]": matrix, "a.weights[0]": 0.5, "a.weights[3]": 0.25})
+        self.assertEqual(nodex.readback.values([Nodex("a.worldMatrix"), Nodex("a.weights")], api=FakeOpenMaya),
+                         [matrix, (0.5, 0.25)])
+
+    def test_sample(self):
+        """ The plugs are resolved once and read within the context of each frame, the current frame is restored. """
+        import nodex.baking
+        FakeOpenMaya.values["a.tx"] = lambda frame: frame * 2.0
+        FakeOpenMaya.frame = 5.0
+        plugs = [Nodex("a.tx").plug(), Nodex("a.v").plug()]
+        result = nodex.baking.sample(plugs, nodex.baking.frameRange(1, 2, step=0.5), api=FakeOpenMaya)
+        self.assertEqual(result, {plugs[0].key(): [2.0, 3.0, 4.0], plugs[1].key(): [2.0, 2.0, 2.0]})
+        self.assertEqual(FakeOpenMaya.calls.count("add"), 1)
+        self.assertEqual(FakeOpenMaya.frame, 5.0)
+
+    def test_reduce_keys(self):
+        """ Only the keys needed to stay within the tolerance of the samples are kept. """
+        import math
+        import nodex.baking
+        frames = nodex.baking.frameRange(0, 100)
+        self.assertEqual(nodex.utils.reduceKeys(frames, [1.0] * len(frames)), [0])
+        self.assertEqual(nodex.utils.reduceKeys(frames, [x * 0.5 for x in frames]), [0, 100])
+        self.assertEqual(nodex.utils.reduceKeys(frames, [abs(x - 40.0) for x in frames]), [0, 40, 100])
+
+        values = [math.sin(x * 0.05) for x in frames]
+        keys = nodex.utils.reduceKeys(frames, values, tolerance=1e-2)
+        self.assertLess(len(keys), len(frames) / 4)
+        for i, frame in enumerate(frames):
+            j = max(k for k in keys if k <= i)
+            k = min(k for k in keys if k >= i)
+            interpolated = values[j] if j == k else values[j] + (values[k] - values[j]) * (i - j) / float(k - j)
+            self.assertLessEqual(abs(interpolated - values[i]), 1e-2)
+
+
+class TestEvaluate(unittest.TestCase):
+    def setUp(self):
+        try:
+            import numpy
+        except ImportError:
+            raise unittest.SkipTest("NumPy is not available")
+
+    def test_evaluate(self):
+        """ The recorded network is evaluated for all samples at once, matching the values folded in Python. """
+        import numpy
+        import nodex.evaluate
+
+        def expressions(a, b, s):
+            return [a - b, a / b, (a * s) ** 2.0, a.dot(b), a.cross(b, normalizeOutput=True),
+                    a.distanceTo(b), Math.greaterThan(s, 1.0, ifTrue=a, ifFalse=b), Nodex([a[0], 1.0, b[2]])]
+
+        samples = [((1.0, 2.0, 3.0), (-2.0, 0.5, 4.0), 0.5), ((0.0, -1.0, 2.0), (3.0, 1.0, -1.0), 2.0)]
+        with nodex.evaluate.record() as recording:
+            results = recording.evaluate(
+                expressions(recording.input("a", 3), recording.input("b", 3), recording.input("s")),
+                {"a": [x[0] for x in samples], "b": [x[1] for x in samples], "s": [x[2] for x in samples]})
+
+        for i, (a, b, s) in enumerate(samples):
+            for folded, result in zip(expressions(Nodex(a), Nodex(b), Nodex(s)), results):
+                self.assertTrue(folded.isConstant())
+                self.assertTrue(numpy.allclose(nodex.utils.constantValues(folded, folded.dimensions()), result[i]))
+
+    def test_matrix(self):
+        """ Decomposing a composed matrix returns its inputs. """
+        import numpy
+        import nodex.evaluate
+
+        with nodex.evaluate.record() as recording:
+            translate, rotate = recording.input("translate", 3), recording.input("rotate", 3)
+            matrix = nodex.datatypes.Matrix.compose(translate=translate, rotate=rotate, scale=(1, 2, 3))
+            outputs = [matrix.decompose(chainAttr=x) for x in ("outputTranslate", "outputRotate", "outputScale")]
+            identity = matrix * matrix.inverse()
+
+        values = {"translate": [(1.0, 2.0, 3.0), (0.0, -4.0, 2.0)], "rotate": [(10.0, 20.0, 30.0), (-45.0, 0.0, 90.0)]}
+        translate, rotate, scale = recording.evaluate(outputs, values)
+        self.assertTrue(numpy.allclose(translate, values["translate"]))
+        self.assertTrue(numpy.allclose(rotate, values["rotate"]))
+        self.assertTrue(numpy.allclose(scale, (1, 2, 3)))
+        self.assertTrue(numpy.allclose(recording.evaluate(identity, values), numpy.eye(4)))
+
+        with self.assertRaises(KeyError):
+            recording.evaluate(outputs[0], {"translate": values["translate"]})
+
+    def test_lookup_table(self):
+        """ The keys are placed where the curvature demands and stay within the tolerance of the function. """
+        import math
+        import numpy
+        import nodex.evaluate
+
+        inputs, values = nodex.utils.sampleFunction(math.sin, 0.0, 2 * math.pi, tolerance=1e-3, steps=200)
+        self.assertLess(len(inputs), 100)
+        self.assertEqual(nodex.utils.sampleFunction(lambda x: 2.0 * x, 0.0, 1.0), ([0.0, 1.0], [0.0, 2.0]))
+
+        samples = numpy.linspace(-1.0, 8.0, 1000)
+        with nodex.evaluate.record() as recording:
+            x = recording.input("x")
+            result = recording.evaluate(Math.lookupTable(math.sin, 0.0, 2 * math.pi, input=x, tolerance=1e-3),
+                                        {"x": samples})
+        self.assertLessEqual(abs(result - numpy.sin(numpy.clip(samples, 0.0, 2 * math.pi))).max(), 1e-3)
+
+        # the table is shared and a constant is looked up in Python
+        self.assertEqual(len([key for key in nodex.utils._lookupTables._data if key[0] is math.sin]), 1)
+        folded = Math.lookupTable(math.sin, 0.0, 2 * math.pi, input=1.0, tolerance=1e-3)
+        self.assertTrue(folded.isConstant())
+        self.assertAlmostEqual(folded.value(), math.sin(1.0), delta=1e-3)
+
+
+class TestCost(unittest.TestCase):
+    def test_lowering(self):
+        """ Each operation is built with its cheapest recipe, the costs can be overridden per Maya version. """
+        import nodex.cost
+        import nodex.evaluate
+
+        def nodeTypes(build):
+            with nodex.evaluate.record() as recording:
+                build(recording.input("s"), recording.input("v", 3))
+            return [node.nodeType() for node in recording._nodes if node not in recording._inputs]
+
+        self.assertEqual(nodeTypes(lambda s, v: Math.abs(s)), ["distanceBetween"])
+        self.assertEqual(nodeTypes(lambda s, v: Math.abs(v)), ["multiplyDivide", "multiplyDivide"])
+        self.assertEqual(nodeTypes(lambda s, v: v.squareLength()), ["vectorProduct"])
+        self.assertEqual(nodeTypes(lambda s, v: Math.abs(Math.abs(s)).sign()), ["distanceBetween"])
+        self.assertEqual(nodeTypes(lambda s, v: s.sign()), ["condition"])
+
+        # distanceBetween only applies without unit conversions; for linear or unitless inputs in centimetres
+        def recipeNames(x):
+            return [recipe.name for _, recipe in nodex.cost.recipes("abs", Nodex(x))]
+        mc.file(new=True, force=True)
+        node = mc.createNode("transform")
+        self.assertEqual(recipeNames(node + ".translateX"), ["distance", "power"])
+        self.assertEqual(recipeNames(node + ".rotateX"), ["power"])
+        self.assertEqual(recipeNames([node + ".scaleX", node + ".rotateY"]), ["power"])
+        linearUnit = nodex.utils.linearUnit
+        nodex.utils.linearUnit = lambda: "in"
+        try:
+            self.assertEqual(recipeNames(node + ".scaleX"), ["power"])
+        finally:
+            nodex.utils.linearUnit = linearUnit
+
+        nodex.cost.registerNodeCost("distanceBetween", 5e-6, version=2017)
+        try:
+            self.assertEqual(nodex.cost.nodeCost("distanceBetween", version=2018).seconds, 5e-6)
+            self.assertEqual(nodex.cost.nodeCost("distanceBetween", version=2016),
+                             nodex.cost._costs[None]["distanceBetween"])
+            self.assertLess(nodex.cost.cost(["multiplyDivide"] * 2, version=2018),
+                            nodex.cost.cost(["distanceBetween"], version=2018))
+        finally:
+            del nodex.cost._costs[2017]
+
+
 class TestNodeHelper(unittest.TestCase):
     def test_complex(self):
 
@@ -1,5 +1,19 @@
-import pymel.core as pm
-import maya.cmds as mc
+# standard library
+import bisect
+import collections
+import contextlib
+import hashlib
+import operator
+import math
+import re
+
+# maya library, imported on first use
+from nodex.lazy import pymel, maya
+pm = pymel.core
+mc = maya.cmds
+
+# local library
+import nodex.graph
 
 # region convenience methods rewiring attributes
 
@@ -31,16 +45,997 @@ def attrReplaceInput(oldAttr, newAttr):
 
 
 def attrDimensions(attr):
-    if attr.isArray():
-        return attr.numElements()
-    elif attr.isCompound():
-        return attr.numChildren()
+    if isinstance(attr, pm.Attribute):
+        if attr.isArray():
+            return attr.numElements()
+        elif attr.isCompound():
+            return attr.numChildren()
+        else:
+            return 1
+
+    plug = resolvePlug(attr)
+    info = plug.info()
+    if info.isArray:
+        return arraySize(plug)
+    elif info.isCompound:
+        return info.numChildren
     else:
         return 1
 
 # endregion
 
 
+# region plug resolution
+class PlugInfo(collections.namedtuple('PlugInfo', ['type', 'isArray', 'isCompound', 'children', 'isMatrix'])):
+    """ The metadata of an attribute that is the same for all nodes of a node type.
+
+        The `type` is the attribute type as returned by `maya.cmds.getAttr(plug, type=True)`, `children` holds the
+        names of the child attributes of a compound attribute.
+    """
+    __slots__ = ()
+
+    @property
+    def numChildren(self):
+        return len(self.children)
+
+
+class _LRUCache(object):
+    """ Bounded mapping that discards the least recently used entries once it holds more than `maxSize` entries. """
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self._data = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            return default
+        self._data[key] = value     # re-insert as most recently used
+        return value
+
+    def set(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.maxSize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Known matrix attributes per node type, memoized further by `isMatrixAttribute()`
+_matrixAttributes = {}
+
+# Metadata of the static attributes per (node type, attribute path), see `registerNodeSchema()`
+_nodeSchemas = {}
+
+PLUG_INFO_CACHE_SIZE = 4096
+_plugInfoCache = _LRUCache(PLUG_INFO_CACHE_SIZE)
+_arraySizes = {}        # plug key -> number of elements, see `arraySize()`
+_sceneCallbacks = []
+_indexPattern = re.compile(r"\[\d*\]")
+
+
+class Plug(object):
+    """ Lightweight reference to an attribute on a node.
+
+        The node is referenced by its name, by a `maya.api.OpenMaya.MObjectHandle` (which keeps working after the
+        node got renamed) or by a `nodex.graph.Node` created by nodex (which might still be pending in a deferred
+        graph) plus the attribute path, eg. ``worldMatrix[0]`` or ``input3D[1].input3Dx``.
+
+        Querying the plug is done with `maya.cmds`, setting and connecting goes through `nodex.graph` so it can be
+        deferred. The metadata of the attribute is looked up
+        in the plug metadata cache (see `plugInfo()`). Only when pymel-specific behaviour is needed `attribute()`
+        returns the (heavier) `pymel.core.Attribute`.
+    """
+    __slots__ = ('_node', '_attr', '_nodeType', '_attribute', '_info')
+
+    def __init__(self, node, attr, nodeType=None, attribute=None):
+        self._node = node
+        self._attr = attr
+        self._nodeType = nodeType
+        self._attribute = attribute
+        self._info = None
+
+    @classmethod
+    def fromMObject(cls, mobject, attr, nodeType=None):
+        """ Create a plug that references the node by a `maya.api.OpenMaya.MObjectHandle` instead of its name. """
+        import maya.api.OpenMaya as om2
+        return cls(om2.MObjectHandle(mobject), attr, nodeType=nodeType)
+
+    def name(self):
+        """ Returns the full plug name, eg. ``pSphere1.translate`` """
+        if isinstance(self._node, nodex.graph.Node):
+            return self._node.plugName(self._attr)
+        return "{0}.{1}".format(self.nodeName(), self._attr)
+
+    def nodeName(self):
+        node = self._node
+        if isinstance(node, basestring):
+            return node
+
+        if isinstance(node, nodex.graph.Node):
+            return node.name()
+
+        # MObjectHandle
+        import maya.api.OpenMaya as om2
+        if not node.isValid():
+            raise RuntimeError("The node referenced by plug '{0}' no longer exists.".format(self._attr))
+        mobject = node.object()
+        if mobject.hasFn(om2.MFn.kDagNode):
+            return om2.MDagPath.getAPathTo(mobject).partialPathName()
+        return om2.MFnDependencyNode(mobject).name()
+
+    def attrName(self):
+        """ Returns the attribute path of the plug (without the node), eg. ``worldMatrix[0]`` """
+        return self._attr
+
+    def handle(self):
+        """ Returns the node as it's referenced; its name, `maya.api.OpenMaya.MObjectHandle` or `nodex.graph.Node` """
+        return self._node
+
+    def key(self):
+        """ Returns a hashable key that identifies this plug without materializing a pending node. """
+        node = self._node
+        if isinstance(node, (basestring, nodex.graph.Node)):
+            return node, self._attr
+        return node.hashCode(), self._attr     # MObjectHandle
+
+    def nodeType(self):
+        if self._nodeType is None:
+            if isinstance(self._node, nodex.graph.Node):
+                self._nodeType = self._node.nodeType()
+            else:
+                self._nodeType = mc.nodeType(self.nodeName())
+        return self._nodeType
+
+    def nodeAttr(self, attr):
+        """ Returns the plug for another attribute on the same node.
+
+            :rtype: Plug
+        """
+        return Plug(self._node, attr, nodeType=self._nodeType)
+
+    def info(self):
+        """ :rtype: PlugInfo """
+        if self._info is None:
+            self._info = plugInfo(self)
+        return self._info
+
+    def node(self):
+        """ Returns the node of this plug as `pymel.core.PyNode` """
+        return self.attribute().node()
+
+    def attribute(self):
+        """ Returns the `pymel.core.Attribute` for this plug. It's only created once. """
+        if self._attribute is None:
+            self._attribute = pm.Attribute(self.name())
+        return self._attribute
+
+    # region array/compound attributes
+    def numElements(self):
+        if self._attribute is not None:
+            return self._attribute.numElements()
+        return mc.getAttr(self.name(), size=True)
+
+    def element(self, index):
+        """ Returns the plug for the element at the logical index of this array attribute.
+
+            :rtype: Plug
+        """
+        return Plug(self._node, "{0}[{1}]".format(self._attr, index), nodeType=self._nodeType)
+
+    def elementIndices(self):
+        """ Returns the logical indices of the existing elements of this array attribute.
+
+            :rtype: list
+        """
+        return mc.getAttr(self.name(), multiIndices=True) or []
+
+    def elementByPhysicalIndex(self, index):
+        """ Returns the plug for the n-th existing element of this array attribute.
+
+            :rtype: Plug
+        """
+        return self.element(self.elementIndices()[index])
+
+    def child(self, index):
+        """ Returns the plug for the child attribute at the index of this compound attribute.
+
+            :rtype: Plug
+        """
+        return Plug(self._node, "{0}.{1}".format(self._attr, self.info().children[index]), nodeType=self._nodeType)
+    # endregion
+
+    # region get, set and connect
+    def get(self):
+        """ Returns the value of the plug. Values of compounds are returned as tuple. """
+        value = mc.getAttr(self.name())
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], tuple):
+            return value[0]     # compound attributes return their values as [(x, y, z)]
+        return value
+
+    def set(self, value):
+        """ Sets the value of the plug. Compound values are given as a sequence, a matrix as 16 values or 4x4. """
+        if self.info().isMatrix:
+            nodex.graph.setAttr(self, (_flatten(value),), attrType="matrix")
+        elif hasattr(value, '__iter__'):
+            nodex.graph.setAttr(self, tuple(value))
+        else:
+            nodex.graph.setAttr(self, (value,))
+
+    def lock(self):
+        nodex.graph.lockAttr(self)
+
+    def connect(self, other, force=False):
+        """ Connects this plug (source) to the other plug (destination). """
+        nodex.graph.connectAttr(self, other, force=force)
+    # endregion
+
+    def __str__(self):
+        if isinstance(self._node, nodex.graph.Node):
+            return "{0}.{1}".format(self._node, self._attr)     # don't materialize a pending node for its name
+        return self.name()
+
+    def __repr__(self):
+        return "Plug('{0}')".format(self)
+
+
+def _flatten(value):
+    """ Returns a flat list of floats for a (nested) sequence of values, like a 4x4 matrix. """
+    result = []
+    for x in value:
+        if hasattr(x, '__iter__'):
+            result.extend(float(y) for y in x)
+        else:
+            result.append(float(x))
+    return result
+
+
+def resolvePlug(data):
+    """ Resolves a plug string or `pymel.core.Attribute` to a `Plug`.
+
+        :raises TypeError: If the data can't be resolved to an existing attribute.
+        :rtype: Plug
+    """
+    if isinstance(data, Plug):
+        return data
+
+    if isinstance(data, pm.Attribute):
+        node, _, attr = data.name().partition(".")
+        return Plug(node, attr)
+
+    if isinstance(data, basestring):
+        node, _, attr = data.partition(".")
+        if attr and mc.objExists(data):
+            return Plug(node, attr)
+        raise TypeError("Data does not reference an existing attribute: {0}".format(data))
+
+    raise TypeError("Can't resolve a plug from: {0}".format(data))
+
+
+def plugInfo(plug):
+    """ Returns the `PlugInfo` metadata for a plug.
+
+        The metadata is cached by the node type and attribute path (indices are ignored) so resolving the same
+        attribute on other nodes of the same type doesn't query the scene again. Dynamic attributes are cached per
+        node instead. The cache is cleared on scene changes, or explicitly by `clearPlugInfoCache()`.
+
+        The attributes registered with `registerNodeSchema()` are never queried from the scene.
+
+        :param plug: The plug to get the metadata for.
+        :type plug: Plug or basestring or pymel.core.Attribute
+        :rtype: PlugInfo
+    """
+    plug = resolvePlug(plug)
+    attrPath = _indexPattern.sub("[]", plug.attrName())
+    key = (plug.nodeType(), attrPath)
+    info = _nodeSchemas.get(key)
+    if info is not None:
+        return info
+
+    info = _plugInfoCache.get(key)
+    if info is not None:
+        return info
+
+    dynamicKey = key + (plug.nodeName(),)
+    info = _plugInfoCache.get(dynamicKey)
+    if info is not None:
+        return info
+
+    if not _sceneCallbacks:
+        _installSceneCallbacks()
+
+    node = plug.nodeName()
+    name = plug.name()
+    leaf = _indexPattern.sub("", attrPath.rsplit(".", 1)[-1])
+
+    attrType = mc.getAttr(name, type=True)
+    isArray = not attrPath.endswith("]") and bool(mc.attributeQuery(leaf, node=node, multi=True))
+    children = tuple(mc.attributeQuery(leaf, node=node, listChildren=True) or ())
+
+    # Maya doesn't return the type for matrix attributes that have never been set (eg. multMatrix.matrixIn[0])
+    isMatrix = attrType == "matrix"
+    if attrType is None and isMatrixAttribute(plug):
+        attrType = "matrix"
+        isMatrix = True
+
+    info = PlugInfo(type=attrType,
+                    isArray=isArray,
+                    isCompound=bool(children),
+                    children=children,
+                    isMatrix=isMatrix)
+
+    if leaf in (mc.listAttr(node, userDefined=True) or ()):
+        key = dynamicKey
+    _plugInfoCache.set(key, info)
+    return info
+
+
+def isMatrixAttribute(plug):
+    """ Returns whether the plug is a matrix attribute without changing the scene.
+
+        Maya can't return the type of matrix attributes that have never been set. Instead of setting a value to find
+        out the type this looks at the attribute's definition through the Maya Python API 2.0. The result is memoized
+        per node type and attribute, and known matrix attributes of the matrix nodes are already filled in.
+
+        :type plug: Plug or basestring or pymel.core.Attribute
+        :rtype: bool
+    """
+    plug = resolvePlug(plug)
+    leaf = _indexPattern.sub("", plug.attrName().rsplit(".", 1)[-1])
+    key = (plug.nodeType(), leaf)
+    result = _matrixAttributes.get(key)
+    if result is not None:
+        return result
+
+    import maya.api.OpenMaya as om2
+    selection = om2.MSelectionList()
+    selection.add(plug.name())
+    attribute = selection.getPlug(0).attribute()
+    if attribute.hasFn(om2.MFn.kMatrixAttribute):
+        result = True
+    elif attribute.hasFn(om2.MFn.kTypedAttribute):
+        result = om2.MFnTypedAttribute(attribute).attrType() == om2.MFnData.kMatrix
+    else:
+        result = False
+
+    # Dynamic attributes are not memoized since they can differ between nodes of the same type
+    if not om2.MFnAttribute(attribute).dynamic:
+        _matrixAttributes[key] = result
+    return result
+
+
+def registerNodeSchema(nodeType, attributes):
+    """ Register the metadata of the static attributes of a node type.
+
+        Nodes that are pending in a deferred graph (see `nodex.graph`) can't be queried for the metadata of their
+        attributes without creating them. The node helpers register the attributes they use so they can build their
+        result while deferred.
+
+        :param nodeType: The node type the attributes belong to.
+        :param attributes: Sequence of (name, type, multi, children) per attribute where children is a sequence of
+                           (name, type) per child attribute.
+    """
+    for name, attrType, multi, children in attributes:
+        childNames = tuple(childName for childName, _ in children)
+        isMatrix = attrType == "matrix"
+        if isMatrix:
+            _matrixAttributes[(nodeType, name.rsplit(".", 1)[-1])] = True
+
+        elementName = name
+        if multi:
+            _nodeSchemas[(nodeType, name)] = PlugInfo(attrType, True, bool(children), childNames, isMatrix)
+            elementName = name + "[]"
+        _nodeSchemas[(nodeType, elementName)] = PlugInfo(attrType, False, bool(children), childNames, isMatrix)
+
+        for childName, childType in children:
+            _nodeSchemas[(nodeType, "{0}.{1}".format(elementName, childName))] = PlugInfo(childType, False, False,
+                                                                                          (), False)
+
+
+def _vector(name, attrType="double3", childType="double", suffices="XYZ", multi=False):
+    """ Returns the schema of a compound attribute with a child per suffix, eg. ``translateX`` """
+    return name, attrType, multi, tuple((name.rsplit(".", 1)[-1] + suffix, childType) for suffix in suffices)
+
+
+def _color(name):
+    return _vector(name, attrType="float3", childType="float", suffices="RGB")
+
+
+for _nodeType, _attributes in (
+        ("plusMinusAverage", (("operation", "enum", False, ()),
+                              ("input1D", "double", True, ()),
+                              _vector("input2D", "double2", suffices="xy", multi=True),
+                              _vector("input3D", suffices="xyz", multi=True),
+                              ("output1D", "double", False, ()),
+                              _vector("output2D", "double2", suffices="xy"),
+                              _vector("output3D", suffices="xyz"))),
+        ("multiplyDivide", (("operation", "enum", False, ()),
+                            _vector("input1", "float3", "float"),
+                            _vector("input2", "float3", "float"),
+                            _vector("output", "float3", "float"))),
+        ("condition", (("operation", "enum", False, ()),
+                       ("firstTerm", "float", False, ()),
+                       ("secondTerm", "float", False, ()),
+                       _color("colorIfTrue"),
+                       _color("colorIfFalse"),
+                       _color("outColor"))),
+        ("clamp", (_color("input"), _color("min"), _color("max"), _color("output"))),
+        ("blendColors", (("blender", "float", False, ()), _color("color1"), _color("color2"), _color("output"))),
+        ("addDoubleLinear", (("input1", "double", False, ()),
+                             ("input2", "double", False, ()),
+                             ("output", "double", False, ()))),
+        ("multDoubleLinear", (("input1", "double", False, ()),
+                              ("input2", "double", False, ()),
+                              ("output", "double", False, ()))),
+        ("distanceBetween", (_vector("point1"), _vector("point2"),
+                             ("inMatrix1", "matrix", False, ()),
+                             ("inMatrix2", "matrix", False, ()),
+                             ("distance", "doubleLinear", False, ()))),
+        ("vectorProduct", (("operation", "enum", False, ()),
+                           _vector("input1", "float3", "float"),
+                           _vector("input2", "float3", "float"),
+                           ("matrix", "matrix", False, ()),
+                           ("normalizeOutput", "bool", False, ()),
+                           _vector("output", "float3", "float"))),
+        ("angleBetween", (_vector("vector1"), _vector("vector2"),
+                          ("angle", "doubleAngle", False, ()),
+                          _vector("euler", childType="doubleAngle"),
+                          _vector("axisAngle.axis"))),
+        ("composeMatrix", (_vector("inputTranslate"),
+                           _vector("inputRotate", childType="doubleAngle"),
+                           _vector("inputScale"),
+                           _vector("inputShear"),
+                           ("outputMatrix", "matrix", False, ()))),
+        ("decomposeMatrix", (("inputMatrix", "matrix", False, ()),
+                             _vector("outputTranslate"),
+                             _vector("outputRotate", childType="doubleAngle"),
+                             _vector("outputScale"),
+                             _vector("outputShear"),
+                             _vector("outputQuat", "double4", suffices="XYZW"))),
+        ("inverseMatrix", (("inputMatrix", "matrix", False, ()), ("outputMatrix", "matrix", False, ()))),
+        ("transposeMatrix", (("inputMatrix", "matrix", False, ()), ("outputMatrix", "matrix", False, ()))),
+        ("holdMatrix", (("inMatrix", "matrix", False, ()), ("outMatrix", "matrix", False, ()))),
+        ("passMatrix", (("inMatrix", "matrix", False, ()),
+                        ("inScale", "double", False, ()),
+                        ("outMatrix", "matrix", False, ()))),
+        ("multMatrix", (("matrixIn", "matrix", True, ()), ("matrixSum", "matrix", False, ()))),
+        ("animCurveUU", (("input", "double", False, ()), ("output", "double", False, ())))):
+    registerNodeSchema(_nodeType, _attributes)
+
+# The keys of the animation curves, see `animCurve()`
+for _nodeType in ("animCurveTL", "animCurveTA", "animCurveTU", "animCurveUU"):
+    registerNodeSchema(_nodeType, (("keyTimeValue", "compound", True, (("keyTime", "double"), ("keyValue", "double"))),
+                                   ("keyTanInType", "enum", True, ()),
+                                   ("keyTanOutType", "enum", True, ())))
+
+
+def clearPlugInfoCache(*args):
+    """ Clears the plug metadata cache, eg. after changing dynamic attributes. """
+    _plugInfoCache.clear()
+    _arraySizes.clear()
+
+
+def arraySize(plug):
+    """ Returns the number of elements of the array attribute.
+
+        The size is cached until the next value or connection is made by nodex (which could add elements), a scene
+        change or an explicit `invalidateArraySizes()`.
+
+        :type plug: Plug
+        :rtype: int
+    """
+    key = plug.key()
+    size = _arraySizes.get(key)
+    if size is None:
+        size = _arraySizes[key] = plug.numElements()
+    return size
+
+
+def invalidateArraySizes():
+    """ Clears the cached number of elements of array attributes, eg. after adding elements outside of nodex. """
+    _arraySizes.clear()
+
+
+def _installSceneCallbacks():
+    """ Clear the plug metadata cache whenever the scene or the available node types change, and forget the nodes
+        nodex created (see `nodex.graph.createdNodes()`) when the scene changes.
+    """
+    import maya.OpenMaya
+    for message in (maya.OpenMaya.MSceneMessage.kAfterNew,
+                    maya.OpenMaya.MSceneMessage.kAfterOpen,
+                    maya.OpenMaya.MSceneMessage.kAfterImport,
+                    maya.OpenMaya.MSceneMessage.kAfterCreateReference,
+                    maya.OpenMaya.MSceneMessage.kAfterPluginLoad,
+                    maya.OpenMaya.MSceneMessage.kAfterPluginUnload):
+        _sceneCallbacks.append(maya.OpenMaya.MSceneMessage.addCallback(message, clearPlugInfoCache))
+    for message in (maya.OpenMaya.MSceneMessage.kAfterNew,
+                    maya.OpenMaya.MSceneMessage.kAfterOpen):
+        _sceneCallbacks.append(maya.OpenMaya.MSceneMessage.addCallback(message, nodex.graph.forgetCreatedNodes))
+
+# endregion
+
+
+# region constant folding
+# The Python equivalent per operation of the math nodes, used to evaluate operations that only involve constants
+plusMinusAverageOperations = {0: lambda values: values[0],
+                              1: lambda values: sum(values),
+                              2: lambda values: values[0] - sum(values[1:]),
+                              3: lambda values: sum(values) / len(values)}
+multiplyDivideOperations = {0: lambda a, b: a,
+                            1: operator.mul,
+                            2: operator.truediv,
+                            3: operator.pow}
+conditionOperations = {0: operator.eq,
+                       1: operator.ne,
+                       2: operator.gt,
+                       3: operator.ge,
+                       4: operator.lt,
+                       5: operator.le}
+doubleLinearOperations = {"addDoubleLinear": operator.add,
+                          "multDoubleLinear": operator.mul}
+
+# Errors for which the value can't be evaluated in Python, the node is created instead to get Maya's behaviour
+_foldErrors = (ZeroDivisionError, ValueError, OverflowError)
+
+
+def isConstant(*args):
+    """ Returns True if all given values (None is ignored) are constants that don't reference any attribute. """
+    from nodex.core import Nodex
+    return all(Nodex(x).isConstant() for x in args if x is not None)
+
+
+def constantValues(x, dimensions, default=0.0):
+    """ Returns the values of a constant as they end up in an input attribute of `dimensions` when connected.
+
+        Like `nodex.core.Nodex.connect()` a single value is repeated, larger values are truncated and smaller values
+        leave the remaining values at their default.
+
+        :rtype: tuple
+    """
+    from nodex.core import Nodex
+    x = Nodex(x)
+    value = x.plainValue()
+    if x.dimensions() == 1:
+        if isinstance(value, tuple):    # the one-tuple array
+            value = value[0]
+        return (float(value),) * dimensions
+
+    values = tuple(_flatten(value))[:dimensions]
+    return values + (default,) * (dimensions - len(values))
+
+
+def constantResult(values):
+    """ Returns the Nodex for the values of an evaluated output, a single value results in a single numeric. """
+    from nodex.core import Nodex
+    if len(values) == 1:
+        return Nodex(values[0])
+    return Nodex(tuple(values))
+
+
+def _normalize(values):
+    length = math.sqrt(sum(x * x for x in values))
+    if not length:
+        return values
+    return tuple(x / length for x in values)
+
+
+def matrixProduct(matrices):
+    """ Returns the 16 values of the product of the matrices in order, like the output of the `multMatrix` node.
+
+        Uses NumPy when available.
+
+        :param matrices: Sequence of the 16 values of each matrix.
+        :rtype: tuple
+    """
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    if numpy is not None:
+        product = reduce(numpy.dot, [numpy.reshape(numpy.array(x, dtype=float), (4, 4)) for x in matrices])
+        return tuple(float(x) for x in product.flat)
+
+    product = tuple(float(x) for x in matrices[0])
+    for matrix in matrices[1:]:
+        product = tuple(sum(product[row * 4 + i] * matrix[i * 4 + column] for i in range(4))
+                        for row in range(4) for column in range(4))
+    return product
+
+
+def vectorProductValue(operation, input1=(0.0, 0.0, 0.0), input2=(0.0, 0.0, 0.0), matrix=None,
+                       normalizeOutput=False):
+    """ Returns the output of the `vectorProduct` node for the given values.
+
+        :param matrix: The 16 values of the matrix, used by the (point) matrix product operations.
+        :rtype: tuple
+    """
+    if operation == 0:
+        output = input1
+    elif operation == 1:
+        if normalizeOutput:
+            input1, input2 = _normalize(input1), _normalize(input2)
+        dot = sum(a * b for a, b in zip(input1, input2))
+        return (dot, dot, dot)
+    elif operation == 2:
+        x1, y1, z1 = input1
+        x2, y2, z2 = input2
+        output = (y1 * z2 - z1 * y2, z1 * x2 - x1 * z2, x1 * y2 - y1 * x2)
+    elif operation in (3, 4):
+        if matrix is None:
+            matrix = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+        output = tuple(sum(input1[i] * matrix[i * 4 + j] for i in range(3)) for j in range(3))
+        if operation == 4:  # points are translated
+            output = tuple(x + matrix[12 + j] for j, x in enumerate(output))
+    else:
+        raise ValueError("Unknown vectorProduct operation: {0}".format(operation))
+
+    if normalizeOutput:
+        output = _normalize(output)
+    return output
+
+# endregion
+
+
+# region node cache
+class NodeCache(object):
+    """ Remembers the nodes created for a computation so an identical computation reuses the existing node.
+
+        A computation is identified by its node type, static settings, input sources and requested name (see
+        `nodeKey()`). Nodes are only reused within a build, see `reuseNodes()`, and the cache is cleared when the
+        build ends so a later build never gets a node that was deleted or renamed in the meantime. The cache holds at
+        most `maxSize` nodes. The number of nodes that didn't need to be created is counted in `saved`.
+    """
+    def __init__(self, maxSize, enabled=True):
+        self.enabled = enabled
+        self.saved = 0
+        self._nodes = _LRUCache(maxSize)
+        self._depth = 0     # the number of nested `reuseNodes()`
+
+    def isActive(self):
+        """ Returns True if nodes are reused, within `reuseNodes()` while enabled. """
+        return self.enabled and self._depth > 0
+
+    def get(self, key):
+        """ Returns the node created for the computation in this build, None if it wasn't created (or discarded).
+
+            :rtype: nodex.graph.Node
+        """
+        if not self._depth or not self.enabled:
+            return None
+
+        node = self._nodes.get(key)
+        if node is None or node.isDiscarded():
+            return None
+        node.absorb(False)
+        self.saved += 1
+        return node
+
+    def set(self, key, node):
+        if self._depth and self.enabled:
+            self._nodes.set(key, node)
+
+    def clear(self):
+        self._nodes.clear()
+        self.saved = 0
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+NODE_CACHE_SIZE = 10000
+nodeCache = NodeCache(NODE_CACHE_SIZE)
+
+
+@contextlib.contextmanager
+def reuseNodes():
+    """ Reuse the nodes of identical computations within the context.
+
+        `nodex.deferred()` and `nodex.build_session()` reuse nodes for what's built within them. Nested use shares the
+        cache of the outermost context, which is cleared when it exits. `saved` is reset when it's entered.
+
+        :rtype: NodeCache
+    """
+    if not nodeCache._depth:
+        nodeCache.clear()
+    nodeCache._depth += 1
+    try:
+        yield nodeCache
+    finally:
+        nodeCache._depth -= 1
+        if not nodeCache._depth:
+            nodeCache._nodes.clear()
+
+
+def clearNodeCache(*args):
+    """ Forgets the created nodes so new computations always create new nodes. """
+    nodeCache.clear()
+
+
+def _sourceKey(value):
+    from nodex.core import Nodex, CompactArray
+    data = Nodex(value)._data
+    if isinstance(data, Plug):
+        return data.key()
+    elif isinstance(data, CompactArray):
+        return tuple(_sourceKey(x) if x.isAttribute() else x.value() for x in data)
+    elif isinstance(data, tuple):
+        return tuple(_sourceKey(x) for x in data)
+    return data
+
+
+def nodeKey(nodeType, settings=(), inputs=(), commutative=False, name=None):
+    """ Returns the key that identifies the computation of a node by its type, settings, input sources and name.
+
+        :param settings: Hashable values of everything else that determines the output, eg. the operation.
+        :param inputs: Sequence of (attribute name, value) for the inputs, inputs that are None are ignored.
+        :param commutative: If True the order of the inputs doesn't matter.
+        :param name: The name requested for the node, a node is only reused for the same name.
+    """
+    sources = tuple((attrName, _sourceKey(value)) for attrName, value in inputs if value is not None)
+    if commutative:
+        sources = tuple(sorted(source for _, source in sources))
+    return nodeType, settings, sources, name
+
+# endregion
+
+
+# region simplification
+def expression(x, nodeType, attrs):
+    """ Returns the node and (settings, inputs) of the computation for which nodex created the node that x is the
+        output of, None if x isn't the output of such a node (see `nodex.graph.Node.setExpression()`).
+
+        :param attrs: The output attribute names of the node that x must reference to be the output.
+        :rtype: tuple or None
+    """
+    from nodex.core import Nodex
+    if not isinstance(x, Nodex) or not x.isSingleAttribute():
+        return None
+
+    plug = x.plug()
+    node = plug.handle()
+    if not isinstance(node, nodex.graph.Node) or node.nodeType() != nodeType or plug.attrName() not in attrs:
+        return None
+
+    computation = node.expression()
+    if computation is None:
+        return None
+    return node, computation
+
+
+def _isInteger(value):
+    return float(value).is_integer()
+
+
+def _isEven(value):
+    return _isInteger(value) and value % 2 == 0
+
+
+def _power(x):
+    """ Returns the base, constant exponents and node of the power operation that x is the output of, else None. """
+    if x.dimensions() > 3:
+        return None
+    found = expression(x, "multiplyDivide", ("output", "output.outputX"))
+    if found is None:
+        return None
+
+    node, (settings, inputs) = found
+    inputs = dict(inputs)
+    base, exponent = inputs.get("input1"), inputs.get("input2")
+    if dict(settings).get("operation") != 3 or base is None or exponent is None or not exponent.isConstant():
+        return None
+    if max(base.dimensions(), exponent.dimensions()) != x.dimensions():
+        return None
+    return base, constantValues(exponent, x.dimensions()), node
+
+
+def linearUnit():
+    """ Returns the linear unit of the scene, eg. ``cm``. Centimetres when the network is evaluated instead of built,
+        see `nodex.evaluate`.
+    """
+    if nodex.graph.isHeadless():
+        return "cm"
+    return mc.currentUnit(query=True, linear=True)
+
+
+def isNonNegative(x):
+    """ Returns True if the values of x are known to never be negative, eg. constants, a square or a distance. """
+    from nodex.core import Nodex
+    x = Nodex(x)
+    if x.isConstant():
+        return x.dimensions() <= 3 and all(value >= 0 for value in constantValues(x, x.dimensions()))
+    if expression(x, "distanceBetween", ("distance",)) is not None:
+        return True
+
+    power = _power(x)
+    if power is None:
+        return False
+    base, exponents, _ = power
+    return all(_isEven(exponent) for exponent in exponents) or isNonNegative(base)
+
+
+def _flattenSum(args, operation, dimensions):
+    """ Returns the inputs for the sum (or subtraction) of args without creating nested nodes.
+
+        The inputs of a pending sum (or the subtraction that is subtracted from) are taken over, and the constants
+        are added up into a single input that is left out when it's zero.
+    """
+    outputAttrs = ("output{0}D".format(dimensions),)
+    inputs = []
+    for i, x in enumerate(args):
+        if operation == 1 or i == 0:
+            found = expression(x, "plusMinusAverage", outputAttrs)
+            if found is not None and found[0].isPending() and found[1][0] == (operation, dimensions):
+                node, (_, nested) = found
+                node.absorb()
+                inputs.extend(value for _, value in nested)
+                continue
+        inputs.append(x)
+
+    # the first input of a subtraction is what's subtracted from, so it can't be combined with the others
+    first = inputs[:1] if operation == 2 else []
+    inputs = inputs[len(first):]
+    constants = [x for x in inputs if x.isConstant()]
+    if not constants:
+        return tuple(first + inputs)
+
+    values = [sum(values) for values in zip(*(constantValues(x, dimensions) for x in constants))]
+    inputs = first + [x for x in inputs if not x.isConstant()]
+    if any(values) or not inputs:
+        inputs.append(constantResult(values))
+    return tuple(inputs)
+
+
+def _simplifyMultiplyDivide(input1, input2, operation, dimensions, **kwargs):
+    """ Returns the result for an operation that can be done without a new node or with simpler inputs, else None.
+
+        - The multiplication, division or power by one results in the input itself.
+        - A multiplication by a constant of a multiplication by a constant is done once with the combined constant,
+          so a double negation cancels out.
+        - A power of a power with constant exponents is done once where that gives the same result. This is the
+          case if the outer exponent is an integer, the base is never negative or both the inner and the combined
+          exponent are even integers. Note that ``sqrt(x ** 2)`` is `Math.abs()` and can't be simplified this way,
+          but ``abs(x) ** 2`` can (to ``x ** 2``).
+
+        The chained operations are only combined while the inner node is still pending (see `nodex.deferred()`), so
+        immediate mode never rewires nodes that already exist.
+    """
+    from nodex.core import Nodex
+    if operation == 1 and input1.isConstant() and not input2.isConstant():
+        input1, input2 = input2, input1
+    if operation not in (1, 2, 3) or not input2.isConstant() or input1.isConstant():
+        return None
+
+    values = constantValues(input2, dimensions)
+    if all(value == 1.0 for value in values) and input1.dimensions() == dimensions:
+        return input1
+
+    if operation == 1:
+        found = expression(input1, "multiplyDivide", ("output", "output.outputX"))
+        if found is None or not found[0].isPending() or input1.dimensions() != dimensions:
+            return None
+        node, (settings, inputs) = found
+        inputs = [x for _, x in inputs]
+        if dict(settings).get("operation") != 1 or len(inputs) != 2:
+            return None
+        constants = [x for x in inputs if x.isConstant()]
+        if len(constants) != 1 or max(x.dimensions() for x in inputs) != dimensions:
+            return None
+        base = inputs[1] if inputs[0] is constants[0] else inputs[0]
+        factors = [a * b for a, b in zip(constantValues(constants[0], dimensions), values)]
+        node.absorb()
+        return multiplyDivide(base, constantResult(factors), operation=1, **kwargs)
+
+    if operation == 3:
+        power = _power(input1)
+        if power is None or input1.dimensions() != dimensions:
+            return None
+        base, exponents, node = power
+        if not node.isPending():
+            return None
+        combined = [a * b for a, b in zip(exponents, values)]
+        if not (all(_isInteger(b) for b in values) or isNonNegative(base) or
+                all(_isEven(a) and _isEven(ab) for a, ab in zip(exponents, combined))):
+            return None
+        node.absorb()
+        return multiplyDivide(base, constantResult(combined), operation=3, **kwargs)
+
+    return None
+
+# endregion
+
+
+# region animation curves
+LINEAR_TANGENT = 2      # the value of a linear tangent type for the keyTanInType and keyTanOutType attributes
+
+LOOKUP_TABLE_ATTR = "nodexLookupTable"    # string attribute tagging a lookup table curve with the digest of its keys
+LOOKUP_TABLE_CACHE_SIZE = 256
+_lookupTables = _LRUCache(LOOKUP_TABLE_CACHE_SIZE)     # (fn, minInput, maxInput, steps, tolerance) -> keys
+
+
+def reduceKeys(times, values, tolerance=1e-4):
+    """ Returns the indices of the samples to keep as (linear) keys so the curve through them stays within the
+        tolerance of every sample.
+
+        The first and last sample are always kept, a constant curve only keeps the first. In between the sample that
+        is furthest from the line between the kept neighbours is added until all samples are within the tolerance
+        (Ramer-Douglas-Peucker on the difference in value).
+
+        :rtype: list
+    """
+    if len(values) < 2:
+        return range(len(values))
+    if max(values) - min(values) <= tolerance:
+        return [0]
+
+    keep = set([0, len(values) - 1])
+    stack = [(0, len(values) - 1)]
+    while stack:
+        first, last = stack.pop()
+        slope = (values[last] - values[first]) / float(times[last] - times[first])
+        error, index = max((abs(values[first] + slope * (times[i] - times[first]) - values[i]), i)
+                           for i in xrange(first, last + 1))
+        if error > tolerance:
+            keep.add(index)
+            stack.extend(((first, index), (index, last)))
+    return sorted(keep)
+
+
+def sampleFunction(fn, minInput, maxInput, tolerance=1e-4, steps=200):
+    """ Returns the (inputs, values) of the keys that approximate the function between minInput and maxInput.
+
+        The function is sampled adaptively: a segment is halved where the line between its samples is further than
+        the tolerance from the function halfway, down to segments of ``(maxInput - minInput) / steps``. So the keys
+        are placed where the curvature demands them. Samples that aren't needed to stay within the tolerance are
+        removed afterwards, see `reduceKeys()`.
+
+        :rtype: tuple
+    """
+    if maxInput <= minInput:
+        raise ValueError("The maxInput must be larger than minInput, got: {0} and {1}".format(minInput, maxInput))
+
+    minimumWidth = (maxInput - minInput) / float(steps)
+    initial = min(steps, 8)     # start from a few segments so a feature in between isn't missed
+    inputs = [minInput + (maxInput - minInput) * i / float(initial) for i in xrange(initial + 1)]
+    samples = dict((x, float(fn(x))) for x in inputs)
+
+    stack = zip(inputs[:-1], inputs[1:])
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2.0 * minimumWidth * (1.0 - 1e-9):
+            continue
+        middle = (first + last) * 0.5
+        samples[middle] = float(fn(middle))
+        if abs((samples[first] + samples[last]) * 0.5 - samples[middle]) > tolerance:
+            stack.extend(((first, middle), (middle, last)))
+
+    inputs = sorted(samples)
+    values = [samples[x] for x in inputs]
+    keep = reduceKeys(inputs, values, tolerance=tolerance)
+    return [inputs[i] for i in keep], [values[i] for i in keep]
+
+
+def curveValue(inputs, values, x):
+    """ Returns the value of a curve with linear keys at x, constant before the first and after the last key. """
+    if x <= inputs[0]:
+        return values[0]
+    if x >= inputs[-1]:
+        return values[-1]
+    i = bisect.bisect_right(inputs, x)
+    weight = (x - inputs[i - 1]) / float(inputs[i] - inputs[i - 1])
+    return values[i - 1] + (values[i] - values[i - 1]) * weight
+
+# endregion
+
+
 # region nodes
 def plusMinusAverage(*args, **kwargs):
     from nodex.core import Nodex
@@ -48,6 +1043,7 @@ def plusMinusAverage(*args, **kwargs):
     o = kwargs.pop("operation", 1)
     name = kwargs.pop("name", "plusMinusAverage")
     output = kwargs.pop("output3D", None)
+    args = tuple(Nodex(x) for x in args)
 
     # Get dimensions from input Nodex
     if d is None:
@@ -56,15 +1052,44 @@ def plusMinusAverage(*args, **kwargs):
     if d > 3:
         raise RuntimeError("Can't use plusMinusAverage with higher dimensions than 3")
 
+    # Evaluate constants directly instead of creating a node
+    if args and isConstant(*args):
+        inputs = [constantValues(v, d) for v in args]
+        try:
+            result = constantResult([plusMinusAverageOperations[o](values) for values in zip(*inputs)])
+        except _foldErrors:
+            pass
+        else:
+            if output is not None:
+                result.connect(output)
+            return result
+
+    # Flatten nested sums and leave out the additions of zero
+    if o in (1, 2):
+        args = _flattenSum(args, o, d)
+        if len(args) == 1 and args[0].dimensions() == d:
+            result = args[0]
+            if output is not None:
+                result.connect(output)
+            return result
+
     # Get corresponding output attribute/length for the current dimension
     resultAttrs = {1: "output1D", 2: "output2D", 3: "output3D"}
     resultAttr = resultAttrs[d]
 
-    n = pm.createNode("plusMinusAverage", name=name)
-    n.operation.set(o) # average
-    for i, v in enumerate(args):
-        n_input_attr = n.attr("input{dimension}D[{index}]".format(dimension=d, index=i))
-        v.connect(n_input_attr)
+    # Reuse the node of an identical computation, the order of the inputs doesn't matter for sum and average
+    key = nodeKey("plusMinusAverage", (o, d), enumerate(args), commutative=o in (1, 3), name=name)
+    n = nodeCache.get(key)
+    if n is None:
+        n = nodex.graph.createNode("plusMinusAverage", name=name)
+        n.attr("operation").set(o) # average
+        for i, v in enumerate(args):
+            n_input_attr = n.attr("input{dimension}D[{index}]".format(dimension=d, index=i))
+            v.connect(n_input_attr)
+        n.setExpression((o, d), enumerate(args))
+        if d == 1:
+            n.setPackable()
+        nodeCache.set(key, n)
 
     result = Nodex(n.attr(resultAttr))
     if output is not None:
@@ -77,11 +1102,30 @@ def multiplyDivide(input1=None, input2=None, **kwargs):
     from nodex.core import Nodex
 
     o = kwargs.pop("operation", 1)
+    input1 = Nodex(input1) if input1 is not None else None
+    input2 = Nodex(input2) if input2 is not None else None
+
+    # Evaluate constants directly instead of creating a node
+    d = max(x.dimensions() for x in (input1, input2) if x is not None)
+    if d <= 3 and isConstant(input1, input2):
+        values1 = constantValues(input1, d) if input1 is not None else (0.0,) * d
+        values2 = constantValues(input2, d) if input2 is not None else (1.0,) * d
+        try:
+            return constantResult([multiplyDivideOperations[o](a, b) for a, b in zip(values1, values2)])
+        except _foldErrors:
+            pass
+
+    # Leave out the operations by one and combine chained operations by constants
+    if d <= 3 and input1 is not None and input2 is not None:
+        result = _simplifyMultiplyDivide(input1, input2, o, d, **kwargs)
+        if result is not None:
+            return result
+
     setAttr = (('operation', o),)
     inputs = (('input1', input1),
               ('input2', input2))
 
-    result = nodeHelper('multiplyDivide', 'output', inputs=inputs, setAttr=setAttr, **kwargs)
+    result = nodeHelper('multiplyDivide', 'output', inputs=inputs, setAttr=setAttr, commutative=o == 1, **kwargs)
 
     return result
 
@@ -125,7 +1169,8 @@ def multiplyDivide(input1=None, input2=None, **kwargs):
     # return Nodex(n.attr(outputAttr))
 
 
-def nodeHelper(nodeType, chainAttr, inputs=(), outputs=(), minimalOutput=True, setAttr=(), **kwargs):
+def nodeHelper(nodeType, chainAttr, inputs=(), outputs=(), minimalOutput=True, setAttr=(), lock=(), commutative=False,
+               **kwargs):
     from nodex.core import Nodex
 
     # ensure nodex
@@ -144,20 +1189,33 @@ def nodeHelper(nodeType, chainAttr, inputs=(), outputs=(), minimalOutput=True, s
     if name:
         createKwargs['name'] = name
 
-    n = pm.createNode(nodeType, **createKwargs)
-
-    for attrName, attrValue in setAttr:
-        n.attr(attrName).set(attrValue)     # without nodex (optimization for static values)
-
-    # check input dimensions
-    for attrName, attrValue in inputs:
-        attrNodex = Nodex(n.attr(attrName))
-        if dim < attrNodex.dimensions():
-            if dim == 1:
-                attrNodex = attrNodex[0]
-            else:
-                attrNodex = attrNodex[:dim]
-        attrValue.connect(attrNodex)
+    # reuse the node of an identical computation
+    key = nodeKey(nodeType, (tuple(setAttr), tuple(lock)), inputs, commutative=commutative, name=name)
+    n = nodeCache.get(key)
+    if n is None:
+        n = nodex.graph.createNode(nodeType, **createKwargs)
+
+        for attrName, attrValue in setAttr:
+            n.attr(attrName).set(attrValue)     # without nodex (optimization for static values)
+
+        # check input dimensions
+        for attrName, attrValue in inputs:
+            attrNodex = Nodex(n.attr(attrName))
+            if dim < attrNodex.dimensions():
+                if dim == 1:
+                    attrNodex = attrNodex[0]
+                else:
+                    attrNodex = attrNodex[:dim]
+            attrValue.connect(attrNodex)
+
+        # lock inputs that must stay as they are for the result to be correct
+        for attrName in lock:
+            n.attr(attrName).lock()
+
+        n.setExpression(tuple(setAttr), inputs)
+        if minimalOutput and dim == 1:
+            n.setPackable()     # only the first channel is used
+        nodeCache.set(key, n)
 
     # result chain
     result = Nodex(n.attr(chainAttr))
@@ -175,39 +1233,43 @@ def nodeHelper(nodeType, chainAttr, inputs=(), outputs=(), minimalOutput=True, s
 
 
 def clamp(input=None, min=None, max=None, output=None, **kwargs):
-    # TODO: Revise utils.clamp to work with the new Nodex class
+    inputs = (('input', input),
+              ('min', min),
+              ('max', max))
 
-    name = kwargs.pop("name", "clamp")
-    suffices = ["R", "G", "B"]
-
-    n = pm.createNode("clamp", name=name)
-
-    if input is not None:
-        connectOrSetVector(n, "input", input, suffices=suffices)
-
-    if min is not None:
-        connectOrSetVector(n, "min", min, suffices=suffices)
-
-    if max is not None:
-        connectOrSetVector(n, "max", max, suffices=suffices)
+    result = nodeHelper('clamp', 'output', inputs=inputs, **kwargs)
 
     if output is not None:
-        connectOutputVector(n, "output", output, suffices=suffices)
+        result.connect(output)
 
-    return Nodex(n.attr('output'))
+    return result
 
 
 def doubleLinear(input1=None, input2=None, output=None, nodeType="multDoubleLinear", **kwargs):
     from nodex.core import Nodex
 
     name = kwargs.pop("name", "clamp")
-    n = pm.createNode(nodeType, name=name)
 
-    if input1 is not None:
-        Nodex(input1).connect(n.attr('input1'))
+    # Evaluate constants directly instead of creating a node
+    if input1 is not None and input2 is not None and isConstant(input1, input2):
+        values = [constantValues(x, 1)[0] for x in (input1, input2)]
+        result = Nodex(doubleLinearOperations[nodeType](*values))
+        if output is not None:
+            result.connect(output)
+        return result
+
+    key = nodeKey(nodeType, inputs=(('input1', input1), ('input2', input2)), commutative=True, name=name)
+    n = nodeCache.get(key)
+    if n is None:
+        n = nodex.graph.createNode(nodeType, name=name)
 
-    if input2 is not None:
-        Nodex(input2).connect(n.attr('input2'))
+        if input1 is not None:
+            Nodex(input1).connect(n.attr('input1'))
+
+        if input2 is not None:
+            Nodex(input2).connect(n.attr('input2'))
+
+        nodeCache.set(key, n)
 
     if output is not None:
         Nodex(n.attr('output')).connect(output)
@@ -220,7 +1282,6 @@ def condition(firstTerm=None, secondTerm=None, ifTrue=None, ifFalse=None, output
     o = kwargs.pop("operation", 0)
     name = kwargs.pop("name", "condition")
     d = kwargs.pop("dimensions", None)
-    output = kwargs.pop("output", None)
 
     # Ensure inputs are Nodex
     if firstTerm is not None and not isinstance(firstTerm, Nodex):
@@ -239,46 +1300,171 @@ def condition(firstTerm=None, secondTerm=None, ifTrue=None, ifFalse=None, output
     if d > 3:
         raise RuntimeError("Can't use plusMinusAverage with higher dimensions than 3")
 
+    # With constant terms the condition is known, so only the chosen input is used
+    if isConstant(firstTerm, secondTerm):
+        terms = [constantValues(x, 1)[0] if x is not None else 0.0 for x in (firstTerm, secondTerm)]
+        if conditionOperations[o](*terms):
+            chosen, default = ifTrue, (1.0, 1.0, 1.0)
+        else:
+            chosen, default = ifFalse, (0.0, 0.0, 0.0)
+
+        result = None
+        if chosen is None:
+            result = constantResult(default[:d])
+        elif chosen.dimensions() == d:
+            result = chosen
+        elif chosen.isConstant() and chosen.dimensions() == 1:
+            result = constantResult(constantValues(chosen, d))
+
+        if result is not None:
+            if output is not None:
+                result.connect(output)
+            return result
+
     suffices = ["R", "G", "B"]
 
-    n = pm.createNode("condition", name=name)
-    n.operation.set(o)
+    key = nodeKey("condition", o, (("firstTerm", firstTerm),
+                                   ("secondTerm", secondTerm),
+                                   ("colorIfTrue", ifTrue),
+                                   ("colorIfFalse", ifFalse)), name=name)
+    n = nodeCache.get(key)
+    cached = n is not None
+    if not cached:
+        n = nodex.graph.createNode("condition", name=name)
+        n.attr("operation").set(o)
 
     # region define output attribute
     # Get corresponding output attribute/length for the current dimension
-    outputAttrs = {1: "outColorR", 2: ["outColorR", "outColorG"], 3: "outColor"}
+    outputAttrs = {1: "outColor.outColorR", 2: ["outColor.outColorR", "outColor.outColorG"], 3: "outColor"}
     outputAttr = outputAttrs[d]
-    # use node name plus attribute to identify output so we can use it as the nodex directly
+    # use the plugs to identify output so we can use it as the nodex directly
     if isinstance(outputAttr, list):
-        outputAttr = ["{0}.{1}".format(n.name(), x) for x in outputAttr]
+        outputAttr = [n.attr(x) for x in outputAttr]
     else:
-        outputAttr = "{0}.{1}".format(n.name(), outputAttr)
+        outputAttr = n.attr(outputAttr)
     # endregion
 
-    if firstTerm is not None:
-        firstTerm.connect(n.attr("firstTerm"))
+    if not cached:
+        if firstTerm is not None:
+            firstTerm.connect(n.attr("firstTerm"))
 
-    if secondTerm is not None:
-        secondTerm.connect(n.attr("secondTerm"))
+        if secondTerm is not None:
+            secondTerm.connect(n.attr("secondTerm"))
 
-    if ifTrue is not None:
-        ifTrue.connect(n.attr("colorIfTrue"))
-    else:
-        n.attr("colorIfTrue").set((1, 1, 1))
+        if ifTrue is not None:
+            ifTrue.connect(n.attr("colorIfTrue"))
+        else:
+            n.attr("colorIfTrue").set((1, 1, 1))
+
+        if ifFalse is not None:
+            ifFalse.connect(n.attr("colorIfFalse"))
+        else:
+            n.attr("colorIfFalse").set((0, 0, 0))
+
+        if d == 1:
+            n.setPackable()
+        nodeCache.set(key, n)
+
+    result = Nodex(outputAttr)
+    if output is not None:
+        result.connect(output)
+
+    return result
+
+
+def animCurve(nodeType, inputs, values, name=None):
+    """ Creates an animCurve node with a linear key per (input, value).
+
+        :param nodeType: The type of curve, eg. ``animCurveTU`` (driven by time) or ``animCurveUU``.
+        :rtype: nodex.graph.Node
+    """
+    n = nodex.graph.createNode(nodeType, name=name)
+    elements = "[0:{0}]".format(len(inputs) - 1)
+    nodex.graph.setAttr(n.attr("keyTimeValue" + elements), tuple(x for key in zip(inputs, values) for x in key))
+    nodex.graph.setAttr(n.attr("keyTanInType" + elements), (LINEAR_TANGENT,) * len(inputs))
+    nodex.graph.setAttr(n.attr("keyTanOutType" + elements), (LINEAR_TANGENT,) * len(inputs))
+    return n
 
-    if ifFalse is not None:
-        ifFalse.connect(n.attr("colorIfFalse"))
-    else:
-        n.attr("colorIfFalse").set((0, 0, 0))
 
+def _keysDigest(keys):
+    """ Returns the digest of the (inputs, values) keys of a lookup table, identical for equal keys of any fn. """
+    return hashlib.sha1(repr((tuple(keys[0]), tuple(keys[1])))).hexdigest()
+
+
+def _taggedCurve(plugName, digest):
+    """ Returns the lookup table curve driven by the plug that is tagged with the digest, else None.
+
+        :rtype: nodex.graph.Node
+    """
+    for curve in mc.listConnections(plugName, source=False, destination=True, type="animCurveUU") or []:
+        if (mc.attributeQuery(LOOKUP_TABLE_ATTR, node=curve, exists=True) and
+                mc.getAttr("{0}.{1}".format(curve, LOOKUP_TABLE_ATTR)) == digest):
+            return nodex.graph.Node("animCurveUU", name=curve)
+    return None
+
+
+def lookupTable(input=None, fn=None, minInput=0.0, maxInput=1.0, steps=200, tolerance=1e-4, output=None,
+                **kwargs):
+    """ Returns the output of an ``animCurveUU`` with linear keys that approximates fn between minInput and maxInput,
+        see `sampleFunction()`. Outside of that range the curve keeps the value of its first or last key.
+
+        The keys are memoized by (fn, minInput, maxInput, steps, tolerance). A curve only has a single input, so each
+        input has its own curve. An identical table with the same input reuses its node: within `reuseNodes()` by the
+        table key and when built directly by the `LOOKUP_TABLE_ATTR` tag on the curves already driven by the input,
+        which holds the digest of the keys. Curves created while deferred are not tagged.
+    """
+    from nodex.core import Nodex
+    name = kwargs.pop("name", "lookupTable")
+
+    tableKey = (fn, minInput, maxInput, steps, tolerance)
+    keys = _lookupTables.get(tableKey)
+    if keys is None:
+        keys = sampleFunction(fn, minInput, maxInput, tolerance=tolerance, steps=steps)
+        _lookupTables.set(tableKey, keys)
+
+    if input is not None:
+        input = Nodex(input)
+        if input.dimensions() > 1:
+            result = Nodex([lookupTable(x, fn, minInput, maxInput, steps=steps, tolerance=tolerance, name=name)
+                            for x in input])
+            if output is not None:
+                result.connect(output)
+            return result
+
+    # Evaluate constants directly, on the table so the result matches the curve
+    if input is not None and input.isConstant():
+        result = Nodex(curveValue(keys[0], keys[1], constantValues(input, 1)[0]))
+        if output is not None:
+            result.connect(output)
+        return result
+
+    key = nodeKey("animCurveUU", (tableKey,), inputs=(('input', input),), name=name)
+    n = nodeCache.get(key) if input is not None else None
+    tagged = input is not None and input.isSingleAttribute() and not nodex.graph.isDeferred()
+    if n is None and tagged:
+        digest = _keysDigest(keys)
+        n = _taggedCurve(input.plug().name(), digest)
+    if n is None:
+        n = animCurve("animCurveUU", keys[0], keys[1], name=name)
+        if tagged:
+            nodex.graph.addAttr(n, LOOKUP_TABLE_ATTR, "string")
+            nodex.graph.setAttr(n.attr(LOOKUP_TABLE_ATTR), (digest,), attrType="string")
+        if input is not None:
+            input.connect(n.attr("input"))
+    if input is not None:
+        nodeCache.set(key, n)
+
+    result = Nodex(n.attr("output"))
     if output is not None:
-        ifFalse.connect(outputAttr)
+        result.connect(output)
 
-    return Nodex(outputAttr)
+    return result
 
 # endregion
 
 
 def ensurePluginsLoaded(plugins):
+    if nodex.graph.isHeadless():
+        return      # nothing is built, see `nodex.evaluate`
     for p in plugins:
         mc.loadPlugin(p, quiet=True)
\ No newline at end of file